@@ -0,0 +1,91 @@
+"""
+Calendar Sync Benchmark
+Compares two ways of keeping a local copy of a calendar current: re-listing every event, and
+incremental sync (CalendarSync in nodes/tools.py). Runs against FakeCalendarService with a fixed latency per
+API request, for several calendar sizes and a fixed number of changes between refreshes.
+
+Usage:
+    python benchmarks/calendar_sync_benchmark.py --sizes 1000 10000 50000 --changes 20 --request-ms 40
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "nodes"))
+warnings.simplefilter("ignore")
+
+from fakes import FakeCalendarService, Latency
+from tools import CalendarSync
+
+
+def populate(service: FakeCalendarService, size: int) -> None:
+    for i in range(size):
+        day = i % 365
+        service.events().insert(calendarId="primary", body={
+            "summary": f"Event {i}",
+            "start": {"dateTime": "2025-01-01T09:00:00+00:00"},
+            "end": {"dateTime": "2025-01-01T10:00:00+00:00"},
+            "description": f"day {day}",
+        }).execute()
+    service.events().insert(calendarId="primary", body={
+        "id": "standup", "summary": "Standup", "recurrence": ["RRULE:FREQ=DAILY"],
+        "start": {"dateTime": "2025-01-01T09:00:00+00:00"},
+        "end": {"dateTime": "2025-01-01T09:15:00+00:00"},
+    }).execute()
+
+
+def change(service: FakeCalendarService, count: int) -> None:
+    ids = list(service.calendars["primary"])[:count]
+    for i, event_id in enumerate(ids):
+        if i % 2:
+            service.events().delete(calendarId="primary", eventId=event_id).execute()
+        else:
+            event = service.events().get(calendarId="primary", eventId=event_id).execute()
+            service.events().update(calendarId="primary", eventId=event_id, body={**event, "summary": "moved"}).execute()
+    # One cancelled and one moved instance of the daily series.
+    service.events().delete(calendarId="primary", eventId="standup_20250103T090000Z").execute()
+    service.events().update(calendarId="primary", eventId="standup_20250106T090000Z", body={
+        "summary": "Standup", "start": {"dateTime": "2025-01-06T14:00:00+00:00"},
+        "end": {"dateTime": "2025-01-06T14:15:00+00:00"},
+    }).execute()
+
+
+def timed(service: FakeCalendarService, fn):
+    requests = service.requests
+    start = time.perf_counter()
+    result = fn()
+    return result, service.requests - requests, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 50000])
+    parser.add_argument("--changes", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=250)
+    parser.add_argument("--request-ms", type=float, default=40, help="Latency of each API request")
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'full: requests':>15} {'s':>7} {'delta: requests':>16} {'s':>7} {'speedup':>8}")
+    for size in args.sizes:
+        service = FakeCalendarService()
+        populate(service, size)
+        service.latency = Latency(args.request_ms / 1000)
+        sync = CalendarSync(service, page_size=args.page_size)
+        sync.refresh()
+        change(service, args.changes)
+
+        relist = CalendarSync(service, page_size=args.page_size)
+        _, full_requests, full_s = timed(service, relist.refresh)
+        stats, delta_requests, delta_s = timed(service, sync.refresh)
+        assert stats["mode"] == "delta" and sync.events == relist.events and sync.instances == relist.instances
+        assert sorted(sync.instances["standup"]) == ["standup_20250103T090000Z", "standup_20250106T090000Z"]
+        print(f"{size:>8} {full_requests:>15} {full_s:>7.2f} {delta_requests:>16} {delta_s:>7.3f} {full_s / delta_s:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Conversation Load Test
+Runs many concurrent conversations against the real graphs, with simulated humans answering in
+place of `input()` and fake model and calendar backends with injected latency
+(shared/load_generator.py, benchmarks/fakes.py).
+
+Scenarios:
+    langgraph_agent        the agent asks four AskHuman questions (interrupts), then finishes.
+    calendar_react_agent   the user asks for an appointment; the agent checks the clock, asks to
+                           confirm, and creates the event on the fake calendar once confirmed.
+    calendar_agent         the form-filling agent asks for the topic, start and end (checking the
+                           clock before asking for a time), then confirms and creates the event.
+
+By default a persona answers by matching the question. --script replaces it with fixed replies in
+order, whatever is asked. Reports p50/p95/p99 turn latency and sessions/s.
+
+Usage:
+    python benchmarks/conversation_load.py --graph langgraph_agent --sessions 200 --concurrency 50
+    python benchmarks/conversation_load.py --graph calendar_react_agent --model-ms 300 --think-ms 500
+    python benchmarks/conversation_load.py --graph calendar_react_agent --write-behind
+    python benchmarks/conversation_load.py --script "Roadmap review" "Tomorrow 10am" "An hour" "Room B"
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import importlib.util
+import warnings
+from typing import Callable, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "nodes"))
+sys.path.insert(0, ROOT)
+warnings.simplefilter("ignore")
+
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from shared.checkpoint import BoundedMemorySaver
+from fakes import FakeCalendarService, FakeChatModel, Latency, tool_call_reply
+from shared.load_generator import LoadGenerator, PersonaHuman, ScriptedHuman
+
+
+@tool
+def get_current_datetime():
+    """Fake clock."""
+    return "2025-02-12T10:00:00-07:00"
+
+
+def _load(path: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ------------------------------------------------------------------------------
+# Scenarios: each returns (graph, persona, opener)
+# ------------------------------------------------------------------------------
+
+MEETING_QUESTIONS = [
+    "What is the meeting about?",
+    "When should it start?",
+    "How long should it run?",
+    "Where should it be held?",
+]
+
+
+def langgraph_agent(model_latency: Latency, calendar_latency: Latency):
+    def respond(messages):
+        answered = sum(isinstance(m, ToolMessage) for m in messages)
+        if answered < len(MEETING_QUESTIONS):
+            return tool_call_reply("", "AskHuman", {"question": MEETING_QUESTIONS[answered]})
+        return "Great, your meeting is booked."
+
+    mod = _load("langgraph-agent.py", "langgraph_agent")
+    mod.get_tools = lambda: []
+    mod.get_llm_with_tools = lambda: FakeChatModel(respond, latency=model_latency)
+    persona = PersonaHuman({
+        r"about": "Quarterly roadmap review",
+        r"when|start": "Tomorrow at 10am",
+        r"how long": "One hour",
+        r"where": "Conference room B",
+        r"booked": None,
+    }, fallback="Sounds good")
+    opener = {"messages": [{"role": "system", "content": "Have a conversation with the user."}]}
+    return mod.build_graph(BoundedMemorySaver()), persona, opener
+
+
+def calendar_react_agent(model_latency: Latency, calendar_latency: Latency):
+    event = {"topic": "Dentist appointment", "start_time": "2025-02-15T09:00:00-07:00", "end_time": "2025-02-15T10:00:00-07:00"}
+
+    def respond(messages):
+        last = messages[-1]
+        if isinstance(last, ToolMessage) and last.name == "get_current_datetime":
+            return "Dentist appointment on 2025-02-15 at 9:00 MST. Shall I create it?"
+        if isinstance(last, ToolMessage):
+            return f"Done! {last.content}"
+        if isinstance(last, HumanMessage) and "yes" in last.content.lower():
+            return tool_call_reply("", "create_calendar_event", {"event_data_json": json.dumps(event)})
+        return tool_call_reply("", "get_current_datetime")
+
+    import tools
+    import calendar_react_agent as mod
+    tools.calendar_services = tools.CalendarServiceCache(build=lambda user_id: FakeCalendarService(latency=calendar_latency))
+    mod.get_model = lambda: FakeChatModel(respond, latency=model_latency)
+    mod.tools_by_name = {"get_current_datetime": get_current_datetime, "create_calendar_event": tools.create_calendar_event}
+    persona = PersonaHuman({r"shall i create": "Yes, please create it", r"done|created": None})
+    return mod.build_graph(BoundedMemorySaver()), persona, "Book a dentist appointment 3 days from now at 9am."
+
+
+FORM_QUESTIONS = {
+    "topic": "What is the meeting about?",
+    "start_time": "When should it start?",
+    "end_time": "When should it end?",
+}
+FORM_ANSWERS = {
+    "roadmap": {"topic": "Roadmap review"},
+    "10am": {"start_time": "2025-02-13T10:00:00"},
+    "11am": {"end_time": "2025-02-13T11:00:00"},
+}
+
+
+def calendar_agent(model_latency: Latency, calendar_latency: Latency):
+    def respond(messages):
+        system = messages[0]["content"]
+        if "extracts structured" in system:
+            said = re.search(r'User description: "(.*)"', system).group(1).lower()
+            return json.dumps({k: v for word, fields in FORM_ANSWERS.items() if word in said for k, v in fields.items()})
+        field = re.search(r"required field is '(\w+)'", system).group(1)
+        if field != "topic" and "Result of get_current_time_tool" not in system:
+            return tool_call_reply("", "get_current_time_tool")
+        return tool_call_reply("", "AskHuman", {"question": FORM_QUESTIONS[field]})
+
+    import tools
+    import calendar_agent as mod
+    tools.calendar_services = tools.CalendarServiceCache(build=lambda user_id: FakeCalendarService(latency=calendar_latency))
+    mod.get_llm = lambda: FakeChatModel(respond, latency=model_latency)
+    persona = PersonaHuman({r"created": None, r"confirm": "yes", r"about": "The roadmap review",
+                            r"start": "Tomorrow at 10am", r"end": "Until 11am"})
+    opener = {"messages": [HumanMessage("I want to schedule a meeting.")], "event_data": {}}
+    return mod.build_graph(BoundedMemorySaver()), persona, opener
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "langgraph_agent": langgraph_agent,
+    "calendar_react_agent": calendar_react_agent,
+    "calendar_agent": calendar_agent,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graph", default="langgraph_agent", choices=list(SCENARIOS))
+    parser.add_argument("--sessions", type=int, default=100, help="Conversations to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Conversations in flight at once")
+    parser.add_argument("--think-ms", type=float, default=0, help="Mean human think time before each reply")
+    parser.add_argument("--think-jitter-ms", type=float, default=0)
+    parser.add_argument("--model-ms", type=float, default=50, help="Mean fake model latency per call")
+    parser.add_argument("--model-jitter-ms", type=float, default=0)
+    parser.add_argument("--calendar-ms", type=float, default=80, help="Fake calendar API latency per request")
+    parser.add_argument("--max-turns", type=int, default=20)
+    parser.add_argument("--script", nargs="+", help="Reply with these lines in order instead of the persona")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--write-behind", action="store_true",
+                        help="Queue calendar inserts in a journal instead of waiting on them (calendar_react_agent)")
+    args = parser.parse_args()
+
+    if args.write_behind:
+        os.environ.setdefault("WRITE_BEHIND_JOURNAL", os.path.join(tempfile.mkdtemp(), "calendar.journal"))
+        import tools
+        tools.WRITE_BEHIND = True
+
+    graph, persona, opener = SCENARIOS[args.graph](
+        Latency(args.model_ms / 1000, args.model_jitter_ms / 1000),
+        Latency(args.calendar_ms / 1000),
+    )
+    human = ScriptedHuman(args.script) if args.script else persona
+    load = LoadGenerator(graph, human, opener=opener, max_turns=args.max_turns,
+                         think_time=Latency(args.think_ms / 1000, args.think_jitter_ms / 1000))
+    report = load.run(args.sessions, args.concurrency)
+    if args.write_behind:
+        writer = tools.get_calendar_writer()
+        writer.drain()
+        writes = writer.journal.stats()
+
+    if args.json:
+        print(json.dumps({"graph": args.graph, **report.as_dict()}, indent=2))
+    else:
+        print(f"{args.graph}: {args.sessions} sessions, concurrency {args.concurrency}, "
+              f"model {args.model_ms:.0f} ms, think {args.think_ms:.0f} ms")
+        print(report.summary())
+        if args.write_behind:
+            print(f"write-behind {writes['done']} inserts delivered, {writes['failed']} failed, {writes['pending']} pending")
+    if report.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Fakes
+Stand-ins for the LLM and the Google Calendar API with injectable latency, for load tests and
+benchmarks that should exercise the graphs without network calls or credentials. These are test
+doubles, so they live with the benchmarks (import as `from fakes import ...` from a benchmark
+script) rather than in shared/.
+
+Example usage:
+    model = FakeChatModel(["What time works?", "Done!"], latency=Latency(0.2, jitter=0.05))
+    calendar = FakeCalendarService(latency=Latency(0.08))
+    calendar.events().insert(calendarId="primary", body=event).execute()
+"""
+
+import uuid
+import itertools
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from shared.load_generator import Latency
+
+
+Reply = Union[str, AIMessage]
+
+
+def tool_call_reply(content: str, tool_name: str, args: Optional[dict] = None) -> AIMessage:
+    """An AIMessage requesting one tool call, with a fresh call id."""
+    return AIMessage(content=content, tool_calls=[{"name": tool_name, "args": args or {}, "id": f"call_{uuid.uuid4().hex[:12]}"}])
+
+
+class FakeChatModel:
+    """
+    Zero-dependency stand-in for a tool-bound chat model.
+
+    Args:
+        responses: Replies returned in order (cycled), or a callable(messages) -> reply that decides from
+            the conversation. Strings become plain AIMessages. AIMessages are copied with fresh tool call ids.
+        latency: Delay injected into every call (time.sleep for invoke, asyncio.sleep for ainvoke).
+    """
+
+    def __init__(self, responses: Union[Sequence[Reply], Callable[[List[BaseMessage]], Reply]], latency: Optional[Latency] = None):
+        self._responder = responses if callable(responses) else None
+        self._cycle = itertools.cycle(list(responses)) if not callable(responses) else None
+        self._lock = threading.Lock()
+        self.latency = latency or Latency()
+        self.calls = 0
+
+    def bind_tools(self, tools, **kwargs) -> "FakeChatModel":
+        return self
+
+    def _reply(self, messages) -> AIMessage:
+        with self._lock:
+            self.calls += 1
+            reply = self._responder(list(messages)) if self._responder else next(self._cycle)
+        if isinstance(reply, str):
+            return AIMessage(content=reply)
+        # Copy, so every call gets its own message and tool call ids.
+        calls = [{**c, "id": f"call_{uuid.uuid4().hex[:12]}"} for c in reply.tool_calls]
+        return AIMessage(content=reply.content, tool_calls=calls)
+
+    def invoke(self, messages, config=None, **kwargs) -> AIMessage:
+        self.latency.wait()
+        return self._reply(messages)
+
+    async def ainvoke(self, messages, config=None, **kwargs) -> AIMessage:
+        await self.latency.await_()
+        return self._reply(messages)
+
+
+# ------------------------------------------------------------------------------
+# Google Calendar
+# ------------------------------------------------------------------------------
+
+class FakeHttpError(Exception):
+    """Raised like googleapiclient's HttpError: the status is on `.resp.status`."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"<HttpError {status}: {reason}>")
+        self.resp = type("Response", (), {"status": status, "reason": reason})()
+
+
+class _Request:
+    def __init__(self, fn: Callable[[], Any], latency: Latency, service: Optional["FakeCalendarService"] = None):
+        self._fn = fn
+        self._latency = latency
+        self._service = service
+
+    def execute(self, num_retries: int = 0) -> Any:
+        self._latency.wait()
+        if self._service is not None:
+            with self._service._lock:
+                self._service.requests += 1
+                status = self._service._failures.pop(0) if self._service._failures else None
+            if status is not None:
+                raise FakeHttpError(status, "injected failure")
+        return self._fn()
+
+
+def _instance_of(events: Dict[str, Dict[str, Any]], event_id: str) -> Optional[Dict[str, Any]]:
+    """For an instance id "<series id>_<YYYYMMDDTHHMMSSZ>" of a recurring event: its id, recurringEventId and originalStartTime."""
+    master_id, _, stamp = event_id.rpartition("_")
+    master = events.get(master_id)
+    if not master or not master.get("recurrence"):
+        return None
+    try:
+        original = datetime.strptime(stamp, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return {"id": event_id, "recurringEventId": master_id, "originalStartTime": {"dateTime": original.isoformat()}}
+
+
+class _Events:
+    def __init__(self, service: "FakeCalendarService"):
+        self._service = service
+
+    def _request(self, fn: Callable[[], Any]) -> _Request:
+        return _Request(fn, self._service.latency, self._service)
+
+    def insert(self, calendarId: str, body: Dict[str, Any], **kwargs) -> _Request:
+        def run():
+            event = {**body, "id": body.get("id") or uuid.uuid4().hex, "status": "confirmed"}
+            event["htmlLink"] = f"https://calendar.example.com/event?eid={event['id']}"
+            with self._service._lock:
+                events = self._service.calendars.setdefault(calendarId, {})
+                if event["id"] in events:
+                    raise FakeHttpError(409, "The requested identifier already exists.")
+                events[event["id"]] = event
+                self._service._changed(calendarId, event["id"])
+            return event
+        return self._request(run)
+
+    def get(self, calendarId: str, eventId: str, **kwargs) -> _Request:
+        def run():
+            with self._service._lock:
+                return dict(self._service.calendars.get(calendarId, {})[eventId])
+        return self._request(run)
+
+    def update(self, calendarId: str, eventId: str, body: Dict[str, Any], **kwargs) -> _Request:
+        def run():
+            with self._service._lock:
+                events = self._service.calendars.get(calendarId, {})
+                instance = _instance_of(events, eventId)
+                if instance is not None and eventId not in events:
+                    # Moving one instance of a series creates an exception item for it.
+                    events[eventId] = {**body, **instance, "status": body.get("status", "confirmed")}
+                    self._service._changed(calendarId, eventId)
+                    return dict(events[eventId])
+                if eventId not in events:
+                    raise FakeHttpError(404, "Not Found")
+                events[eventId] = {**body, "id": eventId, "status": body.get("status", "confirmed"),
+                                   "htmlLink": events[eventId].get("htmlLink")}
+                self._service._changed(calendarId, eventId)
+                return dict(events[eventId])
+        return self._request(run)
+
+    def delete(self, calendarId: str, eventId: str, **kwargs) -> _Request:
+        def run():
+            with self._service._lock:
+                events = self._service.calendars.get(calendarId, {})
+                instance = _instance_of(events, eventId)
+                if instance is not None:
+                    # Like Google: a deleted instance stays listed as a cancelled exception of its series.
+                    events[eventId] = {**instance, "status": "cancelled"}
+                    self._service._changed(calendarId, eventId)
+                elif events.pop(eventId, None) is not None:
+                    self._service._changed(calendarId, eventId)
+                    for exception_id in [i for i, e in events.items() if e.get("recurringEventId") == eventId]:
+                        del events[exception_id]
+                        self._service._changed(calendarId, exception_id)
+            return ""
+        return self._request(run)
+
+    def list(self, calendarId: str, pageToken: Optional[str] = None, maxResults: int = 250,
+             syncToken: Optional[str] = None, **kwargs) -> _Request:
+        """
+        Pages of `maxResults` events in id order. With `syncToken`, only events changed since that
+        token, with deleted ones as {"id", "status": "cancelled"}. The last page has `nextSyncToken`.
+        The ordered listing is built once per change and each page is sliced from it.
+        """
+        def run():
+            service = self._service
+            with service._lock:
+                if syncToken is not None:
+                    since = int(syncToken) if syncToken.isdigit() else -1
+                    if since < service._oldest_sync_token:
+                        raise FakeHttpError(410, "Sync token is no longer valid, a full sync is required.")
+                items = service._listings.get((calendarId, syncToken))
+                if items is None:
+                    events = service.calendars.get(calendarId, {})
+                    if syncToken is None:
+                        items = [e for _, e in sorted(events.items())]
+                    else:
+                        changed = sorted(i for i, seq in service._changes.get(calendarId, {}).items() if seq > since)
+                        items = [events.get(i, {"id": i, "status": "cancelled"}) for i in changed]
+                    service._listings[(calendarId, syncToken)] = items
+                offset = int(pageToken or 0)
+                page = [dict(e) for e in items[offset:offset + maxResults]]
+                response = {"kind": "calendar#events", "items": page}
+                if offset + maxResults < len(items):
+                    response["nextPageToken"] = str(offset + maxResults)
+                else:
+                    response["nextSyncToken"] = str(service._sequence)
+                return response
+        return self._request(run)
+
+
+class _FreeBusy:
+    def __init__(self, service: "FakeCalendarService"):
+        self._service = service
+
+    def query(self, body: Dict[str, Any], **kwargs) -> _Request:
+        def run():
+            lo, hi = body["timeMin"], body["timeMax"]
+            calendars = {}
+            with self._service._lock:
+                for item in body.get("items", []):
+                    events = self._service.calendars.get(item["id"], {}).values()
+                    busy = [{"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]}
+                            for e in events
+                            if e.get("status") != "cancelled" and e["end"]["dateTime"] > lo and e["start"]["dateTime"] < hi]
+                    calendars[item["id"]] = {"busy": sorted(busy, key=lambda b: b["start"])}
+            return {"kind": "calendar#freeBusy", "timeMin": lo, "timeMax": hi, "calendars": calendars}
+        return _Request(run, self._service.latency, self._service)
+
+
+class FakeCalendarService:
+    """
+    In-memory stand-in for the object returned by googleapiclient `build("calendar", "v3", ...)`,
+    covering the events().insert/get/update/delete/list(...).execute() and
+    freebusy().query(...).execute() calls the tools make. list() pages with pageToken and supports
+    incremental sync with syncToken (expire_sync_tokens() forces a 410). insert() keeps a client
+    "id" and answers 409 if it exists. update()/delete() of an instance id ("<series id>_<UTC
+    start as YYYYMMDDTHHMMSSZ>") store a moved or cancelled exception item, as Google does. FreeBusy compares dateTimes as strings, so use one UTC offset
+    throughout, and it does not expand recurring events. `requests` counts executed calls, and
+    fail_next() makes the next calls raise.
+    """
+
+    def __init__(self, latency: Optional[Latency] = None):
+        self.latency = latency or Latency()
+        self.calendars: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        # Change log for sync tokens: calendar -> event id -> sequence number of its last change.
+        self._changes: Dict[str, Dict[str, int]] = {}
+        self._sequence = 0
+        self._oldest_sync_token = 0
+        self._failures: List[int] = []
+        # Ordered list() results by (calendar, sync token), dropped on any change.
+        self._listings: Dict[tuple, List[Dict[str, Any]]] = {}
+
+    def _changed(self, calendar_id: str, event_id: str) -> None:
+        self._sequence += 1
+        self._changes.setdefault(calendar_id, {})[event_id] = self._sequence
+        self._listings.clear()
+
+    def expire_sync_tokens(self) -> None:
+        """Make every issued sync token invalid, so the next incremental list gets a 410."""
+        with self._lock:
+            self._oldest_sync_token = self._sequence + 1
+
+    def fail_next(self, *statuses: int) -> None:
+        """Make the next executed calls raise FakeHttpError with these statuses, one per call."""
+        with self._lock:
+            self._failures.extend(statuses)
+
+    def events(self) -> _Events:
+        return _Events(self)
+
+    def freebusy(self) -> _FreeBusy:
+        return _FreeBusy(self)
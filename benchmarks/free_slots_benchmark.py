@@ -0,0 +1,61 @@
+"""
+Free Slot Benchmark
+Times shared/intervals.py `free_slots` on synthetic calendars: `--attendees` calendars with
+`--events-per-day` random events each over `--days` days, restricted to working hours in a time zone.
+Runs with everyone required and with a quorum.
+
+Usage:
+    python benchmarks/free_slots_benchmark.py --attendees 300 --days 90 --events-per-day 4
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from shared.intervals import free_slots, working_hours
+
+
+def synthetic_busy(attendees: int, days: int, per_day: int, start: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    busy = {}
+    for a in range(attendees):
+        starts = start + np.sort(rng.integers(0, days * 86400, days * per_day)) // 900 * 900
+        busy[f"user{a}@example.com"] = (starts, starts + rng.integers(1, 5, len(starts)) * 900)
+    return busy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attendees", type=int, default=300)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--events-per-day", type=int, default=4)
+    parser.add_argument("--time-zone", default="America/Denver")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = 1_740_960_000
+    window = (start, start + args.days * 86400)
+    busy = synthetic_busy(args.attendees, args.days, args.events_per_day, start)
+    total = sum(len(s) for s, _ in busy.values())
+    print(f"{args.attendees} calendars, {total:,} busy intervals over {args.days} days")
+
+    t = time.perf_counter()
+    working = working_hours(*window, tz=args.time_zone)
+    print(f"working hours        {(time.perf_counter() - t) * 1000:8.1f} ms")
+    for label, quorum in (("everyone free", None), ("90% free", int(args.attendees * 0.9)), ("half free", args.attendees // 2)):
+        timings = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            starts, ends = free_slots(busy, window, working, min_duration=30 * 60, min_free=quorum)
+            timings.append(time.perf_counter() - t)
+        print(f"{label:<20} {min(timings) * 1000:8.1f} ms  {len(starts)} slots")
+
+
+if __name__ == "__main__":
+    main()
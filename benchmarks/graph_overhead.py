@@ -0,0 +1,220 @@
+"""
+Graph Overhead Micro-Benchmarks
+Runs the real graphs from nodes/calendar_agent.py, nodes/calendar_react_agent.py and
+langgraph-agent.py with zero-latency fake models and tools, so the numbers are pure framework
+cost: scheduling, reducers, routing and checkpointing.
+
+For each graph it reports:
+    steps/s        supersteps per second (one node runs per superstep in these graphs)
+    blocks/step    memory blocks still allocated per superstep (tracemalloc), i.e. state growth
+    KiB/step       bytes still allocated per superstep
+    ckpt B/step    serialized checkpoint bytes written per superstep (BoundedMemorySaver)
+
+Results are compared against benchmarks/baselines/graph_overhead.json. A commit that changes what
+a graph does per step (a new node, a recall or tool call in a node, a reducer) saves a new baseline
+with --save-baseline in the same commit; --max-regression makes the run fail on regressions.
+steps/s is the best of --repeat timed passes, since single runs on a shared machine vary by +-20%.
+
+Usage:
+    python benchmarks/graph_overhead.py --threads 20 --steps 30
+    python benchmarks/graph_overhead.py --save-baseline
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "nodes"))
+sys.path.insert(0, ROOT)
+warnings.simplefilter("ignore")
+# The graph modules read the key at import; the fake models below never use it.
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "tvly-benchmark")
+
+from langchain_core.tools import tool
+
+from shared.checkpoint import BoundedMemorySaver
+from fakes import FakeChatModel, tool_call_reply
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baselines", "graph_overhead.json")
+
+
+# ------------------------------------------------------------------------------
+# Fakes
+# ------------------------------------------------------------------------------
+
+@tool
+def get_current_datetime():
+    """Fake clock."""
+    return "2025-02-12T10:00:00-07:00"
+
+
+@tool("tavily_search_results_json")
+def fake_search(query: str) -> list:
+    """Fake web search."""
+    return [{"url": f"https://example.com/{i}", "content": f"Result {i} for {query}. " * 20} for i in range(5)]
+
+
+def _load(path: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ------------------------------------------------------------------------------
+# Scenarios: each returns (build(checkpointer) -> graph, first input)
+# ------------------------------------------------------------------------------
+
+def calendar_agent():
+    import calendar_agent as mod
+    mod.get_llm = lambda: FakeChatModel(["What time should the meeting start?"])
+    mod.interrupt = lambda prompt: "Tomorrow at 10am, for an hour, about the roadmap."
+    initial = {"messages": [("user", "I want to schedule a meeting.")], "event_data": {}}
+    return mod.build_graph, initial
+
+
+def calendar_react_agent():
+    import calendar_react_agent as mod
+    mod.get_model = lambda: FakeChatModel([tool_call_reply("Checking the time first.", "get_current_datetime")])
+    mod.tools_by_name = {"get_current_datetime": get_current_datetime}
+    return mod.build_graph, {"messages": [("user", "Book a dentist appointment 3 days from now at 9am.")]}
+
+
+def langgraph_agent():
+    mod = _load("langgraph-agent.py", "langgraph_agent")
+    mod.get_tools = lambda: [fake_search]
+    mod.get_llm_with_tools = lambda: FakeChatModel([tool_call_reply("Let me look that up.", "tavily_search_results_json", {"query": "team offsite ideas"})])
+    return mod.build_graph, {"messages": [{"role": "system", "content": "Have a conversation with the user."}]}
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "calendar_agent": calendar_agent,
+    "calendar_react_agent": calendar_react_agent,
+    "langgraph_agent": langgraph_agent,
+}
+
+
+# ------------------------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------------------------
+
+def _run_threads(graph, initial: Any, threads: int, steps: int, prefix: str) -> int:
+    """Run `steps` supersteps on each of `threads` fresh threads; returns the supersteps executed."""
+    done = 0
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"{prefix}-{t}"}, "recursion_limit": steps + 5}
+        for i, _ in enumerate(graph.stream(initial, config, stream_mode="updates")):
+            done += 1
+            if i + 1 >= steps:
+                break
+    return done
+
+
+def measure(name: str, threads: int, steps: int, repeat: int = 3) -> Dict[str, float]:
+    build, initial = SCENARIOS[name]()
+    checkpointer = BoundedMemorySaver()
+    graph = build(checkpointer)
+    _run_threads(graph, initial, 2, steps, "warmup")
+
+    # Throughput, with tracing off; the best of `repeat` passes.
+    steps_per_s = 0.0
+    for r in range(repeat):
+        before = checkpointer.stats().resident_bytes
+        start = time.perf_counter()
+        executed = _run_threads(graph, initial, threads, steps, f"timed{r}")
+        steps_per_s = max(steps_per_s, executed / (time.perf_counter() - start))
+        ckpt_bytes = checkpointer.stats().resident_bytes - before
+
+    # Allocations, on separate threads so the timed run is not slowed by tracing.
+    tracemalloc.start()
+    snap_before = tracemalloc.take_snapshot()
+    traced = _run_threads(graph, initial, max(1, threads // 4), steps, "traced")
+    snap_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = snap_after.compare_to(snap_before, "filename")
+    blocks = sum(d.count_diff for d in diff)
+    size = sum(d.size_diff for d in diff)
+
+    return {
+        "steps_per_s": steps_per_s,
+        "blocks_per_step": blocks / traced,
+        "kib_per_step": size / traced / 1024,
+        "ckpt_bytes_per_step": ckpt_bytes / executed,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Baselines
+# ------------------------------------------------------------------------------
+
+# For these metrics a higher value is better; for the rest lower is better.
+HIGHER_IS_BETTER = {"steps_per_s"}
+
+
+def regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    found = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if not base:
+                continue
+            change = (value - base) / base
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > threshold:
+                found.append(f"{name}.{metric}: {base:.1f} -> {value:.1f} ({change:+.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=20, help="Threads (conversations) per graph")
+    parser.add_argument("--steps", type=int, default=30, help="Supersteps per thread")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per graph; steps/s is the best")
+    parser.add_argument("--graphs", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit non-zero if any metric is this fraction worse than the baseline (e.g. 0.2)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'graph':<22} {'steps/s':>9} {'blocks/step':>12} {'KiB/step':>9} {'ckpt B/step':>12}   vs baseline (steps/s)")
+    for name in args.graphs:
+        r = results[name] = measure(name, args.threads, args.steps, args.repeat)
+        base = baseline.get(name, {}).get("steps_per_s")
+        delta = f"{(r['steps_per_s'] - base) / base:+.0%}" if base else "n/a"
+        print(f"{name:<22} {r['steps_per_s']:9.0f} {r['blocks_per_step']:12.0f} {r['kib_per_step']:9.1f} {r['ckpt_bytes_per_step']:12.0f}   {delta}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({"threads": args.threads, "steps": args.steps, "repeat": args.repeat,
+                       "python": sys.version.split()[0], "results": merged}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline saved to {os.path.relpath(args.baseline, ROOT)}")
+        return
+
+    if args.max_regression is not None:
+        found = regressions(results, baseline, args.max_regression)
+        if found:
+            print("\nRegressions against the baseline:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print(f"\nNo metric regressed by more than {args.max_regression:.0%}")
+
+
+if __name__ == "__main__":
+    main()
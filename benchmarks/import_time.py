@@ -0,0 +1,105 @@
+"""
+Import Time Benchmark
+Imports each graph module in a fresh interpreter and checks it against a startup budget. Importing a
+module should only define things: no LLM clients, no compiled graphs, no runs. To prove that, the
+children run without API keys and fail if any graph was built during import.
+
+The cost of `import langgraph.graph` is printed as a floor, since every module pays it.
+
+Usage:
+    python benchmarks/import_time.py --budget 2.0 --repeat 3
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must import cheaply. Paths are run the way `python <path>` would see them.
+TARGETS = [
+    "shared/graph_registry.py",
+    "shared/service.py",
+    "main.py",
+    "nodes/calendar_agent.py",
+    "nodes/calendar_react_agent.py",
+    "langgraph-agent.py",
+    "langsmith-test.py",
+    "multi-agent-turn-convo.py",
+    "saturday.py",
+]
+
+# Runs in the child: import the file as a module (not as __main__), report time and graphs built.
+_CHILD = r"""
+import os, sys, json, time, warnings, importlib.util
+warnings.simplefilter("ignore")
+path, root = sys.argv[1], sys.argv[2]
+sys.path.insert(0, root)
+if path == "-":
+    start = time.perf_counter()
+    import langgraph.graph
+    print(json.dumps({"seconds": time.perf_counter() - start, "built": []}))
+    raise SystemExit
+sys.path.insert(0, os.path.dirname(path))
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("_target", path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+seconds = time.perf_counter() - start
+from shared.graph_registry import graphs
+print(json.dumps({"seconds": seconds, "built": sorted(graphs.build_times())}))
+"""
+
+
+def measure(path: str, repeat: int) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "TAVILY_API_KEY")}
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", _CHILD, path, ROOT],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=2.0, help="Maximum import time per module, in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per module (the fastest is kept)")
+    parser.add_argument("targets", nargs="*", default=TARGETS, help="Files to check, relative to the repo root")
+    args = parser.parse_args()
+
+    floor = measure("-", args.repeat)
+    print(f"{'import langgraph.graph (floor)':<34} {floor['seconds'] * 1000:8.0f} ms")
+
+    failures = []
+    for target in args.targets:
+        result = measure(os.path.join(ROOT, target), args.repeat)
+        if "error" in result:
+            failures.append(target)
+            print(f"{target:<34} {'ERROR':>8}    {result['error']}")
+            continue
+        status = "ok"
+        if result["built"]:
+            status = f"FAIL built graphs at import: {result['built']}"
+        elif result["seconds"] > args.budget:
+            status = f"FAIL over budget ({args.budget:.1f} s)"
+        if status != "ok":
+            failures.append(target)
+        print(f"{target:<34} {result['seconds'] * 1000:8.0f} ms  {status}")
+
+    if failures:
+        print(f"\n{len(failures)} module(s) failed the startup budget")
+        sys.exit(1)
+    print(f"\nAll {len(args.targets)} modules import within {args.budget:.1f} s without building graphs or clients")
+
+
+if __name__ == "__main__":
+    main()
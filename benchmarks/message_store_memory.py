@@ -0,0 +1,83 @@
+"""
+Message Store Memory Benchmark
+Runs a many-thread workload where every thread starts with the same long system prompt and
+compares resident checkpoint bytes with the default serializer against InterningSerializer,
+then deletes every thread and checks the store let go of every body.
+
+Usage:
+    python benchmarks/message_store_memory.py --threads 500 --turns 4
+"""
+
+import os
+import sys
+import argparse
+from typing import Annotated
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, SystemMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+from shared.checkpoint import BoundedMemorySaver
+from shared.message_store import MessageStore, interning_saver
+
+# Roughly the size of the calendar assistant prompt.
+SYSTEM_PROMPT = "You are a helpful calendar assistant. " * 120
+CANNED_REPLY = "Sure, I can help you schedule that. Which day works best for you? " * 8
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def fake_model(state: State):
+    return {"messages": [AIMessage(CANNED_REPLY)]}
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(State)
+    builder.add_node("agent", fake_model)
+    builder.add_edge(START, "agent")
+    builder.add_edge("agent", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run(checkpointer, threads: int, turns: int) -> int:
+    graph = build_graph(checkpointer)
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"thread-{t}"}}
+        graph.invoke({"messages": [SystemMessage(SYSTEM_PROMPT)]}, config)
+        for turn in range(turns):
+            graph.invoke({"messages": [("user", f"message {turn} from thread {t}")]}, config)
+    return checkpointer.stats().resident_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=4)
+    args = parser.parse_args()
+
+    baseline = run(BoundedMemorySaver(max_resident_bytes=None), args.threads, args.turns)
+
+    store = MessageStore()
+    saver = interning_saver(store=store, max_resident_bytes=None)
+    interned = run(saver, args.threads, args.turns)
+    store_chars = store.stats()["stored_chars"]
+    for t in range(args.threads):
+        saver.delete_thread(f"thread-{t}")
+    left = store.stats()
+
+    print(f"threads={args.threads} turns={args.turns}")
+    print(f"default serializer:     {baseline / 1e6:8.2f} MB checkpoint data")
+    print(f"interning serializer:   {interned / 1e6:8.2f} MB checkpoint data + {store_chars / 1e6:.2f} MB store")
+    print(f"reduction:              {baseline / max(interned + store_chars, 1):8.1f}x")
+    print(f"after deleting threads: {left['unique_bodies']} bodies left in the store ({left['released_bodies']} released)")
+    if left["unique_bodies"]:
+        raise SystemExit("The store kept bodies no checkpoint refers to")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Plan DAG Benchmark
+Runs the planner graph from saturday.py on a layered plan, with a fake planner and a fake worker
+model with fixed latency, at several concurrency caps. Compares the wall time with the sum of all
+steps (sequential execution) and with the critical path (the best any schedule can do).
+
+Usage:
+    python benchmarks/plan_dag_benchmark.py --levels 4 --width 4 --step-ms 100
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import importlib.util
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.simplefilter("ignore")
+
+from langchain_core.messages import HumanMessage
+
+from fakes import FakeChatModel, Latency
+from shared.plan_dag import PlanStep, remaining_depth
+
+
+def layered_plan(levels: int, width: int, seed: int = 0):
+    """`levels` levels of `width` steps; each step after the first level needs one or two steps of the level before."""
+    rng = random.Random(seed)
+    steps = []
+    for level in range(levels):
+        for i in range(width):
+            deps = []
+            if level:
+                previous = [f"l{level - 1}s{j}" for j in range(width)]
+                deps = rng.sample(previous, k=min(len(previous), rng.choice([1, 2])))
+            steps.append(PlanStep(id=f"l{level}s{i}", task=f"Research part {i} of stage {level}", depends_on=deps))
+    return steps
+
+
+class FakePlanner:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def invoke(self, messages, config=None, **kwargs):
+        return self.plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, default=4)
+    parser.add_argument("--width", type=int, default=4)
+    parser.add_argument("--step-ms", type=float, default=100, help="Fake worker model latency per step")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    spec = importlib.util.spec_from_file_location("saturday", os.path.join(ROOT, "saturday.py"))
+    saturday = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(saturday)
+
+    steps = layered_plan(args.levels, args.width)
+    plan = saturday.Plan(goal="benchmark", steps=steps)
+    saturday.get_planner = lambda: FakePlanner(plan)
+    saturday.get_llm = lambda: FakeChatModel(["done"], latency=Latency(args.step_ms / 1000))
+
+    step_s = args.step_ms / 1000
+    critical = max(remaining_depth(steps).values()) * step_s
+    print(f"{len(steps)} steps, sequential {len(steps) * step_s:.2f} s, critical path {critical:.2f} s")
+    print(f"{'max_concurrency':>15} {'wall s':>8} {'vs sequential':>14} {'vs critical path':>17}")
+    for cap in args.concurrency:
+        graph = saturday.build_graph(max_concurrency=cap)
+        config = {"configurable": {"thread_id": f"bench-{cap}"}, "recursion_limit": 4 * len(steps) + 10}
+        start = time.perf_counter()
+        result = graph.invoke({"messages": [HumanMessage(content="benchmark")]}, config)
+        elapsed = time.perf_counter() - start
+        assert len(result["step_results"]) == len(steps)
+        print(f"{cap:>15} {elapsed:8.2f} {len(steps) * step_s / elapsed:13.1f}x {elapsed / critical:16.2f}x")
+
+
+if __name__ == "__main__":
+    main()
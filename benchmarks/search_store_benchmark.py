@@ -0,0 +1,122 @@
+"""
+Search Store Benchmark
+Simulates a research conversation: every turn the agent searches (some queries repeat in other
+words), the tool result is added to the history, and the whole history is the next prompt.
+Compares the prompt tokens per turn for the plain Tavily tool (its content is a url and snippet
+per result) with shared/search_store.py (refs and query-relevant excerpts of the full pages within
+a token budget), counts cache hits, and checks that the store kept every full page.
+
+Both run a real TavilySearchResults whose api_wrapper is replaced by a stub that returns synthetic
+pages of `--page-words` words, so the tool's own content/artifact split is exercised.
+
+Usage:
+    python benchmarks/search_store_benchmark.py --turns 8 --page-words 3000 --budget 1200
+"""
+
+import os
+import sys
+import json
+import zlib
+import random
+import argparse
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+warnings.simplefilter("ignore")
+
+from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+
+from shared.search_store import SearchResultStore, cached_search_tool, estimate_tokens
+
+QUERIES = [
+    "best venues for a team offsite in Lisbon",
+    "Lisbon team offsite venues best",
+    "average flight cost Berlin to Lisbon in May",
+    "weather in Lisbon in May",
+    "team building activities for remote engineering teams",
+    "Weather in Lisbon in May?",
+    "coworking spaces in Lisbon with meeting rooms",
+    "vegetarian restaurants near Lisbon city centre for groups",
+]
+
+FILLER = ("the of a page with navigation links cookie banner footer subscribe newsletter share article "
+          "related posts comments author archive tags menu search login sidebar advert copyright").split()
+
+
+class StubTavilyAPI(TavilySearchAPIWrapper):
+    """Returns five long pages per query; each page has a few paragraphs that mention the query terms."""
+    page_words: int = 3000
+    calls: int = 0
+    pages: dict = {}
+
+    def raw_results(self, query: str, max_results: int = 5, *args, **kwargs) -> dict:
+        self.calls += 1
+        rng = random.Random(zlib.crc32(query.encode()))
+        pages = []
+        for i in range(5):
+            paragraphs = []
+            for p in range(self.page_words // 60):
+                words = [rng.choice(FILLER) for _ in range(60)]
+                if p % 7 == 3:
+                    words[::6] = (query.split() * 10)[:10]
+                paragraphs.append(" ".join(words[:60]))
+            url = f"https://example.com/{zlib.crc32(query.encode()) % 10_000}/{i}"
+            pages.append({"url": url, "title": f"Result {i}", "content": paragraphs[0][:300],
+                          "raw_content": "\n\n".join(paragraphs), "score": 0.9 - i / 10})
+            self.pages[url] = pages[-1]["raw_content"]
+        return {"query": query, "results": pages[:max_results]}
+
+
+def tavily(page_words: int) -> TavilySearchResults:
+    api = StubTavilyAPI(tavily_api_key="stub", page_words=page_words)
+    return TavilySearchResults(max_results=5, include_raw_content=True, api_wrapper=api)
+
+
+def run(turns: int, make_tool, tokens_per_user_turn: int = 30):
+    """Prompt tokens sent to the model on each turn, with the tool result of every earlier turn in history."""
+    history = 0
+    per_turn = []
+    for turn in range(turns):
+        query = QUERIES[turn % len(QUERIES)]
+        history += tokens_per_user_turn
+        result = make_tool(query)
+        history += estimate_tokens(result if isinstance(result, str) else json.dumps(result, ensure_ascii=False))
+        per_turn.append(history)
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--page-words", type=int, default=3000)
+    parser.add_argument("--budget", type=int, default=1200, help="Token budget of one search result")
+    args = parser.parse_args()
+
+    plain_search = tavily(args.page_words)
+    plain = run(args.turns, lambda q: plain_search.invoke({"query": q}))
+
+    store = SearchResultStore(ttl_s=3600)
+    stored_search = tavily(args.page_words)
+    tool = cached_search_tool(stored_search, store, token_budget=args.budget)
+    results = {}
+    stored = run(args.turns, lambda q: results.setdefault(q, tool.invoke({"query": q})))
+
+    print(f"{'turn':>4} {'plain prompt tokens':>20} {'with store':>11} {'change':>7}")
+    for turn, (a, b) in enumerate(zip(plain, stored), 1):
+        print(f"{turn:>4} {a:>20,} {b:>11,} {b / a - 1:>+6.0%}")
+    print(f"searches run: plain {plain_search.api_wrapper.calls}, with store {stored_search.api_wrapper.calls} "
+          f"({store.stats()})")
+
+    # The store must hold the whole page and title of every result, not the tool's snippets.
+    refs = [r for result in results.values() for r in result]
+    kept = [store.document(r["ref"]) for r in refs]
+    full = sum(d.content == stored_search.api_wrapper.pages[d.url] and d.title != d.url for d in kept)
+    print(f"full pages kept: {full}/{len(kept)}, {sum(len(d.content) for d in kept) // max(1, len(kept)):,} chars each")
+    if full != len(kept):
+        raise SystemExit("The store kept snippets instead of the full pages")
+
+
+if __name__ == "__main__":
+    main()
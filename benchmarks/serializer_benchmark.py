@@ -0,0 +1,122 @@
+"""
+Checkpoint Serializer Benchmark
+Compares the default serializer against CompactSerializer (with and without a trained dictionary)
+on a message-heavy thread: search-style tool results, tool-call dicts and a long system prompt.
+
+Reports checkpoint bytes, the time to run the workload (dominated by checkpoint writes), and the
+latency of `graph.get_state(thread).values["messages"][-1]`, which the agent loops call every turn.
+
+Usage:
+    python benchmarks/serializer_benchmark.py --turns 30
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Annotated
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+from shared.checkpoint import BoundedMemorySaver
+from shared.serializer import CompactSerializer
+
+WORDS = (
+    "calendar meeting schedule team weekly sync review project deadline budget launch "
+    "customer support release planning roadmap design engineering marketing sales office "
+    "conference room remote video call agenda notes follow up action items quarter report"
+).split()
+
+
+def fake_text(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def fake_search_results(rng: random.Random, query: str) -> str:
+    # Shaped like TavilySearchResults output with include_raw_content=True.
+    return json.dumps([
+        {
+            "url": f"https://example.com/{rng.randrange(10**6)}",
+            "title": fake_text(rng, 8),
+            "content": fake_text(rng, 60),
+            "raw_content": fake_text(rng, 400),
+            "score": rng.random(),
+        }
+        for _ in range(5)
+    ])
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def make_turn(rng: random.Random, turn: int) -> list:
+    call_id = f"call_{turn}"
+    query = fake_text(rng, 6)
+    return [
+        ("user", fake_text(rng, 20)),
+        AIMessage("", tool_calls=[{"name": "tavily_search_results_json", "args": {"query": query}, "id": call_id}]),
+        ToolMessage(fake_search_results(rng, query), tool_call_id=call_id, name="tavily_search_results_json"),
+        AIMessage(fake_text(rng, 120)),
+    ]
+
+
+def build_graph(checkpointer):
+    # Every turn is fed in as input so the benchmark measures checkpointing, not model calls.
+    builder = StateGraph(State)
+    builder.add_node("agent", lambda state: {})
+    builder.add_edge(START, "agent")
+    builder.add_edge("agent", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run(name: str, serde, turns: int, reads: int) -> None:
+    rng = random.Random(0)
+    checkpointer = BoundedMemorySaver(max_resident_bytes=None, serde=serde)
+    graph = build_graph(checkpointer)
+    thread = {"configurable": {"thread_id": "bench"}}
+
+    start = time.perf_counter()
+    graph.invoke({"messages": [SystemMessage(fake_text(rng, 600))]}, thread)
+    for turn in range(turns):
+        graph.invoke({"messages": make_turn(rng, turn)}, thread)
+    write_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        graph.get_state(thread).values["messages"][-1]
+    read_ms = (time.perf_counter() - start) / reads * 1000
+
+    size = checkpointer.stats().resident_bytes
+    print(f"{name:<28} {size / 1e6:8.2f} MB {write_s:8.2f} s {read_ms:10.2f} ms")
+
+
+def training_samples(turns: int) -> list:
+    rng = random.Random(1)
+    return [m for turn in range(turns) for m in make_turn(rng, turn) if not isinstance(m, tuple)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+
+    trained = CompactSerializer()
+    trained.train(training_samples(50))
+
+    print(f"{'serializer':<28} {'checkpoint':>11} {'workload':>10} {'last msg read':>13}")
+    run("default (JsonPlus)", None, args.turns, args.reads)
+    run("compact", CompactSerializer(), args.turns, args.reads)
+    run("compact + trained dict", trained, args.turns, args.reads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Calendar Service Cache Benchmark
+Replays `--requests` tool calls from `--users` users (Zipf-distributed, so a few users are busy and
+most are occasional) against nodes/tools.py `CalendarServiceCache` of several sizes, and against
+building a service on every call. A build is a real googleapiclient `build("calendar", "v3")` plus
+`--credentials-ms` of sleep for loading and refreshing the user's token.
+
+Usage:
+    python benchmarks/service_cache_benchmark.py --users 1000 --requests 2000 --sizes 64 256 1024
+"""
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "nodes"))
+warnings.simplefilter("ignore")
+
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build
+
+from tools import CalendarServiceCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[64, 256, 1024])
+    parser.add_argument("--zipf", type=float, default=1.2, help="Skew of the user distribution")
+    parser.add_argument("--credentials-ms", type=float, default=20, help="Token load and refresh time per build")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    users = [f"user{u % args.users}" for u in rng.zipf(args.zipf, args.requests)]
+
+    def build_service(user_id):
+        time.sleep(args.credentials_ms / 1000)
+        return build("calendar", "v3", credentials=AnonymousCredentials())
+
+    start = time.perf_counter()
+    for user_id in users:
+        build_service(user_id)
+    uncached = time.perf_counter() - start
+    print(f"{len(set(users))} distinct users over {len(users)} requests")
+    print(f"{'no cache':<16} {uncached:7.2f} s  {uncached / len(users) * 1000:7.2f} ms/request")
+
+    for size in args.sizes:
+        cache = CalendarServiceCache(build=build_service, max_users=size)
+        start = time.perf_counter()
+        for user_id in users:
+            cache.get(user_id)
+        elapsed = time.perf_counter() - start
+        stats = cache.stats()
+        print(f"{f'cache {size}':<16} {elapsed:7.2f} s  {elapsed / len(users) * 1000:7.2f} ms/request  "
+              f"hit ratio {stats['hit_ratio']:.2f}, {stats['evictions']} evictions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Agent Service Load Test
+Drives many concurrent sessions through the ASGI service in-process (httpx.ASGITransport, no
+network) against a fake model with injected latency. Each session starts a thread, posts a user
+message, is interrupted by an AskHuman-style node, and resumes with an answer.
+
+Because the service is async end to end, sessions overlap while the fake model "waits", so
+throughput should scale with concurrency up to the CPU limit.
+
+Usage:
+    python benchmarks/service_load_test.py --sessions 200 --concurrency 50 --model-latency-ms 50
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Annotated
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from langchain_core.messages import AIMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langgraph.types import interrupt
+
+from shared.message_store import interning_saver
+from shared.service import create_app
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def build_fake_calendar_graph(model_latency: float):
+    async def agent(state: State):
+        await asyncio.sleep(model_latency)
+        if state["messages"][-1].type == "human":
+            return {"messages": [AIMessage("What time should the meeting start?")]}
+        return {"messages": [AIMessage("Done, the event is on your calendar.")]}
+
+    def ask_human(state: State):
+        answer = interrupt(state["messages"][-1].content)
+        return {"messages": [("user", answer), AIMessage("Thanks.")]}
+
+    def should_continue(state: State):
+        return "ask_human" if state["messages"][-1].content.endswith("?") else END
+
+    builder = StateGraph(State)
+    builder.add_node("agent", agent)
+    builder.add_node("ask_human", ask_human)
+    builder.add_edge(START, "agent")
+    builder.add_conditional_edges("agent", should_continue)
+    builder.add_edge("ask_human", END)
+    return builder.compile(checkpointer=interning_saver())
+
+
+async def session(client: httpx.AsyncClient, latencies: list) -> None:
+    start = time.perf_counter()
+    thread_id = (await client.post("/graphs/calendar/threads", json={})).json()["thread_id"]
+    r = await client.post(f"/graphs/calendar/threads/{thread_id}/messages", json={"content": "Book a meeting tomorrow"})
+    assert r.json()["interrupts"], r.text
+    r = await client.post(f"/graphs/calendar/threads/{thread_id}/resume", json={"value": "10am"})
+    assert r.status_code == 200, r.text
+    latencies.append(time.perf_counter() - start)
+
+
+async def run(sessions: int, concurrency: int, model_latency: float) -> None:
+    app = create_app({"calendar": build_fake_calendar_graph(model_latency)})
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://service") as client:
+        async def bounded():
+            async with semaphore:
+                await session(client, latencies)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(sessions)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    q = statistics.quantiles(latencies, n=100)
+    print(f"sessions={sessions} concurrency={concurrency} model_latency={model_latency * 1000:.0f}ms")
+    print(f"  {sessions / elapsed:8.1f} sessions/s  {3 * sessions / elapsed:8.1f} requests/s")
+    print(f"  session latency p50={q[49] * 1000:.0f}ms p95={q[94] * 1000:.0f}ms p99={q[98] * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--model-latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.sessions, args.concurrency, args.model_latency_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
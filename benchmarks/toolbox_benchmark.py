@@ -0,0 +1,58 @@
+"""
+Toolbox Schema Token Benchmark
+Runs whole conversations through the graphs that bind their model with a Toolbox
+(shared/toolbox.py), using the scenarios of benchmarks/conversation_load.py (fake model and
+calendar, simulated human), and reports the tool schema tokens each graph's model calls were bound
+with against binding every tool on every call.
+
+    calendar_agent         ask_missing_field offers AskHuman, the clock only while a time is
+                           missing and not yet checked, and event creation only on a complete form.
+    calendar_react_agent   call_model drops the clock once it has answered for the current message.
+
+Token counts are estimates (shared.search_store.estimate_tokens over each tool's JSON schema).
+
+Usage:
+    python benchmarks/toolbox_benchmark.py --sessions 20
+"""
+
+import os
+import sys
+import argparse
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "nodes"))
+sys.path.insert(0, ROOT)
+warnings.simplefilter("ignore")
+
+from conversation_load import SCENARIOS
+from fakes import Latency
+from shared.load_generator import LoadGenerator
+
+GRAPHS = ["calendar_agent", "calendar_react_agent"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="Conversations per graph")
+    parser.add_argument("--graphs", nargs="*", default=GRAPHS, choices=GRAPHS)
+    args = parser.parse_args()
+
+    print(f"{'graph':<22} {'sessions':>8} {'calls':>6} {'tokens/call':>12} {'all tools':>10} {'saved':>6}")
+    for name in args.graphs:
+        graph, persona, opener = SCENARIOS[name](Latency(), Latency())
+        module = sys.modules[name]
+        before = module.toolbox.stats()
+        report = LoadGenerator(graph, persona, opener=opener).run(args.sessions, concurrency=1)
+        after = module.toolbox.stats()
+        calls = after["calls"] - before["calls"]
+        sent = after["schema_tokens_sent"] - before["schema_tokens_sent"]
+        full = after["schema_tokens_full"] - before["schema_tokens_full"]
+        if report.errors or not calls:
+            raise SystemExit(f"{name}: {report.errors} failed sessions, {calls} model calls\n{report.summary()}")
+        print(f"{name:<22} {report.completed:>8} {calls:>6} {sent / calls:>12.0f} {full / calls:>10.0f} "
+              f"{1 - sent / full:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Worker Pool Scaling Benchmark
+Measures turns per second of a fake-model chat graph run through GraphWorkerPool with an
+increasing number of worker processes. The fake model returns instantly, so the numbers reflect
+the CPU-bound framework work (message merging, validation, checkpoint serialization) that
+otherwise shares one GIL.
+
+Usage:
+    python benchmarks/worker_pool_benchmark.py --threads 64 --turns 10 --workers 1 2 4 8
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Annotated
+from typing_extensions import TypedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+
+from shared.worker_pool import GraphWorkerPool
+
+REPLY = "Sure, which day and time should I put the meeting on your calendar? " * 10
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def build_chat_graph(checkpointer):
+    model = FakeListChatModel(responses=[REPLY])
+
+    def chatbot(state: State):
+        return {"messages": [model.invoke(state["messages"])]}
+
+    builder = StateGraph(State)
+    builder.add_node("agent", chatbot)
+    builder.add_edge(START, "agent")
+    builder.add_edge("agent", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def run(workers: int, threads: int, turns: int) -> float:
+    with GraphWorkerPool({"chat": build_chat_graph}, num_workers=workers) as pool:
+        # Warm up every shard so graph construction is not timed.
+        for t in range(workers * 4):
+            pool.invoke("chat", {"messages": [("user", "warmup")]}, {"configurable": {"thread_id": f"warmup-{t}"}})
+        start = time.perf_counter()
+        futures = [
+            pool.submit("chat", "invoke", {"messages": [("user", f"turn {turn}")]}, config={"configurable": {"thread_id": f"t{t}"}})
+            for turn in range(turns)
+            for t in range(threads)
+        ]
+        for future in futures:
+            future.result()
+        return threads * turns / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()} threads={args.threads} turns={args.turns}")
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        rate = run(workers, args.threads, args.turns)
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {rate:9.1f} turns/s  speedup {rate / baseline:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
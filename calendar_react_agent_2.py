@@ -28,6 +28,8 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import Command, interrupt
 from langgraph.prebuilt import ToolNode, tools_condition
 
+from shared.routing import Case, Router
+
 # Environment Setup
 import os
 from dotenv import load_dotenv
@@ -87,20 +89,10 @@ model_with_tools = llm.bind_tools(tools + [AskHuman])
 # TODO: CHeck if this can be done with pydantic instead
 
 # Define the function that determines whether to continue or not
-def should_continue(state):
-    messages = state["messages"]
-    last_message = messages[-1]
-    # If there is no function call, then we finish
-    if not last_message.tool_calls:
-        return END
-    # If tool call is asking Human, we return that node
-    # You could also add logic here to let some system know that there's something that requires Human input
-    # For example, send a slack message, etc
-    elif last_message.tool_calls[0]["name"] == "AskHuman":
-        return "ask_human"
-    # Otherwise if there is, we continue
-    else:
-        return "action"
+# If there is no function call, then we finish. If the tool call is asking the Human, we go to that node
+# (you could also let some system know that there's something that requires Human input, e.g. a slack message).
+# Otherwise we continue to the action node.
+should_continue = Router(Case(tools={"AskHuman": "ask_human"}, no_tool=END, other_tool="action"), name="should_continue")
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
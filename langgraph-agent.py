@@ -17,25 +17,24 @@ from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-LANGSMITH_TRACING = os.getenv('LANGSMITH_TRACING')
-LANGSMITH_ENDPOINT = os.getenv('LANGSMITH_ENDPOINT')
-LANGSMITH_API_KEY = os.getenv('LANGSMITH_API_KEY')
-LANGSMITH_PROJECT = os.getenv('LANGSMITH_PROJECT')
 
 # Imports from LangGraph and related libraries
 from typing import Annotated, Any, List
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.types import Command, interrupt
 
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+
+from shared.graph_registry import graphs, lazy_resource
+from shared.budget import BUDGET_NODE, budget_exceeded
+from shared.routing import Case, Router
+from shared.search_store import SearchResultStore, cached_search_tool
+from shared.long_term_memory import get_memory, recall_messages
+from shared.message_store import interning_saver
 
 # Define Pydantic Models
 class OverallState(BaseModel):
@@ -45,31 +44,40 @@ class AskHuman(BaseModel):
     """Ask the human a question"""
     question: str
 
-# Instantiate the search tool and add the human assistance tool.
-search_tool = TavilySearchResults(
-    max_results=5,
-    search_depth="advanced",
-    include_answer=True,
-    include_raw_content=True
-    include_images=False
-)
-
-tools = [search_tool]
-tool_node = ToolNode(tools)
+# Search results are cached per query and kept out of the messages: the tool returns refs and
+# query-relevant excerpts, and full pages stay in search_store (see shared/search_store.py).
+search_store = SearchResultStore(ttl_s=3600)
+
+# Instantiate the search tool (on first use; the Tavily and OpenAI clients are slow to import).
+@lazy_resource
+def get_tools():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    search_tool = TavilySearchResults(
+        max_results=5,
+        search_depth="advanced",
+        include_answer=True,
+        include_raw_content=True,
+        include_images=False
+    )
+    return [cached_search_tool(search_tool, search_store)]
 
 # Initialize the LLM (OpenAI) and bind the tools.
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.5,
-    api_key=OPENAI_API_KEY
-)
-llm_with_tools = llm.bind_tools(tools + [AskHuman])
-
-https://python.langchain.com/api_reference/core/index.html
+@lazy_resource
+def get_llm_with_tools():
+    from langchain_openai import ChatOpenAI
+    llm = ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.5,
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
+    return llm.bind_tools(get_tools() + [AskHuman])
+
+# https://python.langchain.com/api_reference/core/index.html
 
 # Define the agent node function.
-def chatbot(state: OverallState):
-    message = llm_with_tools.invoke(state.messages)
+# Relevant memories from the user's earlier conversations are added to the prompt only.
+def chatbot(state: OverallState, config: RunnableConfig):
+    message = get_llm_with_tools().invoke(recall_messages(get_memory(), state.messages, config), config)
     # Disable parallel tool calling to avoid duplicate tool calls on resume.
     if hasattr(message, "tool_calls"):
         assert len(message.tool_calls) <= 1
@@ -84,37 +92,30 @@ def ask_human(state):
     return {"messages": tool_message}
 
 # Conditional edge 
-def should_continue(state):
-    messages = state.messages
-    last_message = messages[-1]
-    # If there is no function call, then we finish
-    if not last_message.tool_calls:
-        return END
-    # If tool call is asking Human, we return that node
-    # You could also add logic here to let some system know that there's something that requires Human input
-    # For example, send a slack message, etc
-    elif last_message.tool_calls[0]["name"] == "AskHuman":
-        return "ask_human"
-    # Otherwise if there is, we continue
-    else:
-        return "tools"
-
-graph_builder = StateGraph(OverallState)
-
-# Add nodes to graph
-graph_builder.add_node("agent", chatbot)
-graph_builder.add_node("ask_human", ask_human)
-graph_builder.add_node("tools", tool_node)
-
-# Set graph edges - Note the conditional edge from agent using should continue function.
-graph_builder.add_conditional_edges("agent", should_continue)
-graph_builder.add_edge("tools", "agent")
-graph_builder.add_edge("ask_human", "agent")
-graph_builder.add_edge(START, "agent")
-
-# Compile the graph with an in-memory checkpointer for state persistence.
-memory = MemorySaver()
-graph = graph_builder.compile(checkpointer=memory)
+# If there is no function call, then we finish. If the tool call is asking the Human, we go to that node
+# (you could also let some system know that there's something that requires Human input, e.g. a slack message).
+# Otherwise we run the tools.
+should_continue = Router(Case(tools={"AskHuman": "ask_human"}, no_tool=END, other_tool="tools"), name="should_continue")
+
+@graphs.register("langgraph_agent")
+def build_graph(checkpointer=None):
+    graph_builder = StateGraph(OverallState)
+
+    # Add nodes to graph
+    graph_builder.add_node("agent", chatbot)
+    graph_builder.add_node("ask_human", ask_human)
+    graph_builder.add_node("tools", ToolNode(get_tools()))
+    graph_builder.add_node(BUDGET_NODE, budget_exceeded)
+
+    # Set graph edges - Note the conditional edge from agent using should continue function.
+    should_continue.add_to(graph_builder, "agent", guard=True)
+    graph_builder.add_edge(BUDGET_NODE, END)
+    graph_builder.add_edge("tools", "agent")
+    graph_builder.add_edge("ask_human", "agent")
+    graph_builder.add_edge(START, "agent")
+
+    # Compile the graph with an in-memory checkpointer for state persistence.
+    return graph_builder.compile(checkpointer=checkpointer or interning_saver())
 
 def get_human_feedback(query):
     print("Human Query:")
@@ -129,6 +130,7 @@ def main():
     initial_state = {"messages": [{"role": "system", "content": system_prompt}]}
     thread = {"configurable": {"thread_id": "1"}}
 
+    graph = graphs.get("langgraph_agent")
     graph.invoke(initial_state, thread)
      
     while (True):
@@ -9,22 +9,17 @@
 import logging
 logging.basicConfig(level=logging.INFO)
 
-# Display Graph Imports
-from IPython.display import Image
-
 # Typing Imports
 from pydantic import BaseModel
-from typing import Annotated
+from typing import Annotated, Literal
 from typing_extensions import TypedDict
 
 # LangChain Imports
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
 
 #LangGraph Imports
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import Command, interrupt
 from langgraph.prebuilt import ToolNode, tools_condition
 
@@ -41,26 +36,38 @@ LANGSMITH_ENDPOINT = os.getenv('LANGSMITH_ENDPOINT')
 LANGSMITH_API_KEY = os.getenv('LANGSMITH_API_KEY')
 LANGSMITH_PROJECT = os.getenv('LANGSMITH_PROJECT')
 
-# llm setup
-from langchain_openai import ChatOpenAI
-
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.7,
-    api_key=OPENAI_API_KEY
-)
+from shared.graph_registry import graphs, lazy_resource
+from shared.message_store import interning_saver
+from shared.routing import Case, Router
+from shared.search_store import SearchResultStore, cached_search_tool
+
+# llm setup (created on first use, not at import)
+@lazy_resource
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.7,
+        api_key=OPENAI_API_KEY
+    )
 
 # -----------
 # Define All Tools (Do this better on second pass-through)
 # ---------
 
-search_tool = TavilySearchResults(
-    max_results=5,
-    search_depth="advanced",
-    include_answer=True,
-    include_raw_content=True,
-    include_images=False
-)
+# Full pages stay in the store; the tool returns refs and excerpts relevant to the query.
+search_store = SearchResultStore(ttl_s=3600)
+
+@lazy_resource
+def get_search_tool():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    return cached_search_tool(TavilySearchResults(
+        max_results=5,
+        search_depth="advanced",
+        include_answer=True,
+        include_raw_content=True,
+        include_images=False
+    ), search_store)
 
 from nodes.tools import (
     create_calendar_event,
@@ -80,8 +87,9 @@ class AskHuman(BaseModel):
 # -------
 
 # Bind the tools to the model, and bind the askhuman path next to it.
-model = llm
-model_with_tools = llm.bind_tools(tools + [AskHuman])
+@lazy_resource
+def get_model_with_tools():
+    return get_llm().bind_tools(tools + [AskHuman])
 
 # --------
 # Graph Assembly
@@ -90,20 +98,10 @@ model_with_tools = llm.bind_tools(tools + [AskHuman])
 # TODO: CHeck if this can be done with pydantic instead
 
 # Define the function that determines whether to continue or not
-def should_continue(state):
-    messages = state["messages"]
-    last_message = messages[-1]
-    # If there is no function call, then we finish
-    if not last_message.tool_calls:
-        return END
-    # If tool call is asking Human, we return that node
-    # You could also add logic here to let some system know that there's something that requires Human input
-    # For example, send a slack message, etc
-    elif last_message.tool_calls[0]["name"] == "AskHuman":
-        return "ask_human"
-    # Otherwise if there is, we continue
-    else:
-        return "action"
+# If there is no function call, then we finish. If the tool call is asking the Human, we go to that node
+# (you could also let some system know that there's something that requires Human input, e.g. a slack message).
+# Otherwise we continue to the action node.
+should_continue = Router(Case(tools={"AskHuman": "ask_human"}, no_tool=END, other_tool="action"), name="should_continue")
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
@@ -115,7 +113,7 @@ graph_builder = StateGraph(State)
 # Define the function that calls the model
 def call_model(state):
     messages = state["messages"]
-    response = model.invoke(messages)
+    response = get_llm().invoke(messages)
     assert len(response.tool_calls) <= 1
     # We return a list, because this will get added to the existing list
     return {"messages": [response]}
@@ -139,7 +137,6 @@ def ask_human(state):
 from typing import TypedDict
 import uuid
 
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.constants import START
 from langgraph.graph import StateGraph
 from langgraph.types import interrupt, Command
@@ -163,29 +160,32 @@ def human_node(state: State):
 
 
 # Build the graph
-graph_builder = StateGraph(State)
-# Add the human-node to the graph
-graph_builder.add_node("human_node", human_node)
-graph_builder.add_edge(START, "human_node")
-
-# A checkpointer is required for `interrupt` to work.
-checkpointer = MemorySaver()
-graph = graph_builder.compile(
-   checkpointer=checkpointer
-)
+@graphs.register("human_node_example")
+def build_human_node_graph(checkpointer=None):
+   graph_builder = StateGraph(State)
+   # Add the human-node to the graph
+   graph_builder.add_node("human_node", human_node)
+   graph_builder.add_edge(START, "human_node")
+
+   # A checkpointer is required for `interrupt` to work.
+   return graph_builder.compile(
+      checkpointer=checkpointer or interning_saver()
+   )
 
-# Pass a thread ID to the graph to run it.
-thread_config = {"configurable": {"thread_id": uuid.uuid4()}}
 
+if __name__ == "__main__":
+   graph = graphs.get("human_node_example")
 
+   # Pass a thread ID to the graph to run it.
+   thread_config = {"configurable": {"thread_id": uuid.uuid4()}}
 
-# Using stream() to directly surface the `__interrupt__` information.
-for chunk in graph.stream({"some_text": "Original text"}, config=thread_config):
-   print(chunk)
+   # Using stream() to directly surface the `__interrupt__` information.
+   for chunk in graph.stream({"some_text": "Original text"}, config=thread_config):
+      print(chunk)
 
-# Resume using Command
-for chunk in graph.stream(Command(resume="Edited text"), config=thread_config):
-   print(chunk)
+   # Resume using Command
+   for chunk in graph.stream(Command(resume="Edited text"), config=thread_config):
+      print(chunk)
 
 
 def human(state: MessagesState) -> Command[Literal["agent", "another_agent"]]:
@@ -9,38 +9,47 @@ from langgraph.graph import StateGraph # Langgraph graph object. Explore if othe
 from langgraph.graph import START # For specifying the start node in a graph object
 
 # Local Imports
-from nodes.agents import *
-from shared.utils import draw_graph
+from shared.graph_registry import graphs
 
-print("Running Main.py")
+# Assemble Graph
+@graphs.register("main")
+def build_graph(checkpointer=None):
+    # Imported here so importing this module does not construct the LLM client.
+    from nodes.agents import State, ai_message, human_input, human_input_gate, system_message
 
-# Assemble Graph 
-graph_builder = StateGraph(State)
-graph_builder.add_node(ai_message)
-graph_builder.add_edge(START, "ai_message") # This is equivalent to add_edge(START, "node"), I believe.
+    graph_builder = StateGraph(State)
+    graph_builder.add_node(ai_message)
+    graph_builder.add_edge(START, "ai_message") # This is equivalent to add_edge(START, "node"), I believe.
 
-graph_builder.add_edge("ai_message", "human_input")
+    graph_builder.add_edge("ai_message", "human_input")
 
-graph_builder.add_node(human_input)
-graph_builder.add_edge("human_input", "ai_message")
+    graph_builder.add_node(human_input)
+    graph_builder.add_edge("human_input", "ai_message")
 
 
-graph_builder.add_node(human_input_gate)
-graph_builder.add_conditional_edges("human_input", "human_input_escape", "system_message", lambda state: state["messages"][0].content == "exit")
+    graph_builder.add_node(human_input_gate)
+    graph_builder.add_conditional_edges("human_input", "human_input_escape", "system_message", lambda state: state["messages"][0].content == "exit")
 
 
-graph = graph_builder.compile()
+    return graph_builder.compile(checkpointer=checkpointer)
 
-draw_graph(graph, "main-graph.png")
 
-# Run Graph
-message_1 = {"role": "system", "content": "Make sure that all responses are only in spanish."}
-message_2 = {"role": "user", "content": "Hi"}
+if __name__ == "__main__":
+    from shared.utils import draw_graph
 
-result = graph.invoke({"messages": [message_1, message_2]})
+    print("Running Main.py")
 
-# Print output
-print(f"result = {result}\n")
-for message in result["messages"]:
-    message.pretty_print()
+    graph = graphs.get("main")
 
+    draw_graph(graph, "main-graph.png")
+
+    # Run Graph
+    message_1 = {"role": "system", "content": "Make sure that all responses are only in spanish."}
+    message_2 = {"role": "user", "content": "Hi"}
+
+    result = graph.invoke({"messages": [message_1, message_2]})
+
+    # Print output
+    print(f"result = {result}\n")
+    for message in result["messages"]:
+        message.pretty_print()
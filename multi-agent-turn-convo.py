@@ -12,12 +12,13 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
-# Loop through required environment variables.
-required_env_vars = ["OPENAI_API_KEY", "TAVILY_API_KEY"]
-for var in required_env_vars:
-    value = os.getenv(var)
-    if not value:
-        raise ValueError(f"Please set {var} in your .env file.")
+def check_env():
+    # Loop through required environment variables.
+    required_env_vars = ["OPENAI_API_KEY", "TAVILY_API_KEY"]
+    for var in required_env_vars:
+        value = os.getenv(var)
+        if not value:
+            raise ValueError(f"Please set {var} in your .env file.")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
@@ -33,22 +34,19 @@ from typing import Annotated, Any, List
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.types import Command, interrupt
 
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
 
+from shared.graph_registry import graphs, lazy_resource
+from shared.message_store import interning_saver
+
 # Define the overall state of the graph using a Pydantic model.
 # Here, we use Annotated to apply the add_messages reducer.
 class OverallState(BaseModel):
     messages: Annotated[List[Any], add_messages] = Field(default_factory=list)
 
-# Build the state graph using the Pydantic model as the state schema.
-graph_builder = StateGraph(OverallState)
-
 # Define a human assistance tool that uses interrupt to pause execution.
 # @tool
 # def human_assistance(query: str) -> str:
@@ -62,30 +60,36 @@ class AskHuman(BaseModel):
     """Ask the human a question"""
     question: str
 
-# Instantiate the search tool and add the human assistance tool.
-search_tool = TavilySearchResults(
-    max_results=5,
-    search_depth="advanced",
-    include_answer=True,
-    include_raw_content=True,
-    include_images=False
-)
-
-tools = [search_tool]
-tool_node = ToolNode(tools)
+# Instantiate the search tool and add the human assistance tool (on first use, not at import).
+@lazy_resource
+def get_tools():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    check_env()
+    search_tool = TavilySearchResults(
+        max_results=5,
+        search_depth="advanced",
+        include_answer=True,
+        include_raw_content=True,
+        include_images=False
+    )
+    return [search_tool]
 
 # Initialize the LLM (OpenAI) and bind the tools.
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.5,
-    api_key=OPENAI_API_KEY
-)
-llm_with_tools = llm.bind_tools(tools + [AskHuman])
+@lazy_resource
+def get_llm_with_tools():
+    from langchain_openai import ChatOpenAI
+    check_env()
+    llm = ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.5,
+        api_key=OPENAI_API_KEY
+    )
+    return llm.bind_tools(get_tools() + [AskHuman])
 
 # Define the chatbot node function.
 
 def chatbot(state: OverallState):
-    message = llm_with_tools.invoke(state.messages)
+    message = get_llm_with_tools().invoke(state.messages)
     # Disable parallel tool calling to avoid duplicate tool calls on resume.
     # if hasattr(message, "tool_calls"):
     #     assert len(message.tool_calls) <= 1
@@ -121,21 +125,25 @@ def should_continue(state):
         return "tools"
 
 
-# Add the chatbot node to the graph.
-graph_builder.add_node("agent", chatbot)
-graph_builder.add_node("ask_human", ask_human)
-# Add a tool node to handle tool calls.
-graph_builder.add_node("tools", tool_node)
+@graphs.register("multi_agent_turn_convo")
+def build_graph(checkpointer=None):
+    # Build the state graph using the Pydantic model as the state schema.
+    graph_builder = StateGraph(OverallState)
 
-# Set conditional routing: if a tool call is made, route to the tools node.
-graph_builder.add_conditional_edges("agent", should_continue)
-graph_builder.add_edge("tools", "agent")
-graph_builder.add_edge("ask_human", "agent")
-graph_builder.add_edge(START, "agent")
+    # Add the chatbot node to the graph.
+    graph_builder.add_node("agent", chatbot)
+    graph_builder.add_node("ask_human", ask_human)
+    # Add a tool node to handle tool calls.
+    graph_builder.add_node("tools", ToolNode(get_tools()))
 
-# Compile the graph with an in-memory checkpointer for state persistence.
-memory = MemorySaver()
-graph = graph_builder.compile(checkpointer=memory)
+    # Set conditional routing: if a tool call is made, route to the tools node.
+    graph_builder.add_conditional_edges("agent", should_continue)
+    graph_builder.add_edge("tools", "agent")
+    graph_builder.add_edge("ask_human", "agent")
+    graph_builder.add_edge(START, "agent")
+
+    # Compile the graph with an in-memory checkpointer for state persistence.
+    return graph_builder.compile(checkpointer=checkpointer or interning_saver())
 
 # # Utility function to print out messages from graph events.
 # def print_events(events):
@@ -158,7 +166,8 @@ def main():
     initial_state = {"messages": [{"role": "system", "content": system_prompt}]}
     thread = {"configurable": {"thread_id": "1"}}
 
-    
+    graph = graphs.get("multi_agent_turn_convo")
+
     # Run graph until an interruption or end:
     for event in graph.stream(initial_state, thread, stream_mode="updates"):
         print(f"event: {event}")
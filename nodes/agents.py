@@ -6,13 +6,16 @@ from langchain_core.messages import AnyMessage # Langchain anymessage, check thi
 from langchain_core.messages import AIMessage # For specifying an AI message.
 from langchain_core.messages import HumanMessage # For specifying a human message.
 
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 import os
 
-load_dotenv()
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, max_tokens=100, api_key=OPENAI_API_KEY)
+from shared.graph_registry import lazy_resource
+
+@lazy_resource
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    load_dotenv()
+    return ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, max_tokens=100, api_key=os.getenv('OPENAI_API_KEY'))
 
 
 class State(TypedDict):
@@ -26,7 +29,7 @@ def ai_message_hi(state: State):
     return {"messages": [new_message]}
 
 def ai_message(state: State):
-    new_message = llm.invoke(state["messages"])
+    new_message = get_llm().invoke(state["messages"])
     print(state["messages"])
     return {"messages": [new_message]}
 
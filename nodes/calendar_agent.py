@@ -12,33 +12,49 @@ from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
 from langgraph.graph import MessagesState, START, END, StateGraph
 from pydantic import BaseModel
 from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command, interrupt
 
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 import os
+import sys
 import json
 from datetime import datetime
 
+# Make the repo root importable when this file is run from inside nodes/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.graph_registry import graphs, lazy_resource
+from shared.budget import BUDGET_NODE, budget_exceeded
+from shared.human_tasks import question_from_interrupt
+from shared.message_store import interning_saver
+from shared.routing import Case, Router, missing_fields
+from shared.toolbox import Toolbox, called_since_human
+
 # -------------------------------
 # Import our tools and models from tools.py
 # -------------------------------
 from tools import (
     create_calendar_event_tool,
     get_current_time_tool,
+    write_behind_reports,
     CreateCalendarEventInputModel
 )
+from substates import registry, merge_dict
 
-# Load environment variables and set up the language model
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-llm = ChatOpenAI(
-    model="gpt-3.5-turbo",
-    temperature=0.7,
-    max_tokens=150,
-    api_key=OPENAI_API_KEY
-)
+# -------------------------------
+# Language model (created on first use, not at import)
+# -------------------------------
+@lazy_resource
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    load_dotenv()
+    return ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        max_tokens=150,
+        api_key=os.getenv("OPENAI_API_KEY")
+    )
 
 # -------------------------------
 # Define additional helper classes
@@ -48,19 +64,29 @@ class AskHuman(BaseModel):
     question: str
 
 # -------------------------------
-# Set up tools and tool binding
+# Register the calendar substate
 # -------------------------------
-tools = [create_calendar_event_tool, get_current_time_tool]
-tool_node = ToolNode(tools)
-# Bind our tools plus AskHuman so that the LLM may produce tool calls.
-model = llm.bind_tools(tools + [AskHuman])
+@registry.domain("event_data", reducer=merge_dict)
+class EventData(TypedDict, total=False):
+    """Partial event form filled in over the conversation."""
+    topic: str
+    start_time: str
+    end_time: str
+
+CalendarState = registry.schema("CalendarState", include=("messages", "event_data"))
 
 # -------------------------------
-# Define a helper for human input.
+# Set up tools and tool binding
 # -------------------------------
-def interrupt(prompt: str) -> str:
-    """Simulate a human prompt by reading input from the console."""
-    return input(prompt)
+tools = [create_calendar_event_tool, get_current_time_tool]
+
+# Our tools plus AskHuman, so that the LLM may produce tool calls. Each turn only offers the tools
+# that can apply: the clock while a time is missing (until it has answered since the human last
+# spoke), event creation once the form is complete. ask_missing_field binds the model through it.
+toolbox = Toolbox(AskHuman, name="calendar_agent")
+toolbox.add(get_current_time_tool, when=missing_fields("event_data", "start_time", "end_time"),
+            unless=called_since_human("get_current_time_tool"))
+toolbox.add(create_calendar_event_tool, unless=missing_fields("event_data", "topic", "start_time", "end_time"))
 
 # -------------------------------
 # Dynamic Gathering Nodes Using the Agent
@@ -69,7 +95,9 @@ def ask_missing_field(state):
     """
     Use the LLM to dynamically generate a clarifying question for the first missing field.
     The agent is provided with the current event_data and asked to produce a natural question.
-    The output message includes a tool call with name "AskHuman" and the missing field in its parameters.
+    The model is bound to the tools the toolbox selects for this state, so it may ask through
+    AskHuman or check the clock first; a plain-text reply becomes a tool call with name
+    "AskHuman" and the missing field in its parameters.
     """
     event_data = state.get("event_data", {})
     required_fields = ["topic", "start_time", "end_time"]
@@ -81,16 +109,21 @@ def ask_missing_field(state):
     system_prompt = (
         f"You are an assistant that gathers calendar event details. The required field is '{field}'.\n"
         f"The current event details are: {event_data}\n"
-        f"Ask the user a natural, clarifying question to obtain the value for '{field}'."
+        f"Ask the user a natural, clarifying question to obtain the value for '{field}', using the AskHuman tool."
     )
+    last_message = state["messages"][-1] if state["messages"] else None
+    if getattr(last_message, "type", None) == "tool":
+        system_prompt += f"\nResult of {last_message.name}: {last_message.content}"
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": "Generate the clarifying question."}
     ]
-    response = llm.invoke(messages)
-    question_text = response.content.strip()
-    new_message = AIMessage(content=question_text)
-    new_message.tool_calls = [{"id": "ask_missing", "name": "AskHuman", "parameters": {"field": field}}]
+    response = toolbox.bind(get_llm(), state).invoke(messages)
+    if getattr(response, "tool_calls", None):
+        new_message = response
+    else:
+        new_message = AIMessage(content=response.content.strip())
+        new_message.tool_calls = [{"id": "ask_missing", "name": "AskHuman", "parameters": {"field": field}}]
     state["messages"].append(new_message)
     return {"messages": state["messages"]}
 
@@ -118,7 +151,7 @@ def update_event_data(state):
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": "Extract the event details."}
     ]
-    response = llm.invoke(messages)
+    response = get_llm().invoke(messages)
     try:
         update_dict = json.loads(response.content)
     except Exception as e:
@@ -128,7 +161,7 @@ def update_event_data(state):
     new_message = AIMessage(content=f"Event details updated: {event_data}")
     new_message.tool_calls = [{"id": "update_event", "name": "FillEventDetails", "parameters": event_data}]
     state["messages"].append(new_message)
-    return {"messages": state["messages"]}
+    return {"messages": state["messages"], "event_data": event_data}
 
 def gather_event_details(state):
     """
@@ -155,17 +188,18 @@ def gather_event_details(state):
             new_message = AIMessage(content=f"Validation error: {e}. Let's re-collect the value for end_time.")
             new_message.tool_calls = [{"id": "remove_invalid", "name": "FillEventDetails", "parameters": event_data}]
             state["messages"].append(new_message)
-            return {"messages": state["messages"]}
+            return {"messages": state["messages"], "event_data": event_data}
         # Validation succeeded. Create a message that transforms the state into a final tool call.
         new_message = AIMessage(content=f"Final event details: {validated.dict()}")
         new_message.tool_calls = [{"id": "confirm_event", "name": "create_calendar_event_tool", "parameters": validated.dict()}]
         state["messages"].append(new_message)
         return {"messages": state["messages"]}
 
-def confirm_calendar_event(state):
+def confirm_calendar_event(state, config: RunnableConfig):
     """
     Ask the human to confirm the complete event details.
-    If confirmed, call the calendar event tool using the parameters.
+    If confirmed, call the calendar event tool using the parameters. The run's config
+    is passed on, so the event is created for its user (or queued, in write-behind mode).
     """
     last_message = state["messages"][-1]
     tool_calls = getattr(last_message, "tool_calls", None)
@@ -173,94 +207,113 @@ def confirm_calendar_event(state):
     if tool_calls and len(tool_calls) > 0:
         params = tool_calls[0].get("parameters", {})
     confirmation = interrupt(f"Please confirm the event details {params} (yes/no): ")
-    if confirmation.lower() in ["yes", "y"]:
-        result = create_calendar_event_tool(params)
+    if str(confirmation).strip().lower() in ["yes", "y"]:
+        result = create_calendar_event_tool.invoke({"event_data": params}, config)
         state["messages"].append(AIMessage(content=result))
     else:
         state["messages"].append(HumanMessage(content="Event creation cancelled. Please modify the event details."))
     return {"messages": state["messages"]}
 
-# -------------------------------
-# Routing Function (safely checking for tool_calls)
-# -------------------------------
-def should_continue(state):
+def ask_human(state):
     """
-    Decide which node to visit next:
-      - If event_data is incomplete, then:
-          • if the last message has a tool call named "AskHuman", go to 'ask_human';
-          • if the last message has a tool call named "FillEventDetails", go to 'update_event_data';
-          • otherwise, go to 'ask_missing_field'.
-      - If event_data is complete and the last tool call is create_calendar_event_tool,
-        go to 'confirm_calendar_event'.
-      - Otherwise, finish.
+    Stop the run until the human answers the agent's last question. The run parks on
+    `interrupt` (with the AskHuman call, so a HumanTaskQueue records the question and its
+    tool_call_id) and resumes with Command(resume=answer); no worker waits on the human.
     """
-    messages = state["messages"]
-    event_data = state.get("event_data", {})
-    required_fields = ["topic", "start_time", "end_time"]
-    if any(field not in event_data or not event_data[field] for field in required_fields):
-        if messages:
-            last_msg = messages[-1]
-            tool_calls = getattr(last_msg, "tool_calls", None)
-            if tool_calls and len(tool_calls) > 0:
-                last_tool = tool_calls[0]["name"]
-                if last_tool == "AskHuman":
-                    return "ask_human"
-                elif last_tool == "FillEventDetails":
-                    return "update_event_data"
-        return "ask_missing_field"
-    if messages:
-        last_msg = messages[-1]
-        tool_calls = getattr(last_msg, "tool_calls", None)
-        if tool_calls and len(tool_calls) > 0:
-            if tool_calls[0]["name"] == "create_calendar_event_tool":
-                return "confirm_calendar_event"
-    return END
+    last_message = state["messages"][-1]
+    tool_call = (getattr(last_message, "tool_calls", None) or [{}])[0]
+    question = (tool_call.get("args") or {}).get("question") or last_message.content
+    answer = interrupt({"name": "AskHuman", "args": {"question": question}, "id": tool_call.get("id")})
+    return {"messages": [HumanMessage(content=str(answer))]}
+
+def agent(state, config: RunnableConfig):
+    """Pass messages onward, adding the results of queued event inserts (write-behind mode)."""
+    return {"messages": state["messages"] + write_behind_reports(config, state["messages"])}
 
 # -------------------------------
-# Build the state graph workflow
+# Routing (declarative; see shared/routing.py)
 # -------------------------------
-workflow = StateGraph(MessagesState)
-# 'agent' simply passes messages onward; subsequent nodes update state.
-workflow.add_node("agent", lambda state: {"messages": state["messages"]})
-workflow.add_node("ask_missing_field", ask_missing_field)
-workflow.add_node("ask_human", lambda state: {"messages": [HumanMessage(content=interrupt("The agent requests additional input: "))]})
-workflow.add_node("update_event_data", update_event_data)
-workflow.add_node("gather_event_details", gather_event_details)
-workflow.add_node("confirm_calendar_event", confirm_calendar_event)
-workflow.add_node("action", tool_node)
-workflow.add_node("call_model", lambda state: {"messages": [model.invoke(state["messages"][-2:])]} )
+# Decide which node to visit next:
+#   - If event_data is incomplete: a human message (no tool call) goes to 'update_event_data' to be
+#     parsed, an "AskHuman" tool call to 'ask_human', a clock call to 'action', and anything else
+#     (e.g. the "FillEventDetails" call that update_event_data leaves) to 'ask_missing_field'.
+#   - If event_data is complete: a "FillEventDetails" tool call goes to 'gather_event_details' and
+#     create_calendar_event_tool to 'confirm_calendar_event'.
+#   - Otherwise, finish.
+should_continue = Router(
+    Case(
+        when=missing_fields("event_data", "topic", "start_time", "end_time"),
+        tools={"AskHuman": "ask_human", "get_current_time_tool": "action"},
+        no_tool="update_event_data",
+        default="ask_missing_field",
+    ),
+    Case(
+        tools={"FillEventDetails": "gather_event_details", "create_calendar_event_tool": "confirm_calendar_event"},
+        default=END,
+    ),
+    name="should_continue",
+)
 
-# Set the entrypoint to 'agent'
-workflow.add_edge(START, "agent")
-# Route based on the current state.
-workflow.add_conditional_edges("agent", should_continue)
-# Loop back from nodes to agent for the next iteration.
-workflow.add_edge("ask_missing_field", "agent")
-workflow.add_edge("ask_human", "agent")
-workflow.add_edge("update_event_data", "agent")
-workflow.add_edge("gather_event_details", "agent")
-workflow.add_edge("confirm_calendar_event", "agent")
-workflow.add_edge("action", "agent")
-workflow.add_edge("call_model", "agent")
+# -------------------------------
+# Build the state graph workflow
+# -------------------------------
+@graphs.register("calendar_agent")
+def build_graph(checkpointer=None):
+    """Assemble and compile the calendar agent. Uses an in-memory checkpointer unless one is given."""
+    workflow = StateGraph(CalendarState)
+    # 'agent' passes messages onward (plus write-behind results); subsequent nodes update state.
+    # Nodes are wrapped with registry.node so only substates that changed are written and checkpointed.
+    workflow.add_node("agent", registry.node(agent))
+    workflow.add_node("ask_missing_field", registry.node(ask_missing_field))
+    workflow.add_node("ask_human", ask_human)
+    workflow.add_node("update_event_data", registry.node(update_event_data))
+    workflow.add_node("gather_event_details", registry.node(gather_event_details))
+    workflow.add_node("confirm_calendar_event", registry.node(confirm_calendar_event))
+    workflow.add_node("action", ToolNode(tools))
+    # Runs with a BudgetGuard end here when they run out of budget or stop making progress.
+    workflow.add_node(BUDGET_NODE, budget_exceeded)
 
-# Set up memory checkpointing
-memory = MemorySaver()
+    # Set the entrypoint to 'agent'
+    workflow.add_edge(START, "agent")
+    # Route based on the current state.
+    should_continue.add_to(workflow, "agent", guard=True)
+    # Loop back from nodes to agent for the next iteration.
+    workflow.add_edge("ask_missing_field", "agent")
+    workflow.add_edge("ask_human", "agent")
+    workflow.add_edge("update_event_data", "agent")
+    workflow.add_edge("gather_event_details", "agent")
+    workflow.add_edge("confirm_calendar_event", "agent")
+    # The clock's answer goes straight back to the question it was fetched for.
+    workflow.add_edge("action", "ask_missing_field")
+    workflow.add_edge(BUDGET_NODE, END)
 
-# Compile the workflow into a LangChain Runnable
-app = workflow.compile(checkpointer=memory)
+    # Compile the workflow into a LangChain Runnable, with memory checkpointing
+    return workflow.compile(checkpointer=checkpointer or interning_saver())
 
-# Configuration for streaming execution (example thread_id "2")
-config = {"configurable": {"thread_id": "2"}}
 
 # -------------------------------
 # Execute the workflow
 # -------------------------------
-initial_state = {
-    "messages": [
-        HumanMessage(content="I want to schedule a meeting. Please help me create a calendar event.")
-    ],
-    "event_data": {}  # start with an empty event form
-}
+if __name__ == "__main__":
+    app = graphs.get("calendar_agent")
+
+    # Configuration for streaming execution (example thread_id "2")
+    config = {"configurable": {"thread_id": "2"}}
+
+    initial_state = {
+        "messages": [
+            HumanMessage(content="I want to schedule a meeting. Please help me create a calendar event.")
+        ],
+        "event_data": {}  # start with an empty event form
+    }
 
-for event in app.stream(initial_state, config, stream_mode="values"):
-    event["messages"][-1].pretty_print()
+    # Questions stop the run (see ask_human); answer them from the console and resume.
+    graph_input = initial_state
+    while True:
+        for event in app.stream(graph_input, config, stream_mode="values"):
+            event["messages"][-1].pretty_print()
+        interrupts = [i for task in app.get_state(config).tasks for i in task.interrupts]
+        if not interrupts:
+            break
+        question, _ = question_from_interrupt(interrupts[0].value)
+        graph_input = Command(resume=input(f"{question}\n> "))
@@ -7,10 +7,10 @@ conversations. It greets the user initially and then prompts dynamically for inp
 """
 
 import os
+import sys
 import json
 from dotenv import load_dotenv
 from typing import Annotated, Sequence, TypedDict, Dict, Optional
-from IPython.display import Image
 import datetime
 import logging
 
@@ -18,28 +18,33 @@ import logging
 logging.basicConfig(level=logging.INFO)
 
 # Import required modules from LangChain and LangGraph.
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import BaseMessage, ToolMessage, SystemMessage
+from langchain_core.messages import BaseMessage, SystemMessage
 from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph.message import add_messages
 from langgraph.graph import StateGraph, END
-from langchain.callbacks import StdOutCallbackHandler
 
 from pydantic import BaseModel, ValidationError
 
-# Optionally import IPython display functionality for graph visualization.
-try:
-    from IPython.display import Image, display
-except ImportError:
-    Image = None
-    display = None
-
 from tools import (
     create_calendar_event,
+    find_free_slots,
+    list_event_occurrences,
+    check_event_conflicts,
+    write_behind_reports,
     CreateCalendarEventModel
 )
 
+# Make the repo root importable when this file is run from inside nodes/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.graph_registry import graphs, lazy_resource
+from shared.timings import timings_from_env, with_timings
+from shared.budget import BUDGET_NODE, budget_exceeded
+from shared.routing import Case, Router
+from shared.blob_store import BlobStore, expand_blobs, tool_message
+from shared.long_term_memory import get_memory, recall_messages
+from shared.toolbox import Toolbox, called_since_human
+
 # =============================================================================
 # Environment Setup
 # =============================================================================
@@ -52,16 +57,18 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 # Initialize ChatOpenAI Instances
 # -----------------------------------------------------------------------------
 
-# General LLM instance (not directly used in the agent below).
-llm = ChatOpenAI(
-    model="gpt-3.5-turbo",
-    temperature=0.7,
-    max_tokens=100,
-    api_key=OPENAI_API_KEY
-)
+# Both are created on first use, not at import.
 
-# Initialize the model for the calendar agent using a different model.
-model = ChatOpenAI(model="gpt-4o-mini")
+# General LLM instance (not directly used in the agent below).
+@lazy_resource
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        max_tokens=100,
+        api_key=OPENAI_API_KEY
+    )
 
 # =============================================================================
 # Define Agent State and Dummy Calendar Tool
@@ -85,103 +92,128 @@ def get_current_datetime():
     return now
 
 
-# Bind the dummy tool to the model.
-tools = [create_calendar_event, get_current_datetime]
-model = model.bind_tools(tools)
+tools = [create_calendar_event, find_free_slots, list_event_occurrences, check_event_conflicts, get_current_datetime]
+
+# Tool schemas are compiled once. The clock is not offered again once its answer for the current
+# user message is in the conversation.
+toolbox = Toolbox(create_calendar_event, find_free_slots, list_event_occurrences, check_event_conflicts,
+                  name="calendar_react_agent")
+toolbox.add(get_current_datetime, unless=called_since_human("get_current_datetime"))
+
+# Initialize the model for the calendar agent using a different model; the tools are bound per turn.
+@lazy_resource
+def get_model():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model="gpt-4o-mini")
 
 # Create a mapping of tool names to tool functions for easy lookup.
 tools_by_name = {tool.name: tool for tool in tools}
 
+# Tool outputs of 2 KB or more are kept out of the messages (and checkpoints); see shared/blob_store.py.
+# Blobs unused for $TOOL_BLOB_MAX_AGE_S (7 days by default) are pruned.
+@lazy_resource
+def get_blob_store():
+    return BlobStore(threshold=2048)
+
 # =============================================================================
 # Define State Graph Nodes and Edges
 # =============================================================================
 
-def tool_node(state: AgentState):
+def tool_node(state: AgentState, config: RunnableConfig):
     """
     Node that processes tool calls.
     
     It iterates over tool calls in the last message, invokes the corresponding
-    dummy tool, and returns the tool responses as messages.
+    dummy tool, and returns the tool responses as messages. Large responses are
+    stored in the blob store and the message carries a handle and a summary.
+    The run's config is passed on, so calendar tools act for its user_id.
+    Tools that already return text (JSON listings included) are not encoded again.
     """
     outputs = []
     for tool_call in state["messages"][-1].tool_calls:
-        tool_result = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
+        tool_result = tools_by_name[tool_call["name"]].invoke(tool_call["args"], config)
         outputs.append(
-            ToolMessage(
-                content=json.dumps(tool_result),
+            tool_message(
+                tool_result if isinstance(tool_result, str) else json.dumps(tool_result),
                 name=tool_call["name"],
                 tool_call_id=tool_call["id"],
+                store=get_blob_store(),
             )
         )
     return {"messages": outputs}
 
+# System prompt for the calendar assistant. Built once and shared by every call,
+# so the same message object (and string) is reused across calls and threads.
+CALENDAR_SYSTEM_PROMPT = SystemMessage(
+    """
+    You are a helpful calendar assistant whose job is to help users create and manage calendar events. When interacting with the user, follow these guidelines:
+    Use Mountain Time (America/Denver) for all times.
+    1. **Structured Event Details:**  
+    Collect event details in a JSON object with the following keys:
+    - "topic" (Mandatory): A brief topic for the event.
+    - "start_time" (Mandatory): The event's start time, which must be in ISO 8601 format.
+    - "end_time" (Optional): The event's end time in ISO 8601 format.
+    - "location" (Optional): The location of the event.
+    - "description" (Optional): Any additional information.
+
+    2. **Handling Relative Time Expressions:**  
+    You a should always use MST. The time tool will return MST, and the event and user are in MST.
+    If the user mentions a relative time expression (e.g., "3 days from now", "tomorrow at 10am"), first call the `get_current_datetime` tool to get the current time. Then, use that reference to calculate the absolute time and update the event details accordingly by calling `update_event_details_tool`.
+
+    3. **State Updates:**  
+    Incrementally update the event details as new details are provided. If the event details are incomplete or ambiguous, ask the user for clarification rather than calling the `create_calendar_event` tool.
+
+    3.5 **User Confirmation:** Before calling the `create_calendar_event` tool, confirm the event details with the user.
+    The user must confirm the event details before proceeding to use the tool create_calendar_event.
+
+    4. **Event Creation:**
+    Only when both mandatory fields ("topic" and "start_time") are filled and user confirmation is complete, call the `create_calendar_event` tool to finalize the event creation.
+    When you are ready to create the event, call the tool with a JSON object structured as:
+    {"event_details": { ... }} containing all Structured Event Details.
+
+    5. **Tool Invocation:**  
+    - Use `get_current_datetime` to retrieve the current time.
+    - Use `find_free_slots` to find times when the user (and any attendees' calendars) are free.
+    - Use `list_event_occurrences` to see what is on the calendar, and `check_event_conflicts` before creating an event (recurring events take a "recurrence" list such as ["RRULE:FREQ=WEEKLY;BYDAY=MO"]).
+    - Use,  `create_calendar_event` ONLY when all required information is available AND you have asked confirmation from the user and the user has confirmed.
+    - Apart from these tools, you have no other tools available in this conversation. Do not make faulty tool calls that are not part of the calendar assistant's workflow.
+
+    6. **Conversation Termination:**  
+    Monitor the conversation for cues that the user is trying to end the interaction. If the user expresses farewell phrases (e.g., "bye", "exit", "thank you, I'm done", etc.) or clearly indicates that no further assistance is needed, gracefully end the conversation.
+
+    Your responses should guide the conversation by collecting necessary details, making appropriate tool calls, and clearly instructing the user when additional information is needed. Ensure that you also decide when the conversation should conclude based on the user's input.
+    """
+)
+
 def call_model(state: AgentState, config: RunnableConfig):
     """
     Node that calls the language model.
     
     The system prompt has been updated to reflect the calendar assistant role.
+    It is built once at import time (CALENDAR_SYSTEM_PROMPT) rather than on every call.
+    Memories from earlier conversations that are relevant to the latest user message
+    are added to the prompt (not to state); see shared/long_term_memory.py.
+    In write-behind mode, results of queued event inserts are added to the thread
+    (and the prompt) first; see shared/write_behind.py.
+    Tool outputs kept in the blob store are put back in full for the call only, so
+    the model reads the whole listing while state keeps the summary.
     """
-    system_prompt = SystemMessage(
-        """
-        You are a helpful calendar assistant whose job is to help users create and manage calendar events. When interacting with the user, follow these guidelines:
-        USE MOUNTAINT TIME YOU JEW
-        1. **Structured Event Details:**  
-        Collect event details in a JSON object with the following keys:
-        - "topic" (Mandatory): A brief topic for the event.
-        - "start_time" (Mandatory): The event's start time, which must be in ISO 8601 format.
-        - "end_time" (Optional): The event's end time in ISO 8601 format.
-        - "location" (Optional): The location of the event.
-        - "description" (Optional): Any additional information.
-
-        2. **Handling Relative Time Expressions:**  
-        You a should always use MST. The time tool will return MST, and the event and user are in MST.
-        If the user mentions a relative time expression (e.g., "3 days from now", "tomorrow at 10am"), first call the `get_current_datetime` tool to get the current time. Then, use that reference to calculate the absolute time and update the event details accordingly by calling `update_event_details_tool`.
-
-        3. **State Updates:**  
-        Incrementally update the event details as new details are provided. If the event details are incomplete or ambiguous, ask the user for clarification rather than calling the `create_calendar_event` tool.
-
-        3.5 **User Confirmation:** Before calling the `create_calendar_event` tool, confirm the event details with the user.
-        The user must confirm the event details before proceeding to use the tool create_calendar_event.
-
-        4. **Event Creation:**
-        Only when both mandatory fields ("topic" and "start_time") are filled and user confirmation is complete, call the `create_calendar_event` tool to finalize the event creation.
-        When you are ready to create the event, call the tool with a JSON object structured as:
-        {"event_details": { ... }} containing all Structured Event Details.
-
-        5. **Tool Invocation:**  
-        - Use `get_current_datetime` to retrieve the current time.
-        - Use,  `create_calendar_event` ONLY when all required information is available AND you have asked confirmation from the user and the user has confirmed.
-        - Apart from these tools, you have no other tools available in this conversation. Do not make faulty tool calls that are not part of the calendar assistant's workflow.
-
-        6. **Conversation Termination:**  
-        Monitor the conversation for cues that the user is trying to end the interaction. If the user expresses farewell phrases (e.g., "bye", "exit", "thank you, I'm done", etc.) or clearly indicates that no further assistance is needed, gracefully end the conversation.
-
-        Your responses should guide the conversation by collecting necessary details, making appropriate tool calls, and clearly instructing the user when additional information is needed. Ensure that you also decide when the conversation should conclude based on the user's input.
-        """
-    )
+    reports = write_behind_reports(config, state["messages"])
     if not state["messages"]:
-        messages = [system_prompt]
+        messages = [CALENDAR_SYSTEM_PROMPT]
     else:
-        messages = state["messages"]
+        messages = recall_messages(get_memory(), state["messages"] + reports, config)
+        messages = expand_blobs(messages, get_blob_store())
     
-    response = model.invoke(messages, config)
+    response = toolbox.bind(get_model(), state).invoke(messages, config)
     
-    return {"messages": [response]}
+    return {"messages": reports + [response]}
 
 
-def should_continue(state: AgentState):
-    """
-    Determine whether to continue processing the conversation.
-    
-    If the last message does not include any tool calls, then the conversation cycle ends.
-    (In interactive mode, control is passed back to the user prompt.)
-    """
-    messages = state["messages"]
-    last_message = messages[-1]
-    if not last_message.tool_calls:
-        return "end"
-    else:
-        return "continue"
+# Determine whether to continue processing the conversation.
+# If the last message does not include any tool calls, then the conversation cycle ends.
+# (In interactive mode, control is passed back to the user prompt.)
+should_continue = Router(Case(no_tool=END, other_tool="tools"), name="should_continue")
 
 # =============================================================================
 # Helper Function to Print the Output Stream
@@ -203,35 +235,38 @@ def print_message(message):
 # Main Execution: Interactive Conversation Loop
 # =============================================================================
 
-def main():
-    """
-    Main function to build and run the interactive calendar agent.
-    The agent greets the user first and then dynamically prompts for user input.
-    """
-    # Build the state graph.
+@graphs.register("calendar_react_agent")
+def build_graph(checkpointer=None):
+    """Build the state graph. Without a checkpointer the caller carries the messages between turns."""
     workflow = StateGraph(AgentState)
     workflow.add_node("agent", call_model)
     workflow.add_node("tools", tool_node)
+    workflow.add_node(BUDGET_NODE, budget_exceeded)
     workflow.set_entry_point("agent")
-    workflow.add_conditional_edges(
-        "agent",
-        should_continue,
-        {
-            "continue": "tools",
-            "end": END,
-        },
-    )
+    should_continue.add_to(workflow, "agent", guard=True)
     workflow.add_edge("tools", "agent")
-    
+    workflow.add_edge(BUDGET_NODE, END)
+
     # Compile the workflow into an executable graph.
-    graph = workflow.compile()
-    
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def main():
+    """
+    Main function to build and run the interactive calendar agent.
+    The agent greets the user first and then dynamically prompts for user input.
+    With GRAPH_TIMINGS=1, per-node, LLM and tool latencies are printed on exit.
+    """
+    graph = graphs.get("calendar_react_agent")
+    timings = timings_from_env()
+    config = with_timings({}, timings)
+
     # Initialize conversation state with an empty messages list.
     state = {"messages": []}
     
     # Generate initial greeting from the agent.
     print("Agent is thinking...")
-    initial_stream = graph.stream(state, stream_mode="values")
+    initial_stream = graph.stream(state, config, stream_mode="values")
     for output in initial_stream:
         for msg in output.get("messages", []):
             print("Agent:", end=" ")
@@ -243,13 +278,17 @@ def main():
         user_input = input("User: ")
         if user_input.strip().lower() in ["exit", "quit", "bye"]:
             print("Agent: Goodbye!")
+            if timings:
+                print(timings.summary())
+            if get_memory().path:
+                get_memory().save()
             break
         
         # Append the user's message to the state.
         state["messages"].append(("user", user_input))
         
         # Process the updated conversation through the graph.
-        agent_stream = graph.stream(state, stream_mode="values")
+        agent_stream = graph.stream(state, config, stream_mode="values")
         for output in agent_stream:
             for msg in output.get("messages", []):
                 print("Agent:", end=" ")
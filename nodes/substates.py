@@ -0,0 +1,171 @@
+"""
+Substate Registry
+Lets each domain register its own typed substate ("substate world") into one global graph state.
+
+Every domain becomes a single top-level channel with its own reducer. LangGraph only bumps the
+version of channels that were written in a step, and checkpointers that store channels as
+versioned blobs (MemorySaver, BoundedMemorySaver) only serialize channels with a new version.
+Wrapping nodes with `registry.node` drops substates a node returned unchanged, so each step only
+writes (and checkpoints) the domains that actually changed.
+
+Example usage:
+    registry.register("event_data", EventData, merge_dict)
+    CalendarState = registry.schema("CalendarState")
+    workflow = StateGraph(CalendarState)
+    workflow.add_node("update_event_data", registry.node(update_event_data))
+"""
+
+import copy
+import inspect
+import logging
+import functools
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from typing_extensions import Annotated, TypedDict
+from langchain_core.messages import AnyMessage
+from langgraph.graph.message import add_messages
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Reducers
+# -------------------------------
+def merge_dict(left: Optional[dict], right: Optional[dict]) -> dict:
+    """Default reducer for dict-like substates: keys in the update replace existing keys."""
+    if right is None:
+        return left or {}
+    return {**(left or {}), **right}
+
+
+def replace(left: Any, right: Any) -> Any:
+    """Reducer that keeps the latest value (LangGraph's behavior for un-annotated keys)."""
+    return right
+
+
+# -------------------------------
+# Registry
+# -------------------------------
+@dataclass(frozen=True)
+class Substate:
+    """A registered domain: its channel name, value type and reducer."""
+    name: str
+    type: Any
+    reducer: Callable[[Any, Any], Any]
+
+
+class SubstateRegistry:
+    """
+    Registry of domain substates that composes them into one cached graph schema.
+    """
+
+    def __init__(self):
+        self._substates: Dict[str, Substate] = {}
+        self._schemas: Dict[tuple, type] = {}
+        self._writes: Dict[str, int] = {}
+        self._skips: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def substates(self) -> Dict[str, Substate]:
+        return dict(self._substates)
+
+    def register(self, name: str, type_: Any, reducer: Callable[[Any, Any], Any] = replace) -> Substate:
+        """
+        Register a domain substate. Registering the same definition twice is a no-op (modules can
+        be re-imported); registering a different definition under an existing name is an error.
+        """
+        substate = Substate(name, type_, reducer)
+        with self._lock:
+            existing = self._substates.get(name)
+            if existing is not None:
+                if existing != substate:
+                    raise ValueError(f"Substate '{name}' is already registered with a different type or reducer")
+                return existing
+            self._substates[name] = substate
+            self._writes.setdefault(name, 0)
+            self._skips.setdefault(name, 0)
+        return substate
+
+    def domain(self, name: str, reducer: Callable[[Any, Any], Any] = merge_dict):
+        """Class decorator form of register, for TypedDict / pydantic substate declarations."""
+        def decorator(cls):
+            self.register(name, cls, reducer)
+            return cls
+        return decorator
+
+    def schema(self, name: str = "GlobalState", include: Optional[tuple] = None) -> type:
+        """
+        Return a TypedDict composing the registered substates (or only those in `include`).
+        The composed class is cached, so repeated calls return the same schema object.
+        """
+        names = tuple(sorted(include if include is not None else self._substates))
+        key = (name, names)
+        with self._lock:
+            schema = self._schemas.get(key)
+            if schema is None:
+                missing = [n for n in names if n not in self._substates]
+                if missing:
+                    raise KeyError(f"Unregistered substates: {missing}")
+                fields = {
+                    n: Annotated[self._substates[n].type, self._substates[n].reducer]
+                    for n in names
+                }
+                schema = TypedDict(name, fields, total=False)
+                self._schemas[key] = schema
+        return schema
+
+    # -------------------------------
+    # Dirty tracking
+    # -------------------------------
+    def changed(self, before: Dict[str, Any], update: Any) -> Any:
+        """
+        Return `update` without the registered substates whose reduced value equals the value in
+        `before`. Non-dict updates (e.g. Command) and unregistered keys are passed through untouched.
+        """
+        if not isinstance(update, dict):
+            return update
+        dirty = {}
+        for key, value in update.items():
+            substate = self._substates.get(key)
+            if substate is None or key not in before:
+                dirty[key] = value
+                continue
+            if substate.reducer(before[key], value) == before[key]:
+                self._skips[key] += 1
+                continue
+            self._writes[key] += 1
+            dirty[key] = value
+        return dirty
+
+    def _snapshot(self, state: Any) -> Dict[str, Any]:
+        # Shallow copies are enough to catch nodes that mutate a substate in place before returning it.
+        if not isinstance(state, dict):
+            return {}
+        return {k: copy.copy(state[k]) for k in self._substates if k in state}
+
+    def node(self, fn: Callable) -> Callable:
+        """Wrap a node function so only substates that changed are written back to the graph."""
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(state, *args, **kwargs):
+                before = self._snapshot(state)
+                return self.changed(before, await fn(state, *args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(state, *args, **kwargs):
+            before = self._snapshot(state)
+            return self.changed(before, fn(state, *args, **kwargs))
+        return wrapper
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-substate counts of writes that were kept and writes dropped as unchanged."""
+        return {name: {"writes": self._writes[name], "skipped": self._skips[name]} for name in self._substates}
+
+
+# Global registry. Domains register into this at import time.
+registry = SubstateRegistry()
+registry.register("messages", list[AnyMessage], add_messages)
@@ -1,9 +1,20 @@
 import os
 import os.path
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import sys
+import logging
+import itertools
+import threading
+import tempfile
+import time as time_module
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, time
+from typing import Optional, Dict, Any, Callable, List
+from urllib.parse import quote
+from zoneinfo import ZoneInfo
 import json
 
+import numpy as np
 import pytz
 from dotenv import load_dotenv
 from google.auth.transport.requests import Request
@@ -12,6 +23,16 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from pydantic import BaseModel, ValidationError, validator
 from langchain.tools import tool
+from langchain_core.runnables import RunnableConfig
+
+# Make the repo root importable when this file is imported from inside nodes/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.intervals import free_slots, from_epoch, to_epoch, working_hours, overlaps
+from shared.recurrence import Recurrence, busy_intervals, merged_occurrences, occurrences
+from shared.graph_registry import lazy_resource
+from shared.write_behind import Flusher, JournalEntry, open_journal, report_messages, retryable
+
+logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------------------------
 # Google Authentication and Service Setup
@@ -22,43 +43,173 @@ load_dotenv()
 
 # Google Calendar API scope
 SCOPES = ['https://www.googleapis.com/auth/calendar.events']
-_service_cache = None  # Cache the service object once created
 
-def get_calendar_service():
+# Tokens of users other than the default one live here, one file per user.
+TOKEN_DIR = os.getenv("GOOGLE_TOKEN_DIR", "tokens")
+DEFAULT_USER = "default"
+
+
+def user_from_config(config: Optional[RunnableConfig]) -> str:
+    """The user a graph run acts for: `configurable["user_id"]`, or the default (token.json) user."""
+    configurable = (config or {}).get("configurable") or {}
+    return str(configurable.get("user_id") or DEFAULT_USER)
+
+
+def token_path(user_id: str) -> str:
+    """Where a user's OAuth token is stored. The default user keeps the original token.json."""
+    if user_id == DEFAULT_USER:
+        return 'token.json'
+    return os.path.join(TOKEN_DIR, quote(user_id, safe="@._-") + ".json")
+
+
+def _save_token(path: str, creds: Credentials) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temp file and rename, so a concurrent reader never sees half a token.
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "w") as token:
+        token.write(creds.to_json())
+    os.replace(tmp_path, path)
+
+
+def load_credentials(user_id: str = DEFAULT_USER) -> Credentials:
     """
-    Returns a Google Calendar API service object.
-    Caches the service after the first creation.
+    Loads a user's saved credentials, refreshing them if they have expired. Only the default user
+    may fall back to the interactive authorization flow; other users must already have a token
+    under TOKEN_DIR, and PermissionError is raised if they do not.
     """
-    global _service_cache
-    if _service_cache:
-        return _service_cache
-
+    path = token_path(user_id)
     creds = None
     # Check if token file exists to load previously saved credentials
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    # If no valid credentials are available, start the authorization flow.
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            client_config = {
-                "installed": {
-                    "client_id": os.getenv("GOOGLE_CLIENT_ID"),
-                    "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "redirect_uris": [os.getenv("GOOGLE_REDIRECT_URI", "http://localhost")]
-                }
+    if os.path.exists(path):
+        creds = Credentials.from_authorized_user_file(path, SCOPES)
+    if creds and creds.valid:
+        return creds
+    if creds and creds.expired and creds.refresh_token:
+        creds.refresh(Request())
+    elif user_id == DEFAULT_USER:
+        client_config = {
+            "installed": {
+                "client_id": os.getenv("GOOGLE_CLIENT_ID"),
+                "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
+                "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+                "token_uri": "https://oauth2.googleapis.com/token",
+                "redirect_uris": [os.getenv("GOOGLE_REDIRECT_URI", "http://localhost")]
+            }
+        }
+        flow = InstalledAppFlow.from_client_config(client_config, SCOPES)
+        creds = flow.run_local_server(port=0)
+    else:
+        raise PermissionError(f"No Google Calendar credentials for user {user_id!r} (expected {path})")
+    # Save the credentials for the next run
+    _save_token(path, creds)
+    return creds
+
+
+def build_calendar_service(user_id: str = DEFAULT_USER):
+    """A new Calendar API service for a user (loads credentials and the API description)."""
+    return build('calendar', 'v3', credentials=load_credentials(user_id))
+
+
+@dataclass
+class UserCalendar:
+    """A cached user: their Calendar service and the synced copies of their calendars."""
+    user_id: str
+    service: Any
+    syncs: Dict[str, "CalendarSync"] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class CalendarServiceCache:
+    """
+    Calendar services per user, so a user's credentials are loaded and their service is built once.
+    The least recently used users are dropped beyond `max_users`. Concurrent first requests for the
+    same user wait for one build instead of each building their own.
+
+    Args:
+        build: user_id -> service. Defaults to build_calendar_service (a FakeCalendarService factory
+            in tests and benchmarks).
+        max_users: Users kept; evicting a user also drops their synced calendars.
+    """
+
+    def __init__(self, build: Optional[Callable[[str], Any]] = None, max_users: int = 128):
+        self._build = build or build_calendar_service
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, UserCalendar]" = OrderedDict()
+        self._building: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _cached(self, user_id: str) -> Optional[UserCalendar]:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+        return entry
+
+    def get(self, user_id: str = DEFAULT_USER) -> UserCalendar:
+        """The user's entry, building their service on a miss."""
+        with self._lock:
+            entry = self._cached(user_id)
+            if entry is not None:
+                return entry
+            building = self._building.setdefault(user_id, threading.Lock())
+        with building:
+            with self._lock:
+                entry = self._cached(user_id)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+            try:
+                return self.put(user_id, self._build(user_id))
+            finally:
+                with self._lock:
+                    self._building.pop(user_id, None)
+
+    def peek(self, user_id: str = DEFAULT_USER) -> Optional[UserCalendar]:
+        """The cached entry for a user, without building one or changing the LRU order."""
+        with self._lock:
+            return self._entries.get(user_id)
+
+    def put(self, user_id: str, service: Any) -> UserCalendar:
+        """Cache a service for a user (replacing any cached one)."""
+        entry = UserCalendar(user_id, service)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                evicted, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.debug("Evicted Calendar service of user %s", evicted)
+        return entry
+
+    def evict(self, user_id: str) -> None:
+        """Drop a user's service, e.g. after their token is revoked."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "users": len(self._entries),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0,
             }
-            flow = InstalledAppFlow.from_client_config(client_config, SCOPES)
-            creds = flow.run_local_server(port=0)
-        # Save the credentials for the next run
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
 
-    _service_cache = build('calendar', 'v3', credentials=creds)
-    return _service_cache
+
+calendar_services = CalendarServiceCache(max_users=128)
+
+
+def get_calendar_service(user_id: str = DEFAULT_USER):
+    """
+    Returns a Google Calendar API service object for a user.
+    Services are cached per user (see CalendarServiceCache).
+    """
+    return calendar_services.get(user_id).service
 
 # ------------------------------------------------------------------------------
 # Calendar Event Tool
@@ -68,6 +219,9 @@ class CreateCalendarEventInputModel(BaseModel):
     topic: str
     start_time: datetime
     end_time: datetime
+    time_zone: str = "UTC"
+    # Google-style recurrence lines, e.g. ["RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=10"]
+    recurrence: Optional[List[str]] = None
 
     @validator("end_time")
     def ensure_end_after_start(cls, v, values):
@@ -75,9 +229,33 @@ class CreateCalendarEventInputModel(BaseModel):
             raise ValueError("end_time must be after start_time")
         return v
 
+    @validator("time_zone")
+    def ensure_known_time_zone(cls, v):
+        if v not in pytz.all_timezones_set:
+            raise ValueError(f"unknown time zone {v}")
+        return v
+
+    @validator("recurrence")
+    def ensure_supported_recurrence(cls, v, values):
+        if v:
+            Recurrence.parse(v, tz=values.get("time_zone", "UTC"))
+        return v
+
+
+def event_body(data: CreateCalendarEventInputModel, end_time: Optional[datetime] = None) -> Dict[str, Any]:
+    """The Calendar API body for a validated event (recurring if it has a recurrence rule)."""
+    body = {
+        'summary': data.topic,
+        'start': {'dateTime': data.start_time.isoformat(), 'timeZone': data.time_zone},
+        'end': {'dateTime': (end_time or data.end_time).isoformat(), 'timeZone': data.time_zone},
+    }
+    if data.recurrence:
+        body['recurrence'] = list(data.recurrence)
+    return body
+
 
 @tool
-def create_calendar_event_tool(event_data: Dict[str, Any]) -> str:
+def create_calendar_event_tool(event_data: Dict[str, Any], config: RunnableConfig) -> str:
     """
     Creates a Google Calendar event from the provided event_data dictionary.
 
@@ -86,6 +264,9 @@ def create_calendar_event_tool(event_data: Dict[str, Any]) -> str:
             - topic: str
             - start_time: datetime (or ISO-formatted string)
             - end_time: datetime (or ISO-formatted string)
+            - time_zone: IANA time zone of the times (optional, default "UTC")
+            - recurrence: list of RRULE/EXDATE lines for a repeating event (optional),
+              e.g. ["RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=10"]
 
     Returns:
         str: A message indicating the event's creation status or an error message.
@@ -95,16 +276,8 @@ def create_calendar_event_tool(event_data: Dict[str, Any]) -> str:
     except ValidationError as e:
         return f"Input validation error: {e}"
 
-    service = get_calendar_service()
-    event_body = {
-        'summary': data.topic,
-        'start': {'dateTime': data.start_time.isoformat(), 'timeZone': 'UTC'},
-        'end': {'dateTime': data.end_time.isoformat(), 'timeZone': 'UTC'},
-    }
-
     try:
-        created_event = service.events().insert(calendarId='primary', body=event_body).execute()
-        return f"Event created: {created_event.get('htmlLink')}"
+        return insert_event(event_body(data), config)
     except Exception as e:
         return f"Error creating event: {e}"
 
@@ -118,10 +291,12 @@ class CreateCalendarEventModel(BaseModel):
     end_time: Optional[datetime] = None
     location: Optional[str] = None
     description: Optional[str] = None
+    time_zone: str = "UTC"
+    recurrence: Optional[List[str]] = None
 
 
 @tool
-def create_calendar_event(event_data_json: str) -> str:
+def create_calendar_event(event_data_json: str, config: RunnableConfig) -> str:
     """
     Expects a JSON string with at least "topic" and "start_time".
     Example:
@@ -130,8 +305,10 @@ def create_calendar_event(event_data_json: str) -> str:
           "start_time": "2025-02-15T10:00:00Z",
           "end_time": "2025-02-15T11:00:00Z",
           "location": "Conference Room A",
-          "description": "Weekly sync-up"
+          "description": "Weekly sync-up",
+          "recurrence": ["RRULE:FREQ=WEEKLY;BYDAY=SA"]
         }
+    "time_zone" (IANA name) and "recurrence" (RRULE/EXDATE lines) are optional.
 
     Returns:
         str: A message indicating the event's creation status or an error message.
@@ -148,35 +325,22 @@ def create_calendar_event(event_data_json: str) -> str:
     except ValidationError as e:
         return f"Input validation error: {e}"
 
-    service = get_calendar_service()
-
     # If end_time not given, reuse start_time or pick a default
     end_time = data.end_time or (data.start_time + timedelta(hours=1))
 
-    event_body = {
-        'summary': data.topic,
-        'start': {
-            'dateTime': data.start_time.isoformat(),
-            'timeZone': 'UTC'
-        },
-        'end': {
-            'dateTime': end_time.isoformat(),
-            'timeZone': 'UTC'
-        },
-    }
+    body = event_body(data, end_time)
     # Safely set the 'location' if it exists and is truthy
     if getattr(data, "location", None):
-        event_body["location"] = data.location
+        body["location"] = data.location
 
     # Safely set the 'description' if it exists and is truthy
     if getattr(data, "description", None):
-        event_body["description"] = data.description
+        body["description"] = data.description
 
 
-    # 3) Attempt to create the event
+    # 3) Attempt to create (or, in write-behind mode, queue) the event as the user of this run
     try:
-        created_event = service.events().insert(calendarId='primary', body=event_body).execute()
-        return f"Event created: {created_event.get('htmlLink')}"
+        return insert_event(body, config)
     except Exception as e:
         return f"Error creating event: {e}"
 
@@ -229,3 +393,424 @@ def get_current_time_tool(input_data: Optional[Dict[str, Any]] = None) -> str:
     now = datetime.now(tz)
     return f"Current time in {data.time_zone} is: {now.isoformat()}"
 
+
+
+# ------------------------------------------------------------------------------
+# Free Slot Tool
+# ------------------------------------------------------------------------------
+
+# The FreeBusy API accepts at most 50 calendars per query.
+FREEBUSY_BATCH = 50
+
+class FindFreeSlotsInputModel(BaseModel):
+    calendar_ids: List[str] = ["primary"]
+    time_min: datetime
+    time_max: datetime
+    time_zone: str = "UTC"
+    min_duration_minutes: int = 30
+    work_start: time = time(9, 0)
+    work_end: time = time(17, 0)
+    weekdays_only: bool = True
+    min_attendees_free: Optional[int] = None
+    max_results: int = 10
+    # "freebusy" asks the API; "events" reads the synced local copy and expands recurring events locally.
+    source: str = "freebusy"
+
+    @validator("time_max")
+    def ensure_max_after_min(cls, v, values):
+        if "time_min" in values and v <= values["time_min"]:
+            raise ValueError("time_max must be after time_min")
+        return v
+
+    @validator("time_zone")
+    def ensure_known_time_zone(cls, v):
+        if v not in pytz.all_timezones_set:
+            raise ValueError(f"unknown time zone {v}")
+        return v
+
+    @validator("source")
+    def ensure_known_source(cls, v):
+        if v not in ("freebusy", "events"):
+            raise ValueError("source must be 'freebusy' or 'events'")
+        return v
+
+
+def fetch_busy_intervals(service, calendar_ids: List[str], time_min: int, time_max: int) -> Dict[str, tuple]:
+    """
+    Busy intervals per calendar from the FreeBusy API, as (starts, ends) int64 arrays of epoch
+    seconds. Calendars are queried in batches of FREEBUSY_BATCH.
+    """
+    window = {"timeMin": from_epoch(time_min).isoformat(), "timeMax": from_epoch(time_max).isoformat()}
+    busy = {}
+    for i in range(0, len(calendar_ids), FREEBUSY_BATCH):
+        batch = calendar_ids[i:i + FREEBUSY_BATCH]
+        response = service.freebusy().query(body={**window, "items": [{"id": c} for c in batch]}).execute()
+        for calendar_id in batch:
+            entry = response.get("calendars", {}).get(calendar_id, {})
+            if entry.get("errors"):
+                raise ValueError(f"FreeBusy error for {calendar_id}: {entry['errors']}")
+            periods = entry.get("busy", [])
+            busy[calendar_id] = (
+                np.fromiter((to_epoch(datetime.fromisoformat(p["start"])) for p in periods), dtype=np.int64, count=len(periods)),
+                np.fromiter((to_epoch(datetime.fromisoformat(p["end"])) for p in periods), dtype=np.int64, count=len(periods)),
+            )
+    return busy
+
+
+@tool
+def find_free_slots(query: Dict[str, Any], config: RunnableConfig) -> str:
+    """
+    Finds time windows when the given calendars are free at the same time.
+
+    Args:
+        query (dict): Dictionary with the following keys:
+            - calendar_ids: list of calendar ids or attendee emails (default ["primary"])
+            - time_min, time_max: ISO-formatted start and end of the search window
+            - time_zone: IANA time zone for working hours and results (default "UTC")
+            - min_duration_minutes: shortest useful slot (default 30)
+            - work_start, work_end: working hours as "HH:MM" (default 09:00-17:00)
+            - weekdays_only: skip weekends (default true)
+            - min_attendees_free: how many calendars must be free (default all)
+            - max_results: most slots to return (default 10)
+            - source: "freebusy" (default), or "events" to use the synced local copy of each calendar
+
+    Returns:
+        str: A JSON list of {"start", "end", "minutes"} in the requested time zone, or an error message.
+    """
+    try:
+        data = FindFreeSlotsInputModel(**query)
+    except ValidationError as e:
+        return f"Input validation error: {e}"
+
+    zone = pytz.timezone(data.time_zone)
+    localize = lambda dt: zone.localize(dt) if dt.tzinfo is None else dt
+    window = (to_epoch(localize(data.time_min)), to_epoch(localize(data.time_max)))
+
+    user_id = user_from_config(config)
+    try:
+        service = get_calendar_service(user_id)
+        if data.source == "events":
+            lo, hi = from_epoch(window[0]), from_epoch(window[1])
+            busy = {c: busy_intervals(synced_events(c, user_id), lo, hi, tz=data.time_zone) for c in data.calendar_ids}
+        else:
+            busy = fetch_busy_intervals(service, data.calendar_ids, *window)
+    except Exception as e:
+        return f"Error fetching busy times: {e}"
+
+    working = working_hours(*window, tz=data.time_zone, day_start=data.work_start, day_end=data.work_end,
+                            weekdays=range(5) if data.weekdays_only else range(7))
+    starts, ends = free_slots(busy, window, working, min_duration=data.min_duration_minutes * 60,
+                              min_free=data.min_attendees_free)
+    slots = [
+        {"start": from_epoch(s, data.time_zone).isoformat(), "end": from_epoch(e, data.time_zone).isoformat(), "minutes": int(e - s) // 60}
+        for s, e in zip(starts[: data.max_results], ends[: data.max_results])
+    ]
+    return json.dumps(slots)
+
+
+# ------------------------------------------------------------------------------
+# Incremental Calendar Sync
+# ------------------------------------------------------------------------------
+
+def iter_event_pages(service, calendar_id: str, **params):
+    """Responses of an events().list query one page at a time, following nextPageToken."""
+    page_token = None
+    while True:
+        response = service.events().list(calendarId=calendar_id, pageToken=page_token, **params).execute()
+        yield response
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def _http_status(error: Exception) -> Optional[int]:
+    return getattr(getattr(error, "resp", None), "status", None)
+
+
+class CalendarSync:
+    """
+    Local copy of one calendar's events (recurring ones as their master event), kept current with
+    incremental sync.
+
+    The first refresh pulls every event page by page and keeps the final nextSyncToken. Later
+    refreshes ask only for what changed since that token and apply it (cancelled events are
+    removed), so their cost follows the number of changes, not the size of the calendar. If the
+    token has expired (HTTP 410), the next refresh pulls everything again.
+
+    Args:
+        service: Calendar API service (or FakeCalendarService).
+        page_size: maxResults per page.
+        min_interval_s: Refreshes within this many seconds of the last one are skipped.
+    """
+
+    def __init__(self, service, calendar_id: str = "primary", page_size: int = 250, min_interval_s: float = 0.0):
+        self.service = service
+        self.calendar_id = calendar_id
+        self.page_size = page_size
+        self.min_interval_s = min_interval_s
+        self.events: Dict[str, Dict[str, Any]] = {}
+        # Moved or cancelled instances of a series, by series id then instance id (see shared/recurrence.py).
+        self.instances: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._series_of: Dict[str, str] = {}
+        self.sync_token: Optional[str] = None
+        self.last_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def apply(self, items) -> int:
+        """
+        Upsert changed events and drop cancelled ones; returns how many were applied. Instances of a
+        series (items with recurringEventId) are kept by series, cancelled ones included, since they
+        hide the series' own instance at their originalStartTime. Cancelling a series drops them too.
+        """
+        applied = 0
+        for item in items:
+            series = item.get("recurringEventId") or self._series_of.get(item["id"])
+            if series:
+                known = self.instances.get(series, {}).get(item["id"], {})
+                self.instances.setdefault(series, {})[item["id"]] = {**known, **item, "recurringEventId": series}
+                self._series_of[item["id"]] = series
+            elif item.get("status") == "cancelled":
+                self.events.pop(item["id"], None)
+                for instance_id in self.instances.pop(item["id"], {}):
+                    self._series_of.pop(instance_id, None)
+            else:
+                self.events[item["id"]] = item
+            applied += 1
+        return applied
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Events and series exceptions, as the expansion in shared/recurrence.py expects them."""
+        return list(self.events.values()) + [i for instances in self.instances.values() for i in instances.values()]
+
+    def _pull(self, **params) -> Dict[str, Any]:
+        changes = pages = 0
+        token = None
+        for response in iter_event_pages(self.service, self.calendar_id, maxResults=self.page_size, **params):
+            pages += 1
+            changes += self.apply(response.get("items", []))
+            token = response.get("nextSyncToken", token)
+        self.sync_token = token
+        return {"changes": changes, "pages": pages}
+
+    def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """Bring the local copy up to date. Returns {"mode": "full" | "delta" | "skipped", "changes", "pages"}."""
+        with self._lock:
+            now = time_module.monotonic()
+            if not force and self.sync_token and now - self.last_refresh < self.min_interval_s:
+                return {"mode": "skipped", "changes": 0, "pages": 0}
+            stats = None
+            if self.sync_token:
+                try:
+                    stats = {"mode": "delta", **self._pull(syncToken=self.sync_token)}
+                except Exception as e:
+                    if _http_status(e) != 410:
+                        raise
+                    logger.info("Sync token for %s expired; pulling the calendar again", self.calendar_id)
+            if stats is None:
+                previous = self.events, self.instances, self._series_of
+                self.events, self.instances, self._series_of = {}, {}, {}
+                try:
+                    stats = {"mode": "full", **self._pull()}
+                except Exception:
+                    self.events, self.instances, self._series_of = previous
+                    raise
+            self.last_refresh = now
+            return stats
+
+
+# Refreshes closer together than this reuse the local copy; our own writes are applied directly.
+SYNC_MIN_INTERVAL_S = 5.0
+
+
+def get_calendar_sync(calendar_id: str = "primary", user_id: str = DEFAULT_USER) -> CalendarSync:
+    """The CalendarSync for one of a user's calendars (created on first use, dropped with the user's service)."""
+    entry = calendar_services.get(user_id)
+    with entry.lock:
+        sync = entry.syncs.get(calendar_id)
+        if sync is None:
+            sync = entry.syncs[calendar_id] = CalendarSync(entry.service, calendar_id, min_interval_s=SYNC_MIN_INTERVAL_S)
+    return sync
+
+
+def synced_events(calendar_id: str = "primary", user_id: str = DEFAULT_USER) -> List[Dict[str, Any]]:
+    """The calendar's events from the local copy, after an incremental refresh."""
+    sync = get_calendar_sync(calendar_id, user_id)
+    sync.refresh()
+    return sync.items()
+
+
+def _record_created(calendar_id: str, event: Dict[str, Any], user_id: str = DEFAULT_USER) -> None:
+    """Apply an event we just created to the local copy, so reads right after see it."""
+    entry = calendar_services.peek(user_id)
+    sync = entry.syncs.get(calendar_id) if entry is not None else None
+    if sync is not None and sync.sync_token:
+        with sync._lock:
+            sync.apply([event])
+
+# ------------------------------------------------------------------------------
+# Write-Behind Calendar Inserts
+# ------------------------------------------------------------------------------
+
+# Queue inserts in a journal instead of waiting on them: CALENDAR_WRITE_BEHIND=1, or
+# configurable["write_behind"] per run.
+WRITE_BEHIND = os.getenv("CALENDAR_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+
+
+def write_behind_enabled(config: Optional[RunnableConfig]) -> bool:
+    configurable = (config or {}).get("configurable") or {}
+    return bool(configurable.get("write_behind", WRITE_BEHIND))
+
+
+def deliver_insert(entry: JournalEntry) -> Dict[str, Any]:
+    """
+    Flusher callback: inserts a journaled event as its user. The journal id is used as the event id,
+    so retrying an insert that did go through gets a 409 and picks up the existing event.
+    """
+    payload = entry.payload
+    user_id, calendar_id = payload["user_id"], payload["calendar_id"]
+    service = get_calendar_service(user_id)
+    try:
+        event = service.events().insert(calendarId=calendar_id, body={**payload["body"], "id": entry.id}).execute()
+    except Exception as e:
+        if _http_status(e) != 409:
+            raise
+        event = service.events().get(calendarId=calendar_id, eventId=entry.id).execute()
+    _record_created(calendar_id, event, user_id)
+    return {"event_id": event.get("id"), "htmlLink": event.get("htmlLink"),
+            "message": f"Event created: {event.get('htmlLink')}"}
+
+
+@lazy_resource
+def get_calendar_writer() -> Flusher:
+    """The journal of queued inserts (a free slot of $WRITE_BEHIND_JOURNAL) and the thread delivering them."""
+    # A user without credentials will not get them by retrying.
+    return Flusher(open_journal(), deliver_insert,
+                   is_retryable=lambda e: not isinstance(e, PermissionError) and retryable(e)).start()
+
+
+def insert_event(body: Dict[str, Any], config: Optional[RunnableConfig], calendar_id: str = 'primary') -> str:
+    """Inserts an event as the run's user, or in write-behind mode journals it and returns at once."""
+    user_id = user_from_config(config)
+    if write_behind_enabled(config):
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        label = f"'{body.get('summary', 'event')}' at {body['start'].get('dateTime')}"
+        entry = get_calendar_writer().journal.append(
+            "insert", {"user_id": user_id, "calendar_id": calendar_id, "body": body},
+            thread_id=str(thread_id) if thread_id is not None else None, label=label,
+        )
+        return (f"Event queued: {label} is being added to the calendar; "
+                f"the result will be reported in this conversation (ref {entry.id[:8]}).")
+    service = get_calendar_service(user_id)
+    created_event = service.events().insert(calendarId=calendar_id, body=body).execute()
+    _record_created(calendar_id, created_event, user_id)
+    return f"Event created: {created_event.get('htmlLink')}"
+
+
+def write_behind_reports(config: Optional[RunnableConfig], messages: List[Any]) -> List[Any]:
+    """Messages for this run's thread about queued inserts whose outcome is not yet in `messages`."""
+    if not write_behind_enabled(config):
+        return []
+    return report_messages(get_calendar_writer().journal, config, messages)
+
+# ------------------------------------------------------------------------------
+# Recurring Event Tools
+# ------------------------------------------------------------------------------
+
+class EventWindowInputModel(BaseModel):
+    time_min: datetime
+    time_max: datetime
+    calendar_id: str = "primary"
+    time_zone: str = "UTC"
+    max_results: int = 25
+
+    @validator("time_max")
+    def ensure_max_after_min(cls, v, values):
+        if "time_min" in values and v <= values["time_min"]:
+            raise ValueError("time_max must be after time_min")
+        return v
+
+    @validator("time_zone")
+    def ensure_known_time_zone(cls, v):
+        if v not in pytz.all_timezones_set:
+            raise ValueError(f"unknown time zone {v}")
+        return v
+
+
+@tool
+def list_event_occurrences(query: Dict[str, Any], config: RunnableConfig) -> str:
+    """
+    Lists the events in a time window, with each repetition of a recurring event as its own entry.
+
+    Args:
+        query (dict): Dictionary with the following keys:
+            - time_min, time_max: ISO-formatted start and end of the window
+            - calendar_id: calendar to read (default "primary")
+            - time_zone: IANA time zone for naive times and results (default "UTC")
+            - max_results: most entries to return (default 25)
+
+    Returns:
+        str: A JSON list of {"summary", "start", "end", "recurring"} in start order, or an error message.
+    """
+    try:
+        data = EventWindowInputModel(**query)
+    except ValidationError as e:
+        return f"Input validation error: {e}"
+
+    zone = pytz.timezone(data.time_zone)
+    localize = lambda dt: zone.localize(dt) if dt.tzinfo is None else dt
+    window_start, window_end = localize(data.time_min), localize(data.time_max)
+    try:
+        events = synced_events(data.calendar_id, user_from_config(config))
+        instances = merged_occurrences(events, window_start, window_end, tz=data.time_zone)
+        results = [
+            {"summary": event.get("summary", ""), "start": start.astimezone(zone).isoformat(),
+             "end": end.astimezone(zone).isoformat(), "recurring": bool(event.get("recurrence"))}
+            for start, end, event in itertools.islice(instances, data.max_results)
+        ]
+    except Exception as e:
+        return f"Error listing events: {e}"
+    return json.dumps(results)
+
+
+@tool
+def check_event_conflicts(event_data: Dict[str, Any], config: RunnableConfig, horizon_days: int = 90) -> str:
+    """
+    Checks a proposed event, which may be recurring, against the calendar for overlaps.
+
+    Args:
+        event_data (dict): Same keys as for create_calendar_event_tool (topic, start_time, end_time,
+            optional time_zone and recurrence).
+        horizon_days (int): How far ahead to check a recurring event (default 90).
+
+    Returns:
+        str: A JSON object {"checked": n, "conflicts": [{"start", "end"}, ...]} or an error message.
+    """
+    try:
+        data = CreateCalendarEventInputModel(**event_data)
+    except ValidationError as e:
+        return f"Input validation error: {e}"
+
+    zone = pytz.timezone(data.time_zone)
+    localize = lambda dt: zone.localize(dt) if dt.tzinfo is None else dt
+    start, end = localize(data.start_time), localize(data.end_time)
+    window_end = end if not data.recurrence else start + timedelta(days=horizon_days)
+    try:
+        if data.recurrence:
+            # Expand in the event's own zone so the wall-clock time holds across DST.
+            dtstart = start.astimezone(ZoneInfo(data.time_zone))
+            rule = Recurrence.parse(data.recurrence, tz=data.time_zone)
+            pairs = [(int(s.timestamp()), int(e.timestamp())) for s, e in occurrences(rule, dtstart, end - start, start, window_end)]
+        else:
+            pairs = [(to_epoch(start), to_epoch(end))]
+        candidate = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        events = synced_events("primary", user_from_config(config))
+        busy = busy_intervals(events, start, window_end, tz=data.time_zone)
+    except Exception as e:
+        return f"Error checking conflicts: {e}"
+
+    clash = overlaps(busy, candidate[:, 0], candidate[:, 1])
+    conflicts = [
+        {"start": from_epoch(s, data.time_zone).isoformat(), "end": from_epoch(e, data.time_zone).isoformat()}
+        for s, e in candidate[clash][:20]
+    ]
+    return json.dumps({"checked": len(candidate), "conflicts": conflicts})
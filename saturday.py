@@ -22,25 +22,29 @@ LANGSMITH_API_KEY = os.getenv('LANGSMITH_API_KEY')
 LANGSMITH_PROJECT = os.getenv('LANGSMITH_PROJECT')
 
 # Imports from LangGraph and related libraries
-from typing import Annotated, Any, List, Optional, Sequence, List, Union, Literal
-from pydantic import BaseModel, Field, validator
+from typing import Annotated, Any, Dict, List, Optional, Sequence, List, Union, Literal
+from pydantic import BaseModel, Field, field_validator
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.types import Command, interrupt
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 from operator import add
 
-# Initialize the LLM (OpenAI) and bind the tools.
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0.5,
-    api_key=OPENAI_API_KEY
-)
+from shared.graph_registry import graphs, lazy_resource
+from shared.message_store import interning_saver
+from shared.plan_dag import PlanStep, add_plan_executor, merge_results, reset_results, steps_from_strings
+
+# Initialize the LLM (OpenAI) on first use, not at import.
+@lazy_resource
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.5,
+        api_key=OPENAI_API_KEY
+    )
 
 # Main control flow will be done with a router agnet that outputs missions. These missions will be translated into commands, which will be the final output.
 
@@ -48,11 +52,22 @@ llm = ChatOpenAI(
 
 # Begin with the state: We will have nested layers of strategy and routing to handle agentic control flow.
 
-# TODO make the plan object a more structured item.
+# Steps carry their dependencies, so independent steps can run in parallel (shared/plan_dag.py).
 class Plan(BaseModel):
-    goal: str = Field(..., description="The high-level goal of the plan.")
+    goal: str = Field("", description="The high-level goal of the plan.")
     plan_text: str = Field("", description="The actual plan details as a string")
-    steps: list[str] = Field(default_factory=list, description="Ordered list of steps")
+    steps: list[PlanStep] = Field(
+        default_factory=list,
+        description="Steps of the plan. Only list a dependency when the step needs that step's result."
+    )
+
+    @field_validator("steps", mode="before")
+    @classmethod
+    def chain_plain_steps(cls, v):
+        # A plain ordered list of strings still works: each step depends on the one before it.
+        if v and all(isinstance(step, str) for step in v):
+            return steps_from_strings(v)
+        return v
 
 # Main state
 class State(BaseModel):
@@ -67,7 +82,11 @@ class State(BaseModel):
         default_factory=Plan,
         description="The plan associated with the current state."
     )
-    next: str = Field(description="The next node to route to")
+    next: str = Field("", description="The next node to route to")
+    step_results: Annotated[Dict[str, Any], merge_results] = Field(
+        default_factory=dict,
+        description="Result of each finished plan step, by step id."
+    )
 
 
 
@@ -97,7 +116,7 @@ def AgenticRouter(state: State) -> Command[Literal["human" ]]:
 
     messages = [{"role": "system", "content": system_prompt}] + state.messages
 
-    response = llm.with_structured_output(Router).invoke(messages)
+    response = get_llm().with_structured_output(Router).invoke(messages)
 
     return Command(
             goto=response["next"],
@@ -107,23 +126,59 @@ def AgenticRouter(state: State) -> Command[Literal["human" ]]:
             ) 
 
 
-graph_builder = StateGraph(State)
+# Planner Node: breaks the request into steps with dependencies.
+@lazy_resource
+def get_planner():
+    return get_llm().with_structured_output(Plan)
+
+def Planner(state: State):
+    system_prompt = """
+        You are a planner. Break the user's request into small steps a worker can do on its own.
+        Give each step a short id. In depends_on, list only the steps whose results it needs,
+        so that independent steps can run at the same time.
+    """
+    messages = [{"role": "system", "content": system_prompt}] + list(state.messages)
+    # A new plan reuses step ids (s1, s2, ...), so drop the previous plan's results.
+    return {"plan": get_planner().invoke(messages), "step_results": reset_results()}
+
+# Worker: runs one step, given the results of the steps it depends on.
+def execute_step(step: PlanStep, inputs: Dict[str, Any]) -> str:
+    context = "\n".join(f"Result of {step_id}: {result}" for step_id, result in inputs.items())
+    messages = [
+        {"role": "system", "content": "You are a worker. Complete the task you are given and reply with the result only."},
+        {"role": "user", "content": f"{context}\n\nTask: {step.task}" if context else f"Task: {step.task}"},
+    ]
+    return get_llm().invoke(messages).content
+
+# Report Node: merges the step results into one answer.
+def Report(state: State):
+    lines = [f"{step.id}. {step.task}: {state.step_results.get(step.id)}" for step in state.plan.steps]
+    return {"messages": [AIMessage(content=f"Plan for {state.plan.goal}:\n" + "\n".join(lines))]}
+
+
+@graphs.register("saturday_planner")
+def build_graph(checkpointer=None, max_concurrency: int = 4):
+    graph_builder = StateGraph(State)
 
-graph_builder.add_node("agentic_router", AgenticRouter)
-graph_builder.add_node("human", Human)
+    graph_builder.add_node("planner", Planner)
+    graph_builder.add_node("report", Report)
+    # scheduler -> workers (in parallel, via Send) -> scheduler ... -> report
+    add_plan_executor(graph_builder, execute_step, max_concurrency=max_concurrency, next_node="report")
 
-graph_builder.add_edge("human", "agentic_router")
-graph_builder.add_edge(START, "human")
+    graph_builder.add_edge(START, "planner")
+    graph_builder.add_edge("planner", "scheduler")
+    graph_builder.add_edge("report", END)
 
-memory = MemorySaver()
-graph = graph_builder.compile(checkpointer=memory)
+    return graph_builder.compile(checkpointer=checkpointer or interning_saver())
 
 
-thread = {"configurable": {"thread_id": "1"}}
+if __name__ == "__main__":
+    graph = graphs.get("saturday_planner")
 
-initial_state = {}  # or an instance of your State model
-config = {"configurable": {"thread_id": "1", "checkpoint_ns": ""}}
-graph.invoke(initial_state, config=config)
+    config = {"configurable": {"thread_id": "1", "checkpoint_ns": ""}}
+    initial_state = {"messages": [HumanMessage(content="Plan a team offsite for next month.")]}
+    result = graph.invoke(initial_state, config=config)
+    print(result["messages"][-1].content)
 
 
 
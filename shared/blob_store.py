@@ -0,0 +1,214 @@
+"""
+Tool Output Blob Store
+Keeps large tool outputs out of the message history and the checkpoints.
+
+Tool nodes used to put `json.dumps(tool_result)` straight into a ToolMessage, so a long event
+listing or search payload was copied into every later checkpoint of the thread. With a BlobStore,
+outputs above a size threshold are written once to a content-addressed file. The ToolMessage then
+carries only a handle ("blob:<sha256 prefix>") in its artifact and a short summary as its content.
+The full payload is read back (through mmap, so slices do not load the whole file) only when a node
+asks for it with `materialize` or `expand_blobs`.
+
+Blobs not written or read for `max_age_s` (default $TOOL_BLOB_MAX_AGE_S, else 7 days) are deleted
+when the store is opened and again from `put` every half of that age, so the directory does not grow
+for the life of the host. A thread older than that keeps the summary in its messages.
+
+Example usage:
+    store = BlobStore("/var/lib/agent/blobs", threshold=2048)
+    message = tool_message(json.dumps(result), name=tool_call["name"], tool_call_id=tool_call["id"], store=store)
+    ...
+    full_text = store.materialize(message.artifact["blob"])
+"""
+
+import os
+import json
+import mmap
+import time
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from langchain_core.messages import BaseMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+HANDLE_PREFIX = "blob:"
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "langgraph-tool-blobs")
+DEFAULT_MAX_AGE_S = 7 * 24 * 3600
+
+
+class BlobStore:
+    """
+    Content-addressed file store for tool payloads.
+
+    Args:
+        path: Directory for the blobs (created if missing). Defaults to $TOOL_BLOB_DIR or a temp dir.
+        threshold: Payloads smaller than this many bytes stay inline in the message.
+        digest_chars: Hex characters of the SHA-256 digest used in handles.
+        max_age_s: Delete blobs not written or read for this long. Defaults to $TOOL_BLOB_MAX_AGE_S
+            or 7 days; 0 keeps blobs forever.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: int = 2048, digest_chars: int = 32,
+                 max_age_s: Optional[float] = None):
+        self.path = path or os.getenv("TOOL_BLOB_DIR") or DEFAULT_DIR
+        self.threshold = threshold
+        self.digest_chars = digest_chars
+        if max_age_s is None:
+            max_age_s = float(os.getenv("TOOL_BLOB_MAX_AGE_S") or DEFAULT_MAX_AGE_S)
+        self.max_age_s = max_age_s or None
+        os.makedirs(self.path, exist_ok=True)
+        self._last_prune = 0.0
+        self._maybe_prune()
+
+    def _maybe_prune(self) -> None:
+        if self.max_age_s is None or time.time() - self._last_prune < self.max_age_s / 2:
+            return
+        self._last_prune = time.time()
+        removed = self.prune(self.max_age_s)
+        if removed:
+            logger.info("Pruned %d tool blobs older than %.0f s from %s", removed, self.max_age_s, self.path)
+
+    def _touch(self, file_path: str) -> bool:
+        """Mark a blob as used now, so retention keeps it. False if it is gone."""
+        if self.max_age_s is None:
+            return os.path.exists(file_path)
+        try:
+            os.utime(file_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _file(self, handle: str) -> str:
+        if not handle.startswith(HANDLE_PREFIX):
+            raise KeyError(f"Not a blob handle: {handle!r}")
+        digest = handle[len(HANDLE_PREFIX):]
+        if not digest.isalnum():
+            raise KeyError(f"Not a blob handle: {handle!r}")
+        return os.path.join(self.path, digest[:2], digest)
+
+    def put(self, data: Union[str, bytes]) -> str:
+        """Store a payload (once per distinct content) and return its handle."""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        handle = HANDLE_PREFIX + hashlib.sha256(raw).hexdigest()[: self.digest_chars]
+        file_path = self._file(handle)
+        self._maybe_prune()
+        if self._touch(file_path):
+            return handle
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Write to a temp file and rename, so readers never see a partial blob.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return handle
+
+    def size(self, handle: str) -> int:
+        try:
+            return os.path.getsize(self._file(handle))
+        except FileNotFoundError:
+            raise KeyError(f"Unknown blob {handle}") from None
+
+    def read(self, handle: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """Bytes [start:end] of a blob, read through a memory map. Raises KeyError if it is unknown."""
+        try:
+            with open(self._file(handle), "rb") as f:
+                if self.max_age_s is not None:
+                    os.utime(f.fileno())
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    return view[start:end]
+        except FileNotFoundError:
+            raise KeyError(f"Unknown blob {handle}") from None
+
+    def materialize(self, handle: str) -> str:
+        """The full payload as text."""
+        return self.read(handle).decode("utf-8")
+
+    def delete(self, handle: str) -> None:
+        try:
+            os.unlink(self._file(handle))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, max_age_s: float) -> int:
+        """Delete blobs not written or read for `max_age_s` seconds; returns how many were deleted."""
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for directory, _, files in os.walk(self.path):
+            for name in files:
+                file_path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(file_path) < cutoff:
+                        os.unlink(file_path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+# ------------------------------------------------------------------------------
+# Tool messages
+# ------------------------------------------------------------------------------
+
+def summarize(content: str, max_chars: int = 280) -> str:
+    """A short description of a payload: item counts for JSON lists and objects, plus its opening text."""
+    shape = ""
+    try:
+        value = json.loads(content)
+    except ValueError:
+        value = None
+    if isinstance(value, list):
+        shape = f"list of {len(value)} items; "
+    elif isinstance(value, dict):
+        keys = list(value)
+        shape = f"object with keys {keys[:8]}{'...' if len(keys) > 8 else ''}; "
+    head = content[:max_chars]
+    return f"{shape}starts: {head}{'...' if len(content) > max_chars else ''}"
+
+
+def tool_message(content: str, *, name: str, tool_call_id: str, store: Optional[BlobStore]) -> ToolMessage:
+    """
+    A ToolMessage for a tool's output. Outputs at or above the store's threshold are moved to the
+    store: the message content becomes a summary with the handle, and `artifact` holds
+    {"blob": handle, "bytes": size}.
+    """
+    size = len(content.encode("utf-8"))
+    if store is None or size < store.threshold:
+        return ToolMessage(content=content, name=name, tool_call_id=tool_call_id)
+    handle = store.put(content)
+    return ToolMessage(
+        content=f"[{size} bytes stored as {handle}] {summarize(content)}",
+        name=name,
+        tool_call_id=tool_call_id,
+        artifact={"blob": handle, "bytes": size},
+    )
+
+
+def blob_handle(message: BaseMessage) -> Optional[str]:
+    artifact = getattr(message, "artifact", None)
+    return artifact.get("blob") if isinstance(artifact, dict) else None
+
+
+def expand_blobs(messages: Sequence[BaseMessage], store: BlobStore) -> List[BaseMessage]:
+    """
+    Copies of `messages` with stored tool outputs put back in full, for a node that needs them
+    (e.g. right before a model call). The messages in state are left as they are.
+    """
+    expanded = []
+    for message in messages:
+        handle = blob_handle(message)
+        if handle:
+            try:
+                message = message.model_copy(update={"content": store.materialize(handle)})
+            except KeyError:
+                logger.warning("Blob %s is gone; keeping the summary", handle)
+        expanded.append(message)
+    return expanded
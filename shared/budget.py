@@ -0,0 +1,259 @@
+"""
+Budget Guard
+Stops runaway loops in cyclic graphs early, with a clear terminal state, instead of letting them
+burn LLM calls until the recursion limit.
+
+A Budget sets per-run limits on LLM calls, tokens, wall time, and how often the same state may come
+back. A BudgetGuard tracks one run against it: it is attached to the run's config as a callback
+(counting LLM calls and tokens) and under configurable["budget_guard"] (for the router).
+
+Graphs opt in by wrapping their router with `guard_router` and adding the `budget_exceeded`
+terminal node. Before every routing decision the guard checks the limits and fingerprints the
+state. When a limit is hit, the run goes to `budget_exceeded` instead, which adds a final
+AIMessage explaining why and ends the run. A route to END is always honoured. Runs without a guard
+in their config route exactly as before.
+
+As a backstop, an LLM call started after the call budget is spent raises BudgetExceeded.
+
+Example usage:
+    workflow.add_node(BUDGET_NODE, budget_exceeded)
+    workflow.add_edge(BUDGET_NODE, END)
+    workflow.add_conditional_edges("agent", guard_router(should_continue))
+
+    guard = BudgetGuard(Budget(max_llm_calls=10, max_seconds=60))
+    graph.invoke(state, with_budget({"configurable": {"thread_id": "1"}}, guard))
+    guard.stop_reason   # None, or e.g. "the same state repeated 3 times"
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END
+
+logger = logging.getLogger(__name__)
+
+BUDGET_NODE = "budget_exceeded"
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when an LLM call starts after the run's LLM call budget is spent."""
+
+
+@dataclass
+class Budget:
+    """Per-run limits. None disables a limit."""
+    max_llm_calls: Optional[int] = None
+    max_tokens: Optional[int] = None
+    max_seconds: Optional[float] = None
+    # Stop when the same (state, route) fingerprint has been seen this many times.
+    max_repeats: Optional[int] = 3
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ------------------------------------------------------------------------------
+# State fingerprints
+# ------------------------------------------------------------------------------
+
+def _message_key(message: Any) -> Any:
+    # Tool calls count with their args and ids: lookup(query=0) and lookup(query=1) are different steps.
+    if isinstance(message, dict):
+        calls = [[c.get("name"), c.get("args"), c.get("id")] for c in message.get("tool_calls") or []]
+        return [message.get("role") or message.get("type"), str(message.get("content")), calls]
+    calls = [[c.get("name"), c.get("args"), c.get("id")] for c in getattr(message, "tool_calls", None) or []]
+    return [getattr(message, "type", type(message).__name__), str(getattr(message, "content", message)), calls]
+
+
+def state_fingerprint(state: Any, route: Any, message_key: str = "messages") -> str:
+    """
+    Hash of the route and the state, with the message history reduced to its last message. Loops
+    that append a new message every cycle still repeat this fingerprint when nothing else changes.
+    """
+    values = state if isinstance(state, dict) else dict(getattr(state, "__dict__", {}))
+    messages = values.get(message_key) or []
+    rest = {k: v for k, v in values.items() if k != message_key}
+    payload = {"route": route, "last": _message_key(messages[-1]) if messages else None, "rest": rest}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------------------------
+# Guard
+# ------------------------------------------------------------------------------
+
+def _tokens(response) -> int:
+    """Total tokens of an LLMResult, from the provider's token_usage or the messages' usage_metadata."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    total = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            total += int(metadata.get("total_tokens", 0))
+    return total
+
+
+class BudgetGuard(BaseCallbackHandler):
+    """
+    Tracks one run against a Budget. Create one per invoke; wall time counts from construction.
+
+    Args:
+        budget: The limits.
+        fingerprint: callable(state, route) -> hashable, used for repeated-state detection.
+    """
+
+    run_inline = True
+    raise_error = True
+
+    def __init__(self, budget: Budget, fingerprint: Callable[[Any, Any], Any] = state_fingerprint):
+        self.budget = budget
+        self.fingerprint = fingerprint
+        self.started = time.monotonic()
+        self.llm_calls = 0
+        self.tokens = 0
+        self.stop_reason: Optional[str] = None
+        self._seen: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    # ---- callbacks ----
+
+    def _on_llm_start(self) -> None:
+        limit = self.budget.max_llm_calls
+        with self._lock:
+            if limit is not None and self.llm_calls >= limit:
+                raise BudgetExceeded(f"LLM call budget of {limit} spent")
+            self.llm_calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._on_llm_start()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._on_llm_start()
+
+    def on_llm_end(self, response, **kwargs):
+        tokens = _tokens(response)
+        with self._lock:
+            self.tokens += tokens
+
+    # ---- checks ----
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def check(self, state: Any = None, route: Any = None) -> Optional[str]:
+        """Why the run should stop now, or None. Counts the (state, route) fingerprint when a state is given."""
+        b = self.budget
+        reason = None
+        with self._lock:
+            if b.max_llm_calls is not None and self.llm_calls >= b.max_llm_calls:
+                reason = f"the LLM call budget was spent ({self.llm_calls}/{b.max_llm_calls} calls)"
+            elif b.max_tokens is not None and self.tokens >= b.max_tokens:
+                reason = f"the token budget was spent ({self.tokens}/{b.max_tokens} tokens)"
+            elif b.max_seconds is not None and self.elapsed >= b.max_seconds:
+                reason = f"the time budget was spent ({self.elapsed:.1f}/{b.max_seconds:g} s)"
+            elif b.max_repeats is not None and state is not None:
+                key = self.fingerprint(state, route)
+                self._seen[key] = self._seen.get(key, 0) + 1
+                if self._seen[key] >= b.max_repeats:
+                    reason = f"the same state repeated {self._seen[key]} times without progress"
+            if reason and self.stop_reason is None:
+                self.stop_reason = reason
+        return reason
+
+    def usage(self) -> Dict[str, Any]:
+        return {
+            "llm_calls": self.llm_calls,
+            "tokens": self.tokens,
+            "seconds": round(self.elapsed, 3),
+            "stop_reason": self.stop_reason,
+        }
+
+
+def get_guard(config: Optional[RunnableConfig]) -> Optional[BudgetGuard]:
+    return ((config or {}).get("configurable") or {}).get("budget_guard")
+
+
+def with_budget(config: Optional[Dict[str, Any]], guard: Optional[BudgetGuard]) -> Dict[str, Any]:
+    """Return a copy of `config` with `guard` added to its callbacks and configurable; unchanged for None."""
+    config = dict(config or {})
+    if guard is None:
+        return config
+    config["configurable"] = {**(config.get("configurable") or {}), "budget_guard": guard}
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.copy()
+        callbacks.add_handler(guard, inherit=True)
+        config["callbacks"] = callbacks
+    else:
+        config["callbacks"] = [*(callbacks or []), guard]
+    return config
+
+
+# ------------------------------------------------------------------------------
+# Graph wiring
+# ------------------------------------------------------------------------------
+
+def guard_router(router: Callable, terminal: str = BUDGET_NODE, done: Iterable[Any] = (END,)) -> Callable:
+    """
+    Wrap a conditional-edge router so a run over budget goes to `terminal`. Routes in `done` (the
+    ones that end the run) are never redirected. With a path map, add `terminal` to it.
+    """
+    done = set(done)
+
+    def route(state, config: RunnableConfig):
+        target = router(state)
+        guard = get_guard(config)
+        if guard is None or target in done:
+            return target
+        reason = guard.check(state, target)
+        if reason:
+            logger.warning("Stopping run: %s", reason)
+            return terminal
+        return target
+
+    # Not functools.wraps: LangGraph reads the signature to decide whether to pass `config`,
+    # and __wrapped__ would make it see the inner router's.
+    route.__name__ = getattr(router, "__name__", "route")
+    route.__doc__ = router.__doc__
+    return route
+
+
+def _unanswered_tool_calls(messages: Any) -> list:
+    """Tool calls of the last AIMessage that have no ToolMessage after it."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], AIMessage):
+            answered = {m.tool_call_id for m in messages[i + 1:] if isinstance(m, ToolMessage)}
+            return [c for c in messages[i].tool_calls if c.get("id") not in answered]
+    return []
+
+
+def budget_exceeded(state: Any, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Terminal node: a final AIMessage saying why the run stopped, with the usage in its metadata.
+    Tool calls left without an answer get a ToolMessage saying they were not run first, since a
+    chat API rejects a thread with unanswered tool calls on the next turn.
+    """
+    guard = get_guard(config)
+    usage = guard.usage() if guard else {}
+    reason = usage.get("stop_reason") or "the run budget was spent"
+    values = state if isinstance(state, dict) else dict(getattr(state, "__dict__", {}))
+    skipped = [
+        ToolMessage(content=f"Not run: {reason}.", name=call.get("name"), tool_call_id=call["id"], status="error")
+        for call in _unanswered_tool_calls(values.get("messages") or [])
+    ]
+    message = AIMessage(
+        content=f"I stopped here because {reason}. Please rephrase or add the missing details and try again.",
+        name="budget_guard",
+        response_metadata={"stop_reason": reason, "usage": usage},
+    )
+    return {"messages": skipped + [message]}
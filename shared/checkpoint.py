@@ -0,0 +1,708 @@
+"""
+Bounded Checkpointer
+A drop-in replacement for MemorySaver for long-running processes that serve many thread_ids.
+
+MemorySaver keeps every checkpoint of every thread forever. BoundedMemorySaver keeps each
+thread's checkpoints in a resident record and enforces a memory budget: when the budget is
+exceeded, the least recently used idle threads are spilled to disk and transparently reloaded
+the next time get_state / stream touches them. An optional retention policy keeps only the
+last N checkpoints per thread (and namespace).
+
+Threads can be forked from any checkpoint with `fork`. A fork shares the parent's history
+structurally (nothing is copied) and only stores the checkpoints and writes made after the fork,
+so forking is O(1) in time and memory.
+
+Example usage:
+    memory = BoundedMemorySaver(max_resident_bytes=64 * 1024 * 1024, keep_last=20)
+    graph = graph_builder.compile(checkpointer=memory)
+    ...
+    print(memory.stats())
+
+    # Branch a conversation, e.g. to retry from before a bad tool call.
+    fork_config = memory.fork(graph.get_state(config).config)
+    graph.invoke(None, fork_config)
+"""
+
+import os
+import asyncio
+import pickle
+import random
+import hashlib
+import logging
+import tempfile
+import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping cost (dict slot, tuple, key strings) added on top of payload bytes.
+_ENTRY_OVERHEAD = 96
+
+
+def _typed_size(typed: Tuple[str, bytes]) -> int:
+    return len(typed[0]) + len(typed[1]) + _ENTRY_OVERHEAD
+
+
+# ------------------------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------------------------
+
+@dataclass
+class CheckpointerStats:
+    """Snapshot of resident memory and eviction counters for a BoundedMemorySaver."""
+    resident_bytes: int = 0
+    resident_threads: int = 0
+    spilled_threads: int = 0
+    evictions: int = 0
+    reloads: int = 0
+    pruned_checkpoints: int = 0
+    forks: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+# ------------------------------------------------------------------------------
+# Per-thread storage
+# ------------------------------------------------------------------------------
+
+class _ThreadRecord:
+    """
+    All checkpoints, pending writes and channel blobs of a single thread.
+    Everything stored here is already serialized, so a record can be pickled to disk as is.
+
+    A forked thread has a `base` of (parent thread_id, fork checkpoint_id). Anything it does not
+    store itself is read from the parent, up to and including the fork checkpoint. The parent
+    keeps a count of forks per checkpoint in `pins`, so retention never prunes a fork point.
+    """
+    __slots__ = ("checkpoints", "writes", "blobs", "nbytes", "base", "pins")
+
+    def __init__(self):
+        # checkpoint_ns -> checkpoint_id -> (checkpoint, metadata, parent_checkpoint_id, channel_versions)
+        self.checkpoints: Dict[str, Dict[str, tuple]] = {}
+        # (checkpoint_ns, checkpoint_id) -> (task_id, write idx) -> (task_id, channel, value, task_path)
+        self.writes: Dict[Tuple[str, str], Dict[Tuple[str, int], tuple]] = {}
+        # (checkpoint_ns, channel, version) -> serialized channel value
+        self.blobs: Dict[Tuple[str, str, Any], Tuple[str, bytes]] = {}
+        self.nbytes = 0
+        self.base: Optional[Tuple[Any, str]] = None
+        self.pins: Dict[str, int] = {}
+
+    def __getstate__(self):
+        return (self.checkpoints, self.writes, self.blobs, self.nbytes, self.base, self.pins)
+
+    def __setstate__(self, state):
+        self.checkpoints, self.writes, self.blobs, self.nbytes, self.base, self.pins = state
+
+
+# ------------------------------------------------------------------------------
+# Bounded Saver
+# ------------------------------------------------------------------------------
+
+class BoundedMemorySaver(BaseCheckpointSaver):
+    """
+    In-memory checkpointer with a memory budget, LRU spill-to-disk of idle threads and a
+    per-thread history retention policy.
+
+    Args:
+        serde: Serializer for checkpoints, metadata and writes. Defaults to the langgraph default.
+        max_resident_bytes: Approximate budget for resident checkpoint data. None disables the budget.
+        max_resident_threads: Maximum number of threads kept in memory. None disables the limit.
+        keep_last: Keep only the last N checkpoints per thread and namespace. None keeps everything.
+        spill_dir: Directory for spilled threads. A temporary directory is created when needed.
+    """
+
+    def __init__(
+        self,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        max_resident_bytes: Optional[int] = 256 * 1024 * 1024,
+        max_resident_threads: Optional[int] = None,
+        keep_last: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        if keep_last is not None and keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        self.max_resident_bytes = max_resident_bytes
+        self.max_resident_threads = max_resident_threads
+        self.keep_last = keep_last
+        self.spill_dir = spill_dir
+
+        self._resident: "OrderedDict[Any, _ThreadRecord]" = OrderedDict()
+        self._spilled: Dict[Any, str] = {}
+        self._resident_bytes = 0
+        self._evictions = 0
+        self._reloads = 0
+        self._pruned = 0
+        self._forks = 0
+        self._lock = threading.RLock()
+
+    # --------------------------------------------------------------------------
+    # Metrics
+    # --------------------------------------------------------------------------
+
+    def stats(self) -> CheckpointerStats:
+        """Return resident-memory and eviction metrics."""
+        with self._lock:
+            return CheckpointerStats(
+                resident_bytes=self._resident_bytes,
+                resident_threads=len(self._resident),
+                spilled_threads=len(self._spilled),
+                evictions=self._evictions,
+                reloads=self._reloads,
+                pruned_checkpoints=self._pruned,
+                forks=self._forks,
+            )
+
+    # --------------------------------------------------------------------------
+    # Residency management
+    # --------------------------------------------------------------------------
+
+    def _spill_path(self, thread_id: Any) -> str:
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="langgraph-spill-")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        digest = hashlib.sha256(str(thread_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.ckpt")
+
+    def _record(self, thread_id: Any, create: bool = False) -> Optional[_ThreadRecord]:
+        """
+        Return the resident record for a thread, reloading it from disk if it was spilled.
+        Touching a record marks it as most recently used.
+        """
+        record = self._resident.get(thread_id)
+        if record is not None:
+            self._resident.move_to_end(thread_id)
+            return record
+
+        path = self._spilled.pop(thread_id, None)
+        if path is not None:
+            with open(path, "rb") as f:
+                record = pickle.load(f)
+            os.remove(path)
+            self._reloads += 1
+            logger.debug(f"Reloaded spilled thread {thread_id} ({record.nbytes} bytes)")
+        elif create:
+            # Empty; the put that creates it enforces the budget once it has written.
+            self._resident[thread_id] = _ThreadRecord()
+            return self._resident[thread_id]
+        else:
+            return None
+
+        self._resident[thread_id] = record
+        self._resident_bytes += record.nbytes
+        self._enforce_budget(keep=thread_id)
+        return record
+
+    def _on_disk(self, thread_id: Any) -> bool:
+        """Whether reading the thread would reload it, or a fork ancestor, from disk."""
+        with self._lock:
+            while thread_id is not None:
+                if thread_id in self._spilled:
+                    return True
+                record = self._resident.get(thread_id)
+                thread_id = record.base[0] if record is not None and record.base is not None else None
+            return False
+
+    def _spill_over_budget(self, keep: Any) -> None:
+        with self._lock:
+            self._enforce_budget(keep=keep)
+
+    def _evict(self, thread_id: Any) -> None:
+        record = self._resident.pop(thread_id)
+        self._resident_bytes -= record.nbytes
+        path = self._spill_path(thread_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._spilled[thread_id] = path
+        self._evictions += 1
+        logger.debug(f"Spilled idle thread {thread_id} ({record.nbytes} bytes) to {path}")
+
+    def _over_budget(self) -> bool:
+        if self.max_resident_bytes is not None and self._resident_bytes > self.max_resident_bytes:
+            return True
+        if self.max_resident_threads is not None and len(self._resident) > self.max_resident_threads:
+            return True
+        return False
+
+    def _enforce_budget(self, keep: Any = None) -> None:
+        """Spill least recently used threads until the budget holds. The `keep` thread is never spilled."""
+        while self._over_budget():
+            victim = next((t for t in self._resident if t != keep), None)
+            if victim is None:
+                break
+            self._evict(victim)
+
+    def _grow(self, record: _ThreadRecord, delta: int) -> None:
+        record.nbytes += delta
+        self._resident_bytes += delta
+
+    def _release(self, *typed: Tuple[str, bytes]) -> None:
+        """Tell a serializer that keeps references out of band (InterningSerializer) that these values were dropped."""
+        release = getattr(self.serde, "release", None)
+        if release is not None:
+            for value in typed:
+                release(value)
+
+    # --------------------------------------------------------------------------
+    # Retention
+    # --------------------------------------------------------------------------
+
+    def _prune(self, record: _ThreadRecord, checkpoint_ns: str) -> None:
+        """Drop checkpoints beyond keep_last, their writes, and any blobs no longer referenced."""
+        checkpoints = record.checkpoints[checkpoint_ns]
+        excess = len(checkpoints) - self.keep_last
+        if excess <= 0:
+            return
+        candidates = [c for c in sorted(checkpoints)[:excess] if c not in record.pins]
+        for checkpoint_id in candidates:
+            checkpoint, metadata, _, _ = checkpoints.pop(checkpoint_id)
+            self._grow(record, -(_typed_size(checkpoint) + _typed_size(metadata)))
+            self._release(checkpoint, metadata)
+            for write in record.writes.pop((checkpoint_ns, checkpoint_id), {}).values():
+                self._grow(record, -_typed_size(write[2]))
+                self._release(write[2])
+            self._pruned += 1
+
+        referenced = {
+            (checkpoint_ns, channel, version)
+            for *_, versions in checkpoints.values()
+            for channel, version in versions.items()
+        }
+        for key in [k for k in record.blobs if k[0] == checkpoint_ns and k not in referenced]:
+            blob = record.blobs.pop(key)
+            self._grow(record, -_typed_size(blob))
+            self._release(blob)
+
+    # --------------------------------------------------------------------------
+    # Fork chains
+    # --------------------------------------------------------------------------
+
+    def _chain(self, thread_id: Any) -> List[Tuple[_ThreadRecord, Optional[str]]]:
+        """
+        Return [(record, cutoff), ...] for a thread and its fork ancestors. Checkpoints of an
+        ancestor are visible only up to its cutoff (the fork checkpoint id); the thread's own
+        record has no cutoff. Returns an empty list for unknown threads.
+        """
+        chain = []
+        cutoff = None
+        while thread_id is not None:
+            record = self._record(thread_id)
+            if record is None:
+                break
+            chain.append((record, cutoff))
+            if record.base is None:
+                break
+            thread_id, base_id = record.base
+            cutoff = base_id if cutoff is None else min(cutoff, base_id)
+        return chain
+
+    @staticmethod
+    def _visible(checkpoint_id: str, cutoff: Optional[str]) -> bool:
+        return cutoff is None or checkpoint_id <= cutoff
+
+    def _find(self, chain, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[Tuple[str, tuple]]:
+        """Find a checkpoint entry (or the latest one if checkpoint_id is None) along a fork chain."""
+        for record, cutoff in chain:
+            checkpoints = record.checkpoints.get(checkpoint_ns)
+            if not checkpoints:
+                continue
+            if checkpoint_id is not None:
+                if checkpoint_id in checkpoints and self._visible(checkpoint_id, cutoff):
+                    return checkpoint_id, checkpoints[checkpoint_id]
+                continue
+            visible = [c for c in checkpoints if self._visible(c, cutoff)]
+            if visible:
+                latest = max(visible)
+                return latest, checkpoints[latest]
+        return None
+
+    # --------------------------------------------------------------------------
+    # Tuple assembly
+    # --------------------------------------------------------------------------
+
+    def _load_blobs(self, chain, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        channel_values = {}
+        for channel, version in versions.items():
+            key = (checkpoint_ns, channel, version)
+            blob = next((r.blobs[key] for r, _ in chain if key in r.blobs), None)
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed(blob)
+        return channel_values
+
+    def _make_tuple(
+        self, thread_id: Any, checkpoint_ns: str, checkpoint_id: str, entry: tuple, chain, metadata: Any = None
+    ) -> CheckpointTuple:
+        checkpoint, metadata_b, parent_checkpoint_id, versions = entry
+        checkpoint_ = self.serde.loads_typed(checkpoint)
+        writes = next(
+            (
+                r.writes[(checkpoint_ns, checkpoint_id)].values()
+                for r, cutoff in chain
+                if (checkpoint_ns, checkpoint_id) in r.writes and self._visible(checkpoint_id, cutoff)
+            ),
+            (),
+        )
+        # Configs always point at the requested thread, so writes on a fork never touch its parent.
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint_,
+                "channel_values": self._load_blobs(chain, checkpoint_ns, versions),
+            },
+            metadata=metadata if metadata is not None else self.serde.loads_typed(metadata_b),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed(value)) for task_id, channel, value, _ in writes],
+        )
+
+    # --------------------------------------------------------------------------
+    # BaseCheckpointSaver interface
+    # --------------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        Get the checkpoint tuple for config. If config has no checkpoint_id the latest checkpoint
+        of the thread is returned. Spilled threads are reloaded transparently.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            chain = self._chain(thread_id)
+            found = self._find(chain, checkpoint_ns, get_checkpoint_id(config))
+            if found is None:
+                return None
+            checkpoint_id, entry = found
+            return self._make_tuple(thread_id, checkpoint_ns, checkpoint_id, entry, chain)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints newest first, optionally filtered by thread, namespace, metadata and `before`."""
+        with self._lock:
+            thread_ids = [config["configurable"]["thread_id"]] if config else [*self._resident, *self._spilled]
+        config_checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+
+        for thread_id in thread_ids:
+            # Materialize one thread at a time so the lock is never held across a yield.
+            with self._lock:
+                chain = self._chain(thread_id)
+                # checkpoint_ns -> checkpoint_id -> entry, merged over the fork chain (own entries win).
+                merged: Dict[str, Dict[str, tuple]] = {}
+                for record, cutoff in chain:
+                    for checkpoint_ns, checkpoints in record.checkpoints.items():
+                        ns_entries = merged.setdefault(checkpoint_ns, {})
+                        for checkpoint_id, entry in checkpoints.items():
+                            if self._visible(checkpoint_id, cutoff):
+                                ns_entries.setdefault(checkpoint_id, entry)
+                results: List[CheckpointTuple] = []
+                for checkpoint_ns, checkpoints in merged.items():
+                    if config_checkpoint_ns is not None and checkpoint_ns != config_checkpoint_ns:
+                        continue
+                    for checkpoint_id in sorted(checkpoints, reverse=True):
+                        if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                            continue
+                        if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                            continue
+                        metadata = self.serde.loads_typed(checkpoints[checkpoint_id][1])
+                        if filter and not all(metadata.get(k) == v for k, v in filter.items()):
+                            continue
+                        if limit is not None and len(results) >= limit:
+                            break
+                        results.append(
+                            self._make_tuple(thread_id, checkpoint_ns, checkpoint_id, checkpoints[checkpoint_id], chain, metadata)
+                        )
+            for item in results:
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        Save a checkpoint. Only channels listed in new_versions are serialized; unchanged channels
+        keep pointing at the blob written by an earlier checkpoint.
+        """
+        return self._put(config, checkpoint, metadata, new_versions)
+
+    def _put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+        spill: bool = True,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+
+        with self._lock:
+            record = self._record(thread_id, create=True)
+            for channel, version in new_versions.items():
+                key = (checkpoint_ns, channel, version)
+                blob = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+                old = record.blobs.get(key)
+                record.blobs[key] = blob
+                self._grow(record, _typed_size(blob) - (_typed_size(old) if old else 0))
+                if old:
+                    self._release(old)
+
+            entry = (
+                self.serde.dumps_typed(c),
+                self.serde.dumps_typed(metadata),
+                config["configurable"].get("checkpoint_id"),  # parent
+                dict(checkpoint["channel_versions"]),
+            )
+            old = record.checkpoints.setdefault(checkpoint_ns, {}).get(checkpoint["id"])
+            record.checkpoints[checkpoint_ns][checkpoint["id"]] = entry
+            self._grow(record, _typed_size(entry[0]) + _typed_size(entry[1]))
+            if old:
+                self._grow(record, -(_typed_size(old[0]) + _typed_size(old[1])))
+                self._release(old[0], old[1])
+
+            if self.keep_last is not None:
+                self._prune(record, checkpoint_ns)
+            if spill:
+                self._enforce_budget(keep=thread_id)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save intermediate writes linked to a checkpoint."""
+        self._put_writes(config, writes, task_id, task_path)
+
+    def _put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+        spill: bool = True,
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self._lock:
+            record = self._record(thread_id, create=True)
+            outer = record.writes.setdefault((checkpoint_ns, checkpoint_id), {})
+            for idx, (channel, value) in enumerate(writes):
+                inner_key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                if inner_key[1] >= 0 and inner_key in outer:
+                    continue
+                old = outer.get(inner_key)
+                typed = self.serde.dumps_typed(value)
+                outer[inner_key] = (task_id, channel, typed, task_path)
+                self._grow(record, _typed_size(typed) - (_typed_size(old[2]) if old else 0))
+                if old:
+                    self._release(old[2])
+            if spill:
+                self._enforce_budget(keep=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        Delete all checkpoints and writes of a thread, resident or spilled.
+        A thread that still has forks cannot be deleted; delete the forks first.
+        """
+        with self._lock:
+            record = self._record(thread_id)
+            if record is None:
+                return
+            if record.pins:
+                raise ValueError(f"Thread {thread_id} has {sum(record.pins.values())} fork(s); delete them first")
+            if record.base is not None:
+                parent_id, base_id = record.base
+                parent = self._record(parent_id)
+                if parent is not None:
+                    parent.pins[base_id] -= 1
+                    if not parent.pins[base_id]:
+                        del parent.pins[base_id]
+            self._release(
+                *(typed for checkpoints in record.checkpoints.values() for entry in checkpoints.values() for typed in entry[:2]),
+                *(write[2] for writes in record.writes.values() for write in writes.values()),
+                *record.blobs.values(),
+            )
+            record = self._resident.pop(thread_id, None)
+            if record is not None:
+                self._resident_bytes -= record.nbytes
+            path = self._spilled.pop(thread_id, None)
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    def fork(self, config: RunnableConfig, new_thread_id: Optional[str] = None) -> RunnableConfig:
+        """
+        Create a new thread that branches from a checkpoint of an existing thread.
+
+        The fork shares the parent's history up to and including the checkpoint (the latest one if
+        config has no checkpoint_id) without copying it, and stores only its own later writes.
+
+        Args:
+            config: Config of the checkpoint to fork from, e.g. `graph.get_state(config).config`.
+            new_thread_id: Thread id for the fork. A random UUID is used if omitted.
+
+        Returns:
+            RunnableConfig: Config of the fork, pointing at the fork checkpoint.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        new_thread_id = new_thread_id or str(uuid.uuid4())
+        with self._lock:
+            if new_thread_id in self._resident or new_thread_id in self._spilled:
+                raise ValueError(f"Thread {new_thread_id} already exists")
+            found = self._find(self._chain(thread_id), "", get_checkpoint_id(config))
+            if found is None:
+                raise ValueError(f"No checkpoint to fork for {config['configurable']}")
+            checkpoint_id, _ = found
+            # Pin on the thread that actually owns the checkpoint, which may be a fork ancestor.
+            owner = thread_id
+            while True:
+                owner_record = self._record(owner)
+                if checkpoint_id in owner_record.checkpoints.get("", {}):
+                    break
+                owner = owner_record.base[0]
+            owner_record.pins[checkpoint_id] = owner_record.pins.get(checkpoint_id, 0) + 1
+
+            record = _ThreadRecord()
+            record.base = (owner, checkpoint_id)
+            self._resident[new_thread_id] = record
+            self._forks += 1
+            self._enforce_budget(keep=new_thread_id)
+
+        return {
+            "configurable": {
+                "thread_id": new_thread_id,
+                "checkpoint_ns": "",
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        # Same scheme as MemorySaver: sortable counter plus a random suffix.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --------------------------------------------------------------------------
+    # Async interface
+    # --------------------------------------------------------------------------
+    # Resident threads are read and written inline: that is dict lookups and (de)serialization,
+    # like MemorySaver. Anything that reloads a spilled thread, or spills one to stay within the
+    # budget, pickles and does file I/O, so it runs in a worker thread instead of on the event loop.
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if self._on_disk(config["configurable"]["thread_id"]):
+            return await asyncio.to_thread(self.get_tuple, config)
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if self._on_disk(config["configurable"]["thread_id"]) if config else bool(self._spilled):
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        else:
+            items = self.list(config, filter=filter, before=before, limit=limit)
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        if self._on_disk(thread_id):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+        result = self._put(config, checkpoint, metadata, new_versions, spill=False)
+        if self._over_budget():
+            await asyncio.to_thread(self._spill_over_budget, thread_id)
+        return result
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        if self._on_disk(thread_id):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+        self._put_writes(config, writes, task_id, task_path, spill=False)
+        if self._over_budget():
+            await asyncio.to_thread(self._spill_over_budget, thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        if self._on_disk(thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+        return self.delete_thread(thread_id)
@@ -0,0 +1,163 @@
+"""
+Graph Registry
+A registry of graph factory functions, so modules no longer build LLM clients and compile graphs as
+an import side effect. Graphs are compiled on first use and cached; model clients are created on
+first use with `lazy_resource`.
+
+Factories take an optional checkpointer and return a compiled graph, which is the same signature the
+worker pool expects, so a registered factory can be handed to GraphWorkerPool as is.
+
+Example usage:
+    @lazy_resource
+    def get_llm():
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model="gpt-4o-mini")
+
+    @graphs.register("agent")
+    def build_agent(checkpointer=None):
+        builder = StateGraph(State)
+        ...
+        return builder.compile(checkpointer=checkpointer or MemorySaver())
+
+    graph = graphs.get("agent")            # compiled on first call, cached afterwards
+"""
+
+import time
+import logging
+import functools
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# Lazy resources
+# -------------------------------
+def lazy_resource(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Decorator for a zero-argument constructor (model clients, tool bindings, API services). The
+    first call builds the object; later calls return the same instance. `fn.reset()` drops it.
+    """
+    lock = threading.Lock()
+    sentinel = object()
+    value = sentinel
+
+    @functools.wraps(fn)
+    def wrapper():
+        nonlocal value
+        if value is sentinel:
+            with lock:
+                if value is sentinel:
+                    value = fn()
+        return value
+
+    def reset() -> None:
+        nonlocal value
+        with lock:
+            value = sentinel
+
+    wrapper.reset = reset
+    return wrapper
+
+
+# -------------------------------
+# Registry
+# -------------------------------
+class GraphRegistry:
+    """
+    Name -> graph factory, with compiled graphs cached per (name, checkpointer).
+
+    Factories can be registered directly (decorator) or as a "module:attr" path, in which case the
+    module is only imported when the graph is first requested.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Any] = {}
+        self._graphs: Dict[Tuple[str, Any], Any] = {}
+        self._build_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Optional[Any] = None):
+        """
+        Register a factory under `name`. Use as `@graphs.register("name")` or call it with a
+        callable or a "module:attr" string.
+        """
+        def decorator(f):
+            with self._lock:
+                existing = self._factories.get(name)
+                # The same factory may be registered twice (a script run as __main__ and imported).
+                if existing is not None and _qualname(existing, module=False) != _qualname(f, module=False):
+                    raise ValueError(f"Graph '{name}' is already registered to {_qualname(existing)}")
+                self._factories[name] = f
+                # A re-registered factory (module reload) must not serve graphs from the old one.
+                for key in [k for k in self._graphs if k[0] == name]:
+                    del self._graphs[key]
+            return f
+
+        if factory is not None:
+            return decorator(factory)
+        return decorator
+
+    def names(self) -> List[str]:
+        return sorted(self._factories)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def factory(self, name: str) -> Callable:
+        """Return the factory callable for `name`, importing it if it was registered by path."""
+        with self._lock:
+            f = self._factories.get(name)
+            if f is None:
+                raise KeyError(f"Unknown graph '{name}'. Registered graphs: {self.names()}")
+            if isinstance(f, str):
+                module_name, _, attr = f.partition(":")
+                f = getattr(importlib.import_module(module_name), attr)
+                self._factories[name] = f
+            return f
+
+    def get(self, name: str, checkpointer: Any = None) -> Any:
+        """
+        Return the compiled graph for `name`, building it on first use. Graphs built with a
+        specific checkpointer are cached separately from the default build.
+        """
+        key = (name, checkpointer)
+        graph = self._graphs.get(key)
+        if graph is not None:
+            return graph
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is None:
+                factory = self.factory(name)
+                start = time.perf_counter()
+                graph = factory(checkpointer) if checkpointer is not None else factory()
+                self._build_times[name] = time.perf_counter() - start
+                logger.info(f"Built graph '{name}' in {self._build_times[name] * 1000:.1f} ms")
+                self._graphs[key] = graph
+        return graph
+
+    def build_all(self) -> Dict[str, Any]:
+        """Build (or fetch) every registered graph, e.g. to warm a server before taking traffic."""
+        return {name: self.get(name) for name in self.names()}
+
+    def clear(self) -> None:
+        """Drop all cached graphs; they are rebuilt on next use."""
+        with self._lock:
+            self._graphs.clear()
+
+    def build_times(self) -> Dict[str, float]:
+        """Seconds each graph took to build the last time it was compiled."""
+        return dict(self._build_times)
+
+
+def _qualname(f: Any, module: bool = True) -> str:
+    if isinstance(f, str):
+        return f if module else f.rpartition(":")[2]
+    name = getattr(f, "__qualname__", repr(f))
+    return f"{getattr(f, '__module__', '?')}:{name}" if module else name
+
+
+# Global registry. Graph modules register their factories into this at import time.
+graphs = GraphRegistry()
@@ -0,0 +1,336 @@
+"""
+Human Task Queue
+A durable queue of questions waiting on a human, so a graph that calls `interrupt(...)` can park
+instead of tying up a worker blocked on `input()`.
+
+When a run stops on an interrupt, `park` records one task per interrupt (graph, thread, question,
+tool_call_id, deadline). The worker is then free. When the answer arrives, `answer` stores it and
+any process sharing the queue database can `resume` the right thread with Command(resume=...).
+A claim for resumption is a lease: if the claiming worker dies before marking the task resumed,
+the task can be claimed again once `lease_s` has passed.
+
+The queue is a SQLite file, so it survives restarts and is safe to share between processes on one
+host. Note that resuming from another process also needs the graph's checkpointer to be shared
+(a database-backed saver rather than an in-memory one).
+
+Example usage:
+    tasks = HumanTaskQueue("human_tasks.db")
+    graph.invoke(initial_state, config)
+    tasks.park("agent", graph, config, deadline_s=3600)   # returns immediately
+
+    # later, possibly in another process
+    for task in tasks.pending():
+        tasks.answer(task.task_id, "Tomorrow at 10am")
+    tasks.resume_answered({"agent": graph})
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from langgraph.types import Command
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+ANSWERED = "answered"
+RESUMING = "resuming"
+RESUMED = "resumed"
+EXPIRED = "expired"
+SUPERSEDED = "superseded"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS human_tasks (
+    task_id       TEXT PRIMARY KEY,
+    graph         TEXT NOT NULL,
+    thread_id     TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    attempt       INTEGER NOT NULL,
+    idx           INTEGER NOT NULL,
+    question      TEXT NOT NULL,
+    tool_call_id  TEXT,
+    created_at    REAL NOT NULL,
+    deadline      REAL,
+    status        TEXT NOT NULL,
+    answer        TEXT,
+    claimed_by    TEXT,
+    claimed_at    REAL,
+    UNIQUE (graph, thread_id, checkpoint_id, attempt, idx)
+);
+CREATE INDEX IF NOT EXISTS human_tasks_status ON human_tasks (status, deadline);
+CREATE INDEX IF NOT EXISTS human_tasks_thread ON human_tasks (graph, thread_id, status);
+"""
+
+
+@dataclass
+class HumanTask:
+    """A question waiting on a human."""
+    task_id: str
+    graph: str
+    thread_id: str
+    question: Any
+    tool_call_id: Optional[str]
+    created_at: float
+    deadline: Optional[float]
+    status: str
+    answer: Any = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": self.thread_id}}
+
+
+def question_from_interrupt(value: Any):
+    """
+    Extract (question, tool_call_id) from an interrupt value. The agents interrupt either with a
+    plain question or with the AskHuman tool call itself ({"name", "args": {"question"}, "id"}).
+    """
+    if isinstance(value, dict) and isinstance(value.get("args"), dict):
+        return value["args"].get("question", value), value.get("id")
+    return value, None
+
+
+class HumanTaskQueue:
+    """
+    SQLite-backed queue of pending human tasks.
+
+    Args:
+        path: Database file. ":memory:" works for tests but is not shared between processes.
+        worker_id: Name recorded when this process claims answered tasks for resumption.
+        lease_s: How long a claim lasts. A task still resuming after that (its worker died mid-resume)
+            may be claimed again, so this should exceed the longest resume run.
+    """
+
+    def __init__(self, path: str = "human_tasks.db", worker_id: Optional[str] = None, lease_s: float = 600.0):
+        self.path = path
+        self.worker_id = worker_id or f"worker-{uuid.uuid4().hex[:8]}"
+        self.lease_s = lease_s
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(human_tasks)")}
+        if "claimed_at" not in columns:
+            # Databases created before claims had a lease.
+            self._conn.execute("ALTER TABLE human_tasks ADD COLUMN claimed_at REAL")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _row_to_task(self, row) -> HumanTask:
+        task_id, graph, thread_id, question, tool_call_id, created_at, deadline, status, answer = row
+        return HumanTask(
+            task_id=task_id,
+            graph=graph,
+            thread_id=thread_id,
+            question=json.loads(question),
+            tool_call_id=tool_call_id,
+            created_at=created_at,
+            deadline=deadline,
+            status=status,
+            answer=json.loads(answer) if answer is not None else None,
+        )
+
+    _COLUMNS = "task_id, graph, thread_id, question, tool_call_id, created_at, deadline, status, answer"
+
+    # -------------------------------
+    # Parking
+    # -------------------------------
+    def park(self, graph_name: str, graph: Any, config: Dict[str, Any], deadline_s: Optional[float] = None) -> List[HumanTask]:
+        """
+        Record a task for every interrupt the thread is currently stopped on. Calling park twice
+        for the same stop is harmless. Returns the thread's pending tasks.
+        """
+        return self.record(graph_name, config, graph.get_state(config), deadline_s)
+
+    async def apark(self, graph_name: str, graph: Any, config: Dict[str, Any], deadline_s: Optional[float] = None) -> List[HumanTask]:
+        """Async version of park, for graphs served from an event loop. The SQLite work runs in a thread."""
+        state = await graph.aget_state(config)
+        return await asyncio.to_thread(self.record, graph_name, config, state, deadline_s)
+
+    def record(self, graph_name: str, config: Dict[str, Any], state: Any, deadline_s: Optional[float] = None) -> List[HumanTask]:
+        """
+        Like park, for a StateSnapshot the caller already has. Pending tasks the thread has moved
+        past (it was resumed or given new input some other way) are marked superseded.
+        """
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_id = state.config["configurable"].get("checkpoint_id", "")
+        interrupts = [i for task in state.tasks for i in task.interrupts]
+        now = time.time()
+        deadline = now + deadline_s if deadline_s is not None else None
+        with self._lock:
+            self._conn.execute(
+                "UPDATE human_tasks SET status = ? WHERE graph = ? AND thread_id = ? AND status = ? AND checkpoint_id != ?",
+                (SUPERSEDED, graph_name, thread_id, PENDING, checkpoint_id),
+            )
+            # A node that interrupts again after being resumed stops on the same checkpoint, so
+            # count the resumes there to tell the new question apart from the answered one.
+            (attempt,) = self._conn.execute(
+                "SELECT COUNT(*) FROM human_tasks WHERE graph = ? AND thread_id = ? AND checkpoint_id = ? AND status = ?",
+                (graph_name, thread_id, checkpoint_id, RESUMED),
+            ).fetchone()
+            for idx, interrupt in enumerate(interrupts):
+                question, tool_call_id = question_from_interrupt(interrupt.value)
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO human_tasks "
+                    "(task_id, graph, thread_id, checkpoint_id, attempt, idx, question, tool_call_id, created_at, deadline, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (str(uuid.uuid4()), graph_name, thread_id, checkpoint_id, attempt, idx,
+                     json.dumps(question, default=str), tool_call_id, now, deadline, PENDING),
+                )
+        return self.pending(graph_name=graph_name, thread_id=thread_id)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def get(self, task_id: str) -> Optional[HumanTask]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {self._COLUMNS} FROM human_tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def pending(self, graph_name: Optional[str] = None, thread_id: Optional[str] = None) -> List[HumanTask]:
+        """Tasks still waiting for an answer, oldest first."""
+        query = f"SELECT {self._COLUMNS} FROM human_tasks WHERE status = ?"
+        params: list = [PENDING]
+        if graph_name is not None:
+            query += " AND graph = ?"
+            params.append(graph_name)
+        if thread_id is not None:
+            query += " AND thread_id = ?"
+            params.append(str(thread_id))
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created_at", params).fetchall()
+        return [self._row_to_task(r) for r in rows]
+
+    # -------------------------------
+    # Answering and resuming
+    # -------------------------------
+    def answer(self, task_id: str, answer: Any) -> HumanTask:
+        """Store the human's answer. Raises KeyError for unknown tasks, ValueError if it is not pending."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE human_tasks SET status = ?, answer = ? WHERE task_id = ? AND status = ?",
+                (ANSWERED, json.dumps(answer, default=str), task_id, PENDING),
+            )
+        if cur.rowcount == 0:
+            task = self.get(task_id)
+            if task is None:
+                raise KeyError(f"Unknown human task {task_id}")
+            raise ValueError(f"Human task {task_id} is {task.status}, not pending")
+        return self.get(task_id)
+
+    # A task that can be claimed: answered, or left resuming by a claim whose lease has run out.
+    _CLAIMABLE = "(status = ? OR (status = ? AND (claimed_at IS NULL OR claimed_at < ?)))"
+
+    def claim_answered(self, limit: int = 100, graph_names: Optional[Iterable[str]] = None) -> List[HumanTask]:
+        """
+        Atomically claim answered tasks for this worker, so two processes never resume the same
+        thread twice. Tasks whose previous claim's lease expired are claimed again. With
+        `graph_names`, only tasks of those graphs are claimed.
+        """
+        now = time.time()
+        query = f"SELECT {self._COLUMNS} FROM human_tasks WHERE {self._CLAIMABLE}"
+        params: list = [ANSWERED, RESUMING, now - self.lease_s]
+        if graph_names is not None:
+            names = list(graph_names)
+            query += f" AND graph IN ({', '.join('?' * len(names))})"
+            params.extend(names)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(query + " ORDER BY created_at LIMIT ?", (*params, limit)).fetchall()
+                self._conn.executemany(
+                    "UPDATE human_tasks SET status = ?, claimed_by = ?, claimed_at = ? WHERE task_id = ?",
+                    [(RESUMING, self.worker_id, now, r[0]) for r in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        reclaimed = sum(r[7] == RESUMING for r in rows)
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} human tasks whose resume lease expired")
+        return [self._row_to_task(r) for r in rows]
+
+    def _mark(self, task_id: str, status: str) -> None:
+        """Finish this worker's claim on a task. Does nothing if the lease expired and another worker claimed it."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE human_tasks SET status = ? WHERE task_id = ? AND status = ? AND claimed_by = ?",
+                (status, task_id, RESUMING, self.worker_id),
+            )
+        if cur.rowcount == 0:
+            logger.warning(f"Human task {task_id} was no longer claimed by {self.worker_id}; not marking it {status}")
+
+    def resume(self, task: HumanTask, graph: Any, deadline_s: Optional[float] = None) -> List[HumanTask]:
+        """
+        Resume a claimed task's thread with its answer. If the run stops on another interrupt the
+        new question is parked again; those new tasks are returned.
+        """
+        try:
+            graph.invoke(Command(resume=task.answer), task.config)
+        except Exception:
+            # Put it back so another worker (or a retry) can pick it up.
+            self._mark(task.task_id, ANSWERED)
+            raise
+        self._mark(task.task_id, RESUMED)
+        return self.park(task.graph, graph, task.config, deadline_s=deadline_s)
+
+    async def aresume(self, task: HumanTask, graph: Any, deadline_s: Optional[float] = None) -> List[HumanTask]:
+        """Async version of resume."""
+        try:
+            await graph.ainvoke(Command(resume=task.answer), task.config)
+        except Exception:
+            await asyncio.to_thread(self._mark, task.task_id, ANSWERED)
+            raise
+        await asyncio.to_thread(self._mark, task.task_id, RESUMED)
+        return await self.apark(task.graph, graph, task.config, deadline_s=deadline_s)
+
+    def claim(self, task_id: str) -> Optional[HumanTask]:
+        """
+        Claim one answered task (or one whose previous claim's lease expired) for resumption.
+        Returns None if it cannot be claimed.
+        """
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE human_tasks SET status = ?, claimed_by = ?, claimed_at = ? WHERE task_id = ? AND {self._CLAIMABLE}",
+                (RESUMING, self.worker_id, now, task_id, ANSWERED, RESUMING, now - self.lease_s),
+            )
+        return self.get(task_id) if cur.rowcount else None
+
+    def resume_answered(self, graphs: Dict[str, Any], limit: int = 100, deadline_s: Optional[float] = None) -> int:
+        """Claim and resume answered tasks for the given graphs. Returns the number resumed."""
+        resumed = 0
+        for task in self.claim_answered(limit, graph_names=graphs):
+            try:
+                self.resume(task, graphs[task.graph], deadline_s=deadline_s)
+                resumed += 1
+            except Exception as e:
+                logger.error(f"Failed to resume human task {task.task_id} on thread {task.thread_id}: {e}")
+        return resumed
+
+    def expire_overdue(self, now: Optional[float] = None, default_answer: Any = None) -> List[HumanTask]:
+        """
+        Mark pending tasks past their deadline as expired and return them. With `default_answer`,
+        they are answered with it instead, so `resume_answered` moves their threads on.
+        """
+        now = now if now is not None else time.time()
+        if default_answer is None:
+            update, values = "UPDATE human_tasks SET status = ? WHERE task_id = ? AND status = ?", (EXPIRED,)
+        else:
+            update = "UPDATE human_tasks SET status = ?, answer = ? WHERE task_id = ? AND status = ?"
+            values = (ANSWERED, json.dumps(default_answer, default=str))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM human_tasks WHERE status = ? AND deadline IS NOT NULL AND deadline < ?",
+                (PENDING, now),
+            ).fetchall()
+            self._conn.executemany(update, [(*values, r[0], PENDING) for r in rows])
+        return [self._row_to_task(r) for r in rows]
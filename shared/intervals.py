@@ -0,0 +1,186 @@
+"""
+Intervals
+NumPy interval arithmetic for calendar questions ("when are we all free next week?").
+
+Intervals are half-open [start, end) in integer epoch seconds, held as two int64 arrays. All set
+operations come from one sweep: every interval adds its weight at its start and removes it at its
+end, so a cumulative sum over the sorted boundaries gives the coverage of each elementary segment.
+Union, intersection, complement and "at least k of n people free" are all choices of weights and
+of the coverage values to keep. The cost is one sort of the boundaries, so hundreds of attendees
+with months of events take milliseconds.
+
+Example usage:
+    busy = {cal: (starts, ends) for cal, ... in busy_intervals}
+    slots = free_slots(busy, window=(t0, t1), working=working_hours(t0, t1, "America/Denver"),
+                       min_duration=30 * 60)
+"""
+
+import logging
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pytz
+
+logger = logging.getLogger(__name__)
+
+Intervals = Tuple[np.ndarray, np.ndarray]
+
+
+def to_epoch(dt: datetime) -> int:
+    """Epoch seconds of an aware datetime (naive datetimes are taken as UTC)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=pytz.UTC)
+    return int(dt.timestamp())
+
+
+def from_epoch(seconds: int, tz: str = "UTC") -> datetime:
+    return datetime.fromtimestamp(int(seconds), pytz.timezone(tz))
+
+
+def as_intervals(pairs: Iterable[Tuple[int, int]]) -> Intervals:
+    array = np.asarray(list(pairs), dtype=np.int64).reshape(-1, 2)
+    return array[:, 0].copy(), array[:, 1].copy()
+
+
+def _empty() -> Intervals:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+
+# ------------------------------------------------------------------------------
+# Sweep
+# ------------------------------------------------------------------------------
+
+def coverage(starts: np.ndarray, ends: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Elementary segments between consecutive distinct boundaries and the total weight covering each:
+    returns (seg_starts, seg_ends, weight). Empty or inverted intervals are ignored.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    weights = np.ones(len(starts), dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+    keep = ends > starts
+    starts, ends, weights = starts[keep], ends[keep], weights[keep]
+    if not len(starts):
+        return _empty() + (np.empty(0, dtype=np.int64),)
+    points = np.concatenate([starts, ends])
+    deltas = np.concatenate([weights, -weights])
+    order = np.argsort(points, kind="stable")
+    points = points[order]
+    running = np.cumsum(deltas[order])
+    # The coverage after the last boundary at a point holds until the next point.
+    last = np.append(points[1:] != points[:-1], True)
+    points, running = points[last], running[last]
+    return points[:-1], points[1:], running[:-1]
+
+
+def select(seg_starts: np.ndarray, seg_ends: np.ndarray, mask: np.ndarray) -> Intervals:
+    """Join runs of adjacent selected segments into intervals."""
+    if not len(mask) or not mask.any():
+        return _empty()
+    before = np.concatenate([[False], mask[:-1]])
+    after = np.concatenate([mask[1:], [False]])
+    # Segments are contiguous by construction, so a run only breaks where the mask does.
+    return seg_starts[mask & ~before], seg_ends[mask & ~after]
+
+
+def union(starts: np.ndarray, ends: np.ndarray) -> Intervals:
+    """Merge overlapping or touching intervals into a sorted, disjoint set."""
+    seg_starts, seg_ends, weight = coverage(starts, ends)
+    return select(seg_starts, seg_ends, weight > 0)
+
+
+def intersect(a: Intervals, b: Intervals) -> Intervals:
+    """Intersection of two interval sets."""
+    a, b = union(*a), union(*b)
+    seg_starts, seg_ends, weight = coverage(np.concatenate([a[0], b[0]]), np.concatenate([a[1], b[1]]))
+    return select(seg_starts, seg_ends, weight == 2)
+
+
+def subtract(a: Intervals, b: Intervals) -> Intervals:
+    """Parts of `a` not covered by `b`."""
+    a, b = union(*a), union(*b)
+    weights = np.concatenate([np.ones(len(a[0]), dtype=np.int64), np.full(len(b[0]), -1, dtype=np.int64)])
+    seg_starts, seg_ends, weight = coverage(np.concatenate([a[0], b[0]]), np.concatenate([a[1], b[1]]), weights)
+    return select(seg_starts, seg_ends, weight == 1)
+
+
+def overlaps(a: Intervals, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """For each interval [starts[i], ends[i]), whether it overlaps any interval of `a`."""
+    merged_starts, merged_ends = union(*a)
+    if not len(merged_starts):
+        return np.zeros(len(starts), dtype=bool)
+    # The last merged interval starting before ends[i] is the only candidate.
+    idx = np.searchsorted(merged_starts, ends, side="left") - 1
+    valid = idx >= 0
+    return valid & (merged_ends[np.clip(idx, 0, None)] > starts)
+
+
+# ------------------------------------------------------------------------------
+# Calendars
+# ------------------------------------------------------------------------------
+
+def working_hours(
+    window_start: int,
+    window_end: int,
+    tz: str = "UTC",
+    day_start: time = time(9, 0),
+    day_end: time = time(17, 0),
+    weekdays: Sequence[int] = (0, 1, 2, 3, 4),
+) -> Intervals:
+    """Working-hour intervals for each allowed weekday (0 = Monday) in the window, local to `tz` (DST-aware)."""
+    zone = pytz.timezone(tz)
+    first = from_epoch(window_start, tz).date()
+    last = from_epoch(window_end, tz).date()
+    pairs = []
+    day = first
+    while day <= last:
+        if day.weekday() in weekdays:
+            pairs.append((to_epoch(zone.localize(datetime.combine(day, day_start))),
+                          to_epoch(zone.localize(datetime.combine(day, day_end)))))
+        day += timedelta(days=1)
+    return intersect(as_intervals(pairs), as_intervals([(window_start, window_end)])) if pairs else _empty()
+
+
+def free_slots(
+    busy: Dict[str, Intervals],
+    window: Tuple[int, int],
+    working: Optional[Intervals] = None,
+    min_duration: int = 0,
+    min_free: Optional[int] = None,
+) -> Intervals:
+    """
+    Windows inside `window` (and `working`, if given) of at least `min_duration` seconds when at
+    least `min_free` of the calendars in `busy` are free (all of them by default).
+
+    Each calendar's busy intervals are merged first, so overlapping events of one person count once.
+    """
+    n = len(busy)
+    min_free = n if min_free is None else max(0, min(min_free, n))
+    allowed_busy = n - min_free
+    # Merge per calendar in one pass: shifting calendar i by i * span keeps calendars apart.
+    span = np.int64(window[1] - window[0] + 1)
+    shifted_starts, shifted_ends = [], []
+    for i, (starts, ends) in enumerate(busy.values()):
+        starts = np.clip(np.asarray(starts, dtype=np.int64), window[0], window[1]) - window[0]
+        ends = np.clip(np.asarray(ends, dtype=np.int64), window[0], window[1]) - window[0]
+        shifted_starts.append(starts + i * span)
+        shifted_ends.append(ends + i * span)
+    if shifted_starts:
+        merged_starts, merged_ends = union(np.concatenate(shifted_starts), np.concatenate(shifted_ends))
+        offset = (merged_starts // span) * span - window[0]
+        busy_starts, busy_ends = merged_starts - offset, merged_ends - offset
+    else:
+        busy_starts, busy_ends = _empty()
+
+    allowed = as_intervals([window]) if working is None else intersect(working, as_intervals([window]))
+    # Weight the allowed time above any possible busy count, then keep segments inside it with few enough busy.
+    base = n + 1
+    seg_starts, seg_ends, weight = coverage(
+        np.concatenate([allowed[0], busy_starts]),
+        np.concatenate([allowed[1], busy_ends]),
+        np.concatenate([np.full(len(allowed[0]), base, dtype=np.int64), np.ones(len(busy_starts), dtype=np.int64)]),
+    )
+    starts, ends = select(seg_starts, seg_ends, (weight >= base) & (weight - base <= allowed_busy))
+    keep = ends - starts >= max(min_duration, 1)
+    return starts[keep], ends[keep]
@@ -0,0 +1,281 @@
+"""
+Load Generator
+Drives many concurrent conversations against a compiled graph, with simulated humans answering in
+place of `input()`.
+
+Each session opens a thread, runs the graph, and then lets its simulated human reply to whatever
+stopped the run: an `interrupt(...)` (answered with Command(resume=...)) or the graph reaching END
+(answered with a new user message). The session ends when the human has nothing more to say or
+`max_turns` is reached. Humans wait `think_time` before each reply, which is not counted as latency.
+
+A turn is one run of the graph, from sending the input to the graph stopping again. The report gives
+p50/p95/p99 turn latency and sessions/s. Pair it with benchmarks/fakes.py for a model and calendar
+with controlled latency, so the numbers measure the graph and the runtime rather than the network.
+
+The graph needs a checkpointer, since the conversation is carried between turns by thread_id.
+
+Example usage:
+    human = PersonaHuman({r"when": "Tomorrow at 10am", r"about": "Roadmap review"}, fallback=None)
+    load = LoadGenerator(graph, human, opener="I want to schedule a meeting.",
+                         think_time=Latency(0.5, jitter=0.2))
+    report = load.run(sessions=200, concurrency=50)
+    print(report.summary())
+"""
+
+import re
+import abc
+import time
+import uuid
+import random
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from langgraph.types import Command
+
+from shared.human_tasks import question_from_interrupt
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Latency:
+    """Injected delay: `seconds` on average, uniformly spread by +/- `jitter`."""
+    seconds: float = 0.0
+    jitter: float = 0.0
+
+    def sample(self) -> float:
+        if not self.jitter:
+            return self.seconds
+        return max(0.0, random.uniform(self.seconds - self.jitter, self.seconds + self.jitter))
+
+    def wait(self) -> None:
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+    async def await_(self) -> None:
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# ------------------------------------------------------------------------------
+# Simulated humans
+# ------------------------------------------------------------------------------
+
+class SimulatedHuman(abc.ABC):
+    """Answers the agent. `reply` returns None when the human is done with the conversation."""
+
+    @abc.abstractmethod
+    def reply(self, prompt: str, turn: int) -> Optional[str]:
+        ...
+
+
+class ScriptedHuman(SimulatedHuman):
+    """Replies with the next line of a script, whatever was asked, and stops when the script runs out."""
+
+    def __init__(self, script: Sequence[str]):
+        self.script = list(script)
+
+    def reply(self, prompt: str, turn: int) -> Optional[str]:
+        return self.script[turn] if turn < len(self.script) else None
+
+
+class PersonaHuman(SimulatedHuman):
+    """
+    Replies by matching the prompt against regex patterns (case-insensitive, first match wins).
+
+    Args:
+        answers: Pattern -> reply. The reply may be a callable(prompt) -> Optional[str].
+        fallback: Reply when nothing matches. None ends the conversation.
+        max_replies: Stop after this many replies, so a confused agent cannot loop forever.
+    """
+
+    def __init__(self, answers: Dict[str, Union[str, Callable[[str], Optional[str]], None]],
+                 fallback: Optional[str] = None, max_replies: int = 20):
+        self.answers = [(re.compile(pattern, re.IGNORECASE), reply) for pattern, reply in answers.items()]
+        self.fallback = fallback
+        self.max_replies = max_replies
+
+    def reply(self, prompt: str, turn: int) -> Optional[str]:
+        if turn >= self.max_replies:
+            return None
+        for pattern, reply in self.answers:
+            if pattern.search(prompt):
+                return reply(prompt) if callable(reply) else reply
+        return self.fallback
+
+
+# ------------------------------------------------------------------------------
+# Report
+# ------------------------------------------------------------------------------
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Linear-interpolated percentile (p in 0..100) of unsorted values; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class LoadReport:
+    sessions: int
+    completed: int
+    errors: int
+    turns: int
+    elapsed: float
+    turn_latencies: List[float] = field(repr=False, default_factory=list)
+    error_samples: List[str] = field(repr=False, default_factory=list)
+
+    @property
+    def sessions_per_s(self) -> float:
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def turns_per_s(self) -> float:
+        return self.turns / self.elapsed if self.elapsed else 0.0
+
+    def latency_ms(self, p: float) -> float:
+        return percentile(self.turn_latencies, p) * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sessions": self.sessions,
+            "completed": self.completed,
+            "errors": self.errors,
+            "turns": self.turns,
+            "elapsed_s": round(self.elapsed, 3),
+            "sessions_per_s": round(self.sessions_per_s, 2),
+            "turns_per_s": round(self.turns_per_s, 2),
+            "p50_ms": round(self.latency_ms(50), 1),
+            "p95_ms": round(self.latency_ms(95), 1),
+            "p99_ms": round(self.latency_ms(99), 1),
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"sessions     {self.completed}/{self.sessions} completed, {self.errors} errors, {self.turns} turns in {self.elapsed:.2f} s",
+            f"throughput   {self.sessions_per_s:.2f} sessions/s, {self.turns_per_s:.1f} turns/s",
+            f"turn latency p50 {self.latency_ms(50):.0f} ms, p95 {self.latency_ms(95):.0f} ms, p99 {self.latency_ms(99):.0f} ms",
+        ]
+        lines += [f"error        {sample}" for sample in self.error_samples]
+        return "\n".join(lines)
+
+
+# ------------------------------------------------------------------------------
+# Generator
+# ------------------------------------------------------------------------------
+
+def _message_text(message: Any) -> str:
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", message)
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+
+def user_message(text: str) -> Dict[str, Any]:
+    """Default input for a user message, for graphs whose state has an add_messages `messages` key."""
+    return {"messages": [("user", text)]}
+
+
+class LoadGenerator:
+    """
+    Args:
+        graph: Compiled graph with a checkpointer.
+        human: A SimulatedHuman shared by all sessions, or a callable(session_index) -> SimulatedHuman.
+        opener: First input of each session: a user message string, a state dict, or a
+            callable(session_index) returning either.
+        think_time: Delay before each human reply.
+        max_turns: Upper bound on graph runs per session.
+        message_input: Turns a human reply into graph input when the graph ended without an interrupt.
+        recursion_limit: Passed in each run's config.
+    """
+
+    def __init__(self, graph, human: Union[SimulatedHuman, Callable[[int], SimulatedHuman]],
+                 opener: Union[str, Dict[str, Any], Callable[[int], Any]] = "Hello",
+                 think_time: Optional[Latency] = None, max_turns: int = 20,
+                 message_input: Callable[[str], Any] = user_message, recursion_limit: int = 50):
+        if getattr(graph, "checkpointer", None) is None:
+            raise ValueError("LoadGenerator needs a graph compiled with a checkpointer to carry conversations between turns")
+        self.graph = graph
+        self.human = human
+        self.opener = opener
+        self.think_time = think_time or Latency()
+        self.max_turns = max_turns
+        self.message_input = message_input
+        self.recursion_limit = recursion_limit
+
+    def _human_for(self, index: int) -> SimulatedHuman:
+        return self.human if isinstance(self.human, SimulatedHuman) else self.human(index)
+
+    def _opening(self, index: int) -> Any:
+        opener = self.opener(index) if callable(self.opener) else self.opener
+        return self.message_input(opener) if isinstance(opener, str) else opener
+
+    async def _session(self, index: int, prefix: str, latencies: List[float]) -> int:
+        """Run one conversation to the end; returns the number of turns."""
+        config = {"configurable": {"thread_id": f"{prefix}-{index}"}, "recursion_limit": self.recursion_limit}
+        human = self._human_for(index)
+        payload = self._opening(index)
+        for turn in range(self.max_turns):
+            start = time.perf_counter()
+            await self.graph.ainvoke(payload, config)
+            latencies.append(time.perf_counter() - start)
+
+            state = await self.graph.aget_state(config)
+            interrupts = [i for task in state.tasks for i in task.interrupts]
+            if interrupts:
+                question, _ = question_from_interrupt(interrupts[0].value)
+                answer = human.reply(str(question), turn)
+                payload = Command(resume=answer)
+            else:
+                messages = state.values.get("messages") or [""]
+                answer = human.reply(_message_text(messages[-1]), turn)
+                payload = self.message_input(answer) if answer is not None else None
+            if answer is None:
+                return turn + 1
+            await self.think_time.await_()
+        return self.max_turns
+
+    async def arun(self, sessions: int, concurrency: int = 10) -> LoadReport:
+        """
+        Run `sessions` conversations, at most `concurrency` at a time, on the running loop.
+        Sync nodes run on the loop's default executor, so size it to `concurrency` (run() does this).
+        """
+        prefix = f"load-{uuid.uuid4().hex[:8]}"
+        latencies: List[float] = []
+        errors: List[str] = []
+        counts = {"completed": 0, "turns": 0}
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(index: int):
+            async with limit:
+                try:
+                    turns = await self._session(index, prefix, latencies)
+                    counts["turns"] += turns
+                    counts["completed"] += 1
+                except Exception as e:
+                    logger.debug("Session %d failed", index, exc_info=True)
+                    errors.append(f"{type(e).__name__}: {e}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(sessions)))
+        elapsed = time.perf_counter() - start
+        # Keep a few distinct errors for the summary.
+        samples = list(dict.fromkeys(errors))[:3]
+        return LoadReport(sessions, counts["completed"], len(errors), counts["turns"], elapsed, latencies, samples)
+
+    def run(self, sessions: int, concurrency: int = 10) -> LoadReport:
+        """Blocking arun() on a fresh event loop whose executor has a thread per concurrent session."""
+        async def main():
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="loadgen") as executor:
+                asyncio.get_running_loop().set_default_executor(executor)
+                return await self.arun(sessions, concurrency)
+        return asyncio.run(main())
@@ -0,0 +1,388 @@
+"""
+Long-Term Memory
+Remembers past turns and user facts across threads, and recalls only the relevant ones per turn.
+
+The only memory the agents had was the `messages` list of one thread, so a preference stated last
+week ("I usually keep meetings to 30 minutes") was gone unless the whole history was re-sent. Now
+every human turn is embedded and kept in a local vector index (a NumPy matrix of unit vectors, so
+cosine similarity is one matrix-vector product). Turns that state a preference or habit are stored
+as facts. Before a model call, `recall_messages` searches the index with the latest human message
+and adds the top-k snippets as one short system message to the prompt. Nothing is added to state.
+
+Memories are scoped by a namespace: `configurable["user_id"]`, or else the thread id.
+
+With a path, every new memory is appended to `journal.jsonl` (record plus vector) as it is stored,
+so graphs run by the service or a worker pool keep their memories without an explicit save.
+`save()` compacts the journal into the `records.jsonl` / `vectors.npy` snapshot. Both run under an
+flock on the directory, so processes sharing it do not lose each other's appends.
+
+Embeddings come from `HashingEmbedder` by default: hashed word and word-pair features, which needs
+no model or network and gives the same vectors in every process. Any LangChain `Embeddings`
+(e.g. OpenAIEmbeddings) can be passed instead.
+
+Example usage:
+    def call_model(state, config):
+        messages = recall_messages(get_memory(), state["messages"], config)
+        return {"messages": [model.invoke(messages, config)]}
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import fcntl
+import base64
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from shared.graph_registry import lazy_resource
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can could do for from have i i'm in is it its me my of on or our please "
+    "so that the this to up us was we what when will with would you your".split()
+)
+# Phrases that mark a turn as a lasting fact about the user rather than a one-off request.
+_FACT_CUES = re.compile(
+    r"\b(i|we)\s+(usually|always|never|normally|generally|typically|prefer|like|don't like|hate|tend to)\b"
+    r"|\bmy\s+(usual|default|preferred|favorite|favourite)\b|\bplease always\b|\bfrom now on\b",
+    re.IGNORECASE,
+)
+
+
+def is_fact(text: str) -> bool:
+    return bool(_FACT_CUES.search(text))
+
+
+# ------------------------------------------------------------------------------
+# Embeddings
+# ------------------------------------------------------------------------------
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder: words (with a plural "s" stripped) and adjacent word pairs are hashed
+    into `dim` signed buckets, and the vector is L2-normalized. Uses crc32, so vectors are the same
+    across processes and a saved index stays valid.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+                 for w in _WORD.findall(text.casefold()) if w not in _STOPWORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self.features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return vector
+
+    # LangChain Embeddings interface
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed(t).tolist() for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed(text).tolist()
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+# ------------------------------------------------------------------------------
+# Vector index
+# ------------------------------------------------------------------------------
+
+class VectorIndex:
+    """
+    Unit vectors in one preallocated float32 matrix (capacity doubles when full). A search scores
+    every row with one matrix-vector product and takes the top k with argpartition.
+    """
+
+    def __init__(self, dim: int, capacity: int = 256):
+        self.dim = dim
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._matrix[: self._size]
+
+    def add(self, vectors: np.ndarray) -> List[int]:
+        vectors = _unit(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+        needed = self._size + len(vectors)
+        if needed > len(self._matrix):
+            grown = np.zeros((max(needed, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+            grown[: self._size] = self.vectors
+            self._matrix = grown
+        rows = list(range(self._size, needed))
+        self._matrix[self._size:needed] = vectors
+        self._size = needed
+        return rows
+
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None,
+               bonus: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k (row, score) by cosine similarity. `mask` (bool per row) limits the candidates, and
+        `bonus` (float per row) is added to the scores before ranking.
+        """
+        if not self._size or k <= 0:
+            return []
+        scores = self.vectors @ _unit(query)[0]
+        if bonus is not None:
+            scores = scores + bonus
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+# ------------------------------------------------------------------------------
+# Memory
+# ------------------------------------------------------------------------------
+
+@dataclass
+class MemoryRecord:
+    text: str
+    namespace: str
+    kind: str = "turn"                     # "turn" or "fact"
+    created_at: float = field(default_factory=time.time)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class LongTermMemory:
+    """
+    Args:
+        embedder: HashingEmbedder (default) or any LangChain Embeddings.
+        path: Directory to load from and persist to (journaled on every write, compacted by `save()`);
+            in-memory only if None.
+        fact_bonus: Added to the score of facts, so preferences win ties against plain turns.
+    """
+
+    def __init__(self, embedder: Any = None, path: Optional[str] = None, fact_bonus: float = 0.1):
+        self.embedder = embedder or HashingEmbedder()
+        self.path = path
+        self.fact_bonus = fact_bonus
+        self.records: List[MemoryRecord] = []
+        self._index: Optional[VectorIndex] = None
+        self._namespaces: List[str] = []
+        self._seen: set = set()
+        self._lock = threading.Lock()
+        if path and any(os.path.exists(os.path.join(path, name)) for name in ("records.jsonl", "journal.jsonl")):
+            self.load()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedder.embed_documents(texts), dtype=np.float32)
+
+    @staticmethod
+    def _key(namespace: str, text: str) -> str:
+        return hashlib.sha1(f"{namespace}\n{text.strip().casefold()}".encode("utf-8")).hexdigest()
+
+    def _append(self, records: List[MemoryRecord], vectors: np.ndarray) -> None:
+        if self._index is None:
+            self._index = VectorIndex(vectors.shape[1])
+        self._index.add(vectors)
+        for record in records:
+            self.records.append(record)
+            self._namespaces.append(record.namespace)
+            self._seen.add(self._key(record.namespace, record.text))
+
+    def _merge(self, records: List[MemoryRecord], vectors: Sequence[np.ndarray]) -> None:
+        """_append the records not already held (call with self._lock held)."""
+        keep = []
+        for i, record in enumerate(records):
+            key = self._key(record.namespace, record.text)
+            if key not in self._seen:
+                self._seen.add(key)
+                keep.append(i)
+        if keep:
+            self._append([records[i] for i in keep], np.stack([vectors[i] for i in keep]))
+
+    def remember(self, text: str, namespace: str, kind: Optional[str] = None, **metadata) -> bool:
+        """Store a memory; returns False (and stores nothing) if the namespace already has this text."""
+        text = text.strip()
+        if not text:
+            return False
+        with self._lock:
+            if self._key(namespace, text) in self._seen:
+                return False
+        record = MemoryRecord(text, namespace, kind or ("fact" if is_fact(text) else "turn"), metadata=metadata)
+        vectors = self._embed([text])
+        with self._lock:
+            if self._key(namespace, text) in self._seen:
+                return False
+            self._append([record], vectors)
+        if self.path:
+            self._journal(record, vectors[0])
+        return True
+
+    def recall(self, query: str, namespace: str, k: int = 4, min_score: float = 0.15) -> List[Tuple[MemoryRecord, float]]:
+        """Up to k memories of `namespace` most similar to `query`, best first, scoring at least `min_score`."""
+        if not query.strip():
+            return []
+        query_vector = np.asarray(self.embedder.embed_query(query), dtype=np.float32)
+        with self._lock:
+            if self._index is None:
+                return []
+            mask = np.asarray(self._namespaces) == namespace
+            bonus = np.fromiter((self.fact_bonus if r.kind == "fact" else 0.0 for r in self.records),
+                                dtype=np.float32, count=len(self.records))
+            hits = self._index.search(query_vector, k, mask=mask, bonus=bonus)
+            return [(self.records[row], score) for row, score in hits if score >= min_score]
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _journal(self, record: MemoryRecord, vector: np.ndarray) -> None:
+        """Append one memory to the journal, as one line with its vector."""
+        data = asdict(record)
+        data["vector"] = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+        line = (json.dumps(data) + "\n").encode("utf-8")
+        with self._file_lock(), open(os.path.join(self.path, "journal.jsonl"), "a+b") as f:
+            # Start on a fresh line if an earlier append was cut short.
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+
+    def _read_journal(self) -> Tuple[List[MemoryRecord], List[np.ndarray]]:
+        records, vectors = [], []
+        try:
+            f = open(os.path.join(self.path, "journal.jsonl"), encoding="utf-8")
+        except FileNotFoundError:
+            return records, vectors
+        with f:
+            for line in f:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash mid-append.
+                    logger.warning("Skipping a partial line in the memory journal at %s", self.path)
+                    continue
+                vectors.append(np.frombuffer(base64.b64decode(data.pop("vector")), dtype=np.float32))
+                records.append(MemoryRecord(**data))
+        return records, vectors
+
+    def save(self) -> None:
+        """
+        Compact: write every memory (this process's and any other process's journaled ones) to
+        the snapshot and empty the journal.
+        """
+        if not self.path:
+            raise ValueError("LongTermMemory has no path to save to")
+        with self._file_lock():
+            journaled = self._read_journal()
+            with self._lock:
+                self._merge(*journaled)
+                records = list(self.records)
+                vectors = self._index.vectors.copy() if self._index is not None else np.zeros((0, 0), dtype=np.float32)
+            # Write to temp files and rename, so a crash leaves the old snapshot and the journal.
+            tmp_path = os.path.join(self.path, "vectors.npy.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, vectors)
+            os.replace(tmp_path, os.path.join(self.path, "vectors.npy"))
+            tmp_path = os.path.join(self.path, "records.jsonl.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(asdict(record)) + "\n")
+            os.replace(tmp_path, os.path.join(self.path, "records.jsonl"))
+            open(os.path.join(self.path, "journal.jsonl"), "w").close()
+
+    def load(self) -> None:
+        """Replace what is held with the snapshot plus the journal."""
+        records: List[MemoryRecord] = []
+        vectors: List[np.ndarray] = []
+        with self._file_lock():
+            if os.path.exists(os.path.join(self.path, "records.jsonl")):
+                with open(os.path.join(self.path, "records.jsonl"), encoding="utf-8") as f:
+                    records = [MemoryRecord(**json.loads(line)) for line in f if line.strip()]
+                vectors = list(np.load(os.path.join(self.path, "vectors.npy")))
+                if len(records) != len(vectors):
+                    raise ValueError(f"Memory at {self.path} is inconsistent: {len(records)} records, {len(vectors)} vectors")
+            journaled_records, journaled_vectors = self._read_journal()
+        with self._lock:
+            self.records, self._namespaces, self._seen, self._index = [], [], set(), None
+            self._merge(records + journaled_records, vectors + journaled_vectors)
+
+
+# ------------------------------------------------------------------------------
+# Graph helpers
+# ------------------------------------------------------------------------------
+
+@lazy_resource
+def get_memory() -> LongTermMemory:
+    """The process-wide memory shared by the agents; persisted under $AGENT_MEMORY_DIR if set."""
+    return LongTermMemory(path=os.getenv("AGENT_MEMORY_DIR"))
+
+
+def namespace_from_config(config: Optional[Dict[str, Any]]) -> str:
+    configurable = (config or {}).get("configurable", {})
+    return str(configurable.get("user_id") or configurable.get("thread_id") or "default")
+
+
+def _last_human_text(messages: Sequence[Any]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else ""
+        if isinstance(message, tuple) and message[0] in ("user", "human"):
+            return str(message[1])
+        if isinstance(message, dict) and message.get("role") in ("user", "human"):
+            return str(message.get("content", ""))
+    return ""
+
+
+def recall_messages(memory: Optional[LongTermMemory], messages: Sequence[Any], config: Optional[Dict[str, Any]] = None,
+                    k: int = 4) -> List[Any]:
+    """
+    The retrieval step before a model call. It remembers the latest human message (stored once),
+    recalls the k memories most relevant to it from earlier turns, and returns `messages` with
+    those memories as a system message placed just before that human message. Returns `messages`
+    unchanged when nothing relevant is found.
+    """
+    messages = list(messages)
+    query = _last_human_text(messages)
+    if memory is None or not query:
+        return messages
+    namespace = namespace_from_config(config)
+    hits = [(r, s) for r, s in memory.recall(query, namespace, k=k + 1) if r.text != query.strip()][:k]
+    memory.remember(query, namespace)
+    if not hits:
+        return messages
+    lines = "\n".join(f"- ({record.kind}) {record.text}" for record, _ in hits)
+    note = SystemMessage(content=f"Relevant things the user said in earlier conversations:\n{lines}")
+    position = max(i for i, m in enumerate(messages) if _last_human_text([m]))
+    return messages[:position] + [note] + messages[position:]
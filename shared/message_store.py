@@ -0,0 +1,208 @@
+"""
+Content-Addressed Message Store
+Stores each distinct message body once, keyed by its SHA-256 digest.
+
+Long system prompts and repeated messages are otherwise copied into every checkpoint of every
+thread. InterningSerializer wraps a checkpoint serializer so that message bodies above a size
+threshold are swapped for a short hash reference before serialization and restored (as one
+shared string object) on load.
+
+Every reference the serializer writes holds a count on its body. A checkpointer that tells the
+serializer what it drops (BoundedMemorySaver calls `release` on pruned checkpoints and deleted
+threads) lets the store forget bodies nothing refers to any more, so the store stays as large as
+the live checkpoints rather than growing for the life of the process.
+
+Example usage:
+    memory = interning_saver(keep_last=20)
+    graph = graph_builder.compile(checkpointer=memory)
+    print(memory.serde.store.stats())
+"""
+
+import os
+import re
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from shared.checkpoint import BoundedMemorySaver
+
+logger = logging.getLogger(__name__)
+
+# Marker for a message body that lives in the store. The NUL byte keeps it from colliding with real text.
+REF_PREFIX = "\x00msgref:sha256:"
+# A reference inside serialized bytes: raw in msgpack, escaped if the serializer fell back to JSON.
+_REF_PATTERN = re.compile(rb"(?:\x00|\\u0000)msgref:sha256:([0-9a-f]{64})")
+
+
+def content_digest(content: str) -> str:
+    """Return the hex SHA-256 digest used as the key of a message body."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class MessageStore:
+    """
+    Stores message bodies once by content hash.
+
+    Bodies added with `acquire` are reference counted and dropped (from memory and `path`) when the
+    last reference is released. Bodies added with `put` are kept for the life of the store.
+
+    Args:
+        min_size: Bodies shorter than this (in characters) are left inline; a reference would not save anything.
+        path: Optional directory where bodies are also written, so references survive a restart.
+    """
+
+    def __init__(self, min_size: int = 256, path: Optional[str] = None):
+        self.min_size = min_size
+        self.path = path
+        self._bodies: Dict[str, str] = {}
+        self._refs: Dict[str, int] = {}
+        self._hits = 0
+        self._released = 0
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def put(self, content: str, acquire: bool = False) -> str:
+        """Store a body (if not already stored) and return its digest. With `acquire`, also count a reference to it."""
+        digest = content_digest(content)
+        with self._lock:
+            if acquire:
+                self._refs[digest] = self._refs.get(digest, 0) + 1
+            if digest in self._bodies:
+                self._hits += 1
+                return digest
+            self._bodies[digest] = content
+        if self.path:
+            file_path = os.path.join(self.path, f"{digest}.txt")
+            if not os.path.exists(file_path):
+                with open(file_path, "w", encoding="utf-8") as f:
+                    f.write(content)
+        return digest
+
+    def acquire(self, content: str) -> str:
+        """Store a body and count one reference to it; the body is kept until every reference is released."""
+        return self.put(content, acquire=True)
+
+    def release(self, digests: Iterable[str]) -> None:
+        """Release one reference per digest, dropping bodies whose last reference went away."""
+        dropped = []
+        with self._lock:
+            for digest in digests:
+                count = self._refs.get(digest)
+                if count is None:
+                    continue
+                if count > 1:
+                    self._refs[digest] = count - 1
+                    continue
+                del self._refs[digest]
+                self._bodies.pop(digest, None)
+                self._released += 1
+                dropped.append(digest)
+        if self.path:
+            for digest in dropped:
+                try:
+                    os.remove(os.path.join(self.path, f"{digest}.txt"))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, digest: str) -> str:
+        """Return the stored body for a digest. Raises KeyError if it is unknown."""
+        body = self._bodies.get(digest)
+        if body is not None:
+            return body
+        if self.path:
+            file_path = os.path.join(self.path, f"{digest}.txt")
+            if os.path.exists(file_path):
+                with open(file_path, "r", encoding="utf-8") as f:
+                    body = f.read()
+                with self._lock:
+                    return self._bodies.setdefault(digest, body)
+        raise KeyError(f"Unknown message body {digest}")
+
+    def intern(self, content: str) -> str:
+        """Return the canonical string object for content, so identical bodies share memory."""
+        if len(content) < self.min_size:
+            return content
+        return self.get(self.put(content))
+
+    def stats(self) -> Dict[str, int]:
+        """Number of unique bodies, their total size in characters, deduplicated puts and released bodies."""
+        with self._lock:
+            return {
+                "unique_bodies": len(self._bodies),
+                "stored_chars": sum(len(b) for b in self._bodies.values()),
+                "dedup_hits": self._hits,
+                "released_bodies": self._released,
+            }
+
+
+# ------------------------------------------------------------------------------
+# Checkpoint serializer
+# ------------------------------------------------------------------------------
+
+class InterningSerializer(SerializerProtocol):
+    """
+    Serializer wrapper that replaces large message bodies with store references.
+
+    Args:
+        serde: The serializer that does the actual encoding. Defaults to JsonPlusSerializer.
+        store: The MessageStore holding the bodies. A private store is created if omitted.
+    """
+
+    def __init__(self, serde: Optional[SerializerProtocol] = None, store: Optional[MessageStore] = None):
+        self.serde = serde or JsonPlusSerializer()
+        self.store = store or MessageStore()
+
+    def _swap_out(self, obj: Any) -> Any:
+        if isinstance(obj, BaseMessage):
+            if isinstance(obj.content, str) and len(obj.content) >= self.store.min_size:
+                return obj.model_copy(update={"content": REF_PREFIX + self.store.acquire(obj.content)})
+            return obj
+        if isinstance(obj, list):
+            return [self._swap_out(o) for o in obj]
+        if isinstance(obj, tuple):
+            return tuple(self._swap_out(o) for o in obj)
+        if isinstance(obj, dict):
+            return {k: self._swap_out(v) for k, v in obj.items()}
+        return obj
+
+    def _swap_in(self, obj: Any) -> Any:
+        if isinstance(obj, BaseMessage):
+            if isinstance(obj.content, str) and obj.content.startswith(REF_PREFIX):
+                obj.content = self.store.get(obj.content[len(REF_PREFIX):])
+            return obj
+        if isinstance(obj, list):
+            return [self._swap_in(o) for o in obj]
+        if isinstance(obj, tuple):
+            return tuple(self._swap_in(o) for o in obj)
+        if isinstance(obj, dict):
+            return {k: self._swap_in(v) for k, v in obj.items()}
+        return obj
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(self._swap_out(obj))
+
+    def loads(self, data: bytes) -> Any:
+        return self._swap_in(self.serde.loads(data))
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        return self.serde.dumps_typed(self._swap_out(obj))
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        return self._swap_in(self.serde.loads_typed(data))
+
+    def release(self, data: Union[bytes, Tuple[str, bytes]]) -> None:
+        """Release the body references held by serialized data (from dumps or dumps_typed) that is being dropped."""
+        raw = data[1] if isinstance(data, tuple) else data
+        if isinstance(raw, (bytes, bytearray)) and b"msgref:sha256:" in raw:
+            self.store.release(d.decode("ascii") for d in _REF_PATTERN.findall(raw))
+
+
+def interning_saver(store: Optional[MessageStore] = None, serde: Optional[SerializerProtocol] = None, **kwargs) -> BoundedMemorySaver:
+    """A BoundedMemorySaver (with `kwargs`) whose serializer interns message bodies in `store`."""
+    return BoundedMemorySaver(serde=InterningSerializer(serde=serde, store=store), **kwargs)
@@ -0,0 +1,183 @@
+"""
+Plan DAG
+Runs a plan's steps as a dependency graph: independent steps fan out to parallel workers with
+LangGraph's Send, and each step's result is merged back into state.
+
+A plan is a list of PlanSteps, each with an id, a task, and the ids it depends on.
+`add_plan_executor` adds two nodes to a graph:
+    scheduler   picks the steps whose dependencies are all done and sends each to a worker
+                (at most `max_concurrency` per wave, longest remaining chain first)
+    worker      runs one step with its dependencies' results and writes {step_id: result}
+
+Workers of one wave run in the same superstep, in parallel, and then return to the scheduler. When
+every step has a result, the scheduler routes to `next_node`. A plan therefore finishes in roughly
+critical-path time (one wave per dependency level) instead of the sum of all its steps.
+
+The host state needs the plan (a Plan-like object or dict with `steps`) and a results dict with the
+`merge_results` reducer: `step_results: Annotated[Dict[str, Any], merge_results]`. A node that sets
+a new plan returns `step_results: reset_results()`, so steps of the new plan that reuse an id (s1,
+s2, ...) do not pick up the old plan's results.
+
+Example usage:
+    def planner(state):
+        return {"plan": make_plan(state), "step_results": reset_results()}
+
+    builder.add_edge("planner", "scheduler")
+    add_plan_executor(builder, run_step, max_concurrency=4, next_node="report")
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+from langgraph.graph import END
+from langgraph.types import Send
+
+logger = logging.getLogger(__name__)
+
+
+class PlanStep(BaseModel):
+    id: str = Field(..., description="Short unique id for the step, e.g. 's1'.")
+    task: str = Field(..., description="What this step should do.")
+    depends_on: List[str] = Field(default_factory=list, description="Ids of steps whose results this step needs.")
+
+
+RESET_RESULTS = "__reset__"
+
+
+def merge_results(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reducer for a results dict: an update's step ids replace existing ones, and an update with
+    RESET_RESULTS set replaces the whole dict.
+    """
+    if right is None:
+        return left or {}
+    if right.get(RESET_RESULTS):
+        return {k: v for k, v in right.items() if k != RESET_RESULTS}
+    return {**(left or {}), **right}
+
+
+def reset_results(results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """An update that clears the results (keeping `results`), for use with merge_results."""
+    return {RESET_RESULTS: True, **(results or {})}
+
+
+def steps_from_strings(steps: Sequence[str]) -> List[PlanStep]:
+    """Plain ordered steps become a chain: each depends on the one before it."""
+    return [PlanStep(id=f"s{i + 1}", task=task, depends_on=[f"s{i}"] if i else []) for i, task in enumerate(steps)]
+
+
+def validate_plan(steps: Sequence[PlanStep]) -> None:
+    """Raise ValueError for duplicate ids, unknown dependencies or cycles."""
+    ids = [s.id for s in steps]
+    duplicates = sorted({i for i in ids if ids.count(i) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate step ids: {duplicates}")
+    known = set(ids)
+    for step in steps:
+        unknown = [d for d in step.depends_on if d not in known]
+        if unknown:
+            raise ValueError(f"Step '{step.id}' depends on unknown steps: {unknown}")
+    # Kahn's algorithm: anything never freed is on a cycle.
+    waiting = {s.id: set(s.depends_on) for s in steps}
+    free = [i for i, deps in waiting.items() if not deps]
+    while free:
+        done = free.pop()
+        del waiting[done]
+        for other, deps in waiting.items():
+            if done in deps:
+                deps.discard(done)
+                if not deps:
+                    free.append(other)
+    cyclic = sorted(waiting)
+    if cyclic:
+        raise ValueError(f"Plan has a dependency cycle through: {cyclic}")
+
+
+def remaining_depth(steps: Sequence[PlanStep]) -> Dict[str, int]:
+    """Length of the longest chain of steps starting at each step (1 for a step nothing depends on)."""
+    dependents: Dict[str, List[str]] = {s.id: [] for s in steps}
+    for step in steps:
+        for dep in step.depends_on:
+            dependents[dep].append(step.id)
+    depth: Dict[str, int] = {}
+
+    def visit(step_id: str) -> int:
+        if step_id not in depth:
+            depth[step_id] = 1 + max((visit(d) for d in dependents[step_id]), default=0)
+        return depth[step_id]
+
+    for step in steps:
+        visit(step.id)
+    return depth
+
+
+def ready_steps(steps: Sequence[PlanStep], results: Dict[str, Any]) -> List[PlanStep]:
+    """Steps without a result whose dependencies all have one, longest remaining chain first."""
+    ready = [s for s in steps if s.id not in results and all(d in results for d in s.depends_on)]
+    depth = remaining_depth(steps)
+    return sorted(ready, key=lambda s: -depth[s.id])
+
+
+def _get(state: Any, key: str) -> Any:
+    return state.get(key) if isinstance(state, dict) else getattr(state, key, None)
+
+
+def _plan_steps(state: Any, plan_key: str) -> List[PlanStep]:
+    plan = _get(state, plan_key)
+    steps = _get(plan, "steps") if plan is not None else None
+    return [s if isinstance(s, PlanStep) else PlanStep.model_validate(s) for s in steps or []]
+
+
+def add_plan_executor(
+    builder,
+    worker: Callable[[PlanStep, Dict[str, Any]], Any],
+    *,
+    plan_key: str = "plan",
+    results_key: str = "step_results",
+    scheduler: str = "scheduler",
+    worker_node: str = "worker",
+    max_concurrency: int = 4,
+    next_node: str = END,
+) -> None:
+    """
+    Add the scheduler and worker nodes to `builder`. Route into `scheduler` once the plan is in state.
+
+    Args:
+        worker: callable(step, inputs) -> result, where inputs maps each dependency id to its result.
+            Runs in parallel with the other steps of its wave.
+        max_concurrency: Upper bound on steps sent out per wave.
+        next_node: Where to go once every step has a result.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    def schedule(state: Any) -> Dict[str, Any]:
+        validate_plan(_plan_steps(state, plan_key))
+        return {}
+
+    def dispatch(state: Any):
+        steps = _plan_steps(state, plan_key)
+        results = _get(state, results_key) or {}
+        ready = ready_steps(steps, results)
+        if not ready:
+            missing = [s.id for s in steps if s.id not in results]
+            if missing:
+                # validate_plan rules out cycles, so this only happens if results were removed.
+                raise RuntimeError(f"No runnable steps left; missing results for {missing}")
+            return next_node
+        wave = ready[:max_concurrency]
+        logger.debug("Dispatching %d of %d ready steps: %s", len(wave), len(ready), [s.id for s in wave])
+        return [
+            Send(worker_node, {"step": step.model_dump(), "inputs": {d: results[d] for d in step.depends_on}})
+            for step in wave
+        ]
+
+    def run_step(payload: Dict[str, Any]) -> Dict[str, Any]:
+        step = PlanStep.model_validate(payload["step"])
+        return {results_key: {step.id: worker(step, payload["inputs"])}}
+
+    builder.add_node(scheduler, schedule)
+    builder.add_node(worker_node, run_step)
+    builder.add_conditional_edges(scheduler, dispatch, [worker_node, next_node])
+    builder.add_edge(worker_node, scheduler)
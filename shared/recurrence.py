@@ -0,0 +1,325 @@
+"""
+Recurrence
+Lazy expansion of recurring events (RFC 5545 RRULE/EXDATE), bounded by a query window.
+
+A recurring event is one master with a rule such as "RRULE:FREQ=WEEKLY;BYDAY=MO,WE", which may
+have no end. `occurrences` is a generator over the instances that overlap [window_start,
+window_end). It starts at the window rather than at DTSTART where the rule allows it (no COUNT, or
+a DAILY/WEEKLY rule), and stops at the window end, so the cost depends on the window and not on
+the length of the series. Conflict checks and free-slot computations pull interval arrays for one
+window from it (`busy_intervals`) and never build the whole series.
+
+Supported: FREQ=DAILY/WEEKLY/MONTHLY/YEARLY, INTERVAL, COUNT, UNTIL, BYDAY (weekdays, with
+ordinals like 2TU or -1FR for MONTHLY), BYMONTHDAY (MONTHLY), and EXDATE lines. This covers what
+calendar UIs generate. Instances moved or cancelled on their own (Google's separate items with
+recurringEventId/originalStartTime) replace the master's instance (`split_exceptions`). Other parts raise ValueError. Times repeat in the event's own time zone,
+so "every Monday at 9:00" stays at 9:00 across DST changes.
+
+Example usage:
+    rule = Recurrence.parse(["RRULE:FREQ=WEEKLY;BYDAY=MO"], tz="America/Denver")
+    for start, end in occurrences(rule, dtstart, timedelta(hours=1), window_start, window_end):
+        ...
+"""
+
+import heapq
+import logging
+import calendar as _calendar
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+SUPPORTED_PARTS = {"FREQ", "INTERVAL", "COUNT", "UNTIL", "BYDAY", "BYMONTHDAY", "WKST"}
+
+
+def _parse_datetime(value: str, tz: ZoneInfo) -> datetime:
+    """An iCalendar DATE or DATE-TIME (UTC with a trailing Z, otherwise local to `tz`)."""
+    if len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d").replace(tzinfo=tz)
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    return datetime.strptime(value, "%Y%m%dT%H%M%S").replace(tzinfo=tz)
+
+
+@dataclass(frozen=True)
+class Recurrence:
+    """A parsed RRULE plus its EXDATEs."""
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    byday: Tuple[Tuple[int, int], ...] = ()          # (ordinal or 0, weekday 0=Monday)
+    bymonthday: Tuple[int, ...] = ()
+    exdates: FrozenSet[datetime] = field(default_factory=frozenset)
+
+    @classmethod
+    def parse(cls, lines: Sequence[str], tz: str = "UTC") -> "Recurrence":
+        """Parse a Google-style `recurrence` list: one RRULE line and any EXDATE lines."""
+        zone = ZoneInfo(tz)
+        rule: Optional[Dict[str, str]] = None
+        exdates = set()
+        for line in lines:
+            name, _, value = line.strip().partition(":")
+            params = name.split(";")
+            if params[0].upper() == "RRULE":
+                if rule is not None:
+                    raise ValueError("Only one RRULE per event is supported")
+                rule = dict(part.split("=", 1) for part in value.upper().split(";") if part)
+            elif params[0].upper() == "EXDATE":
+                tzid = next((p.split("=", 1)[1] for p in params[1:] if p.upper().startswith("TZID=")), None)
+                for item in value.split(","):
+                    exdates.add(_parse_datetime(item.strip(), ZoneInfo(tzid) if tzid else zone))
+            elif params[0].upper() in ("RDATE", "EXRULE"):
+                raise ValueError(f"{params[0]} is not supported")
+        if rule is None:
+            raise ValueError("No RRULE line")
+        unknown = set(rule) - SUPPORTED_PARTS
+        if unknown:
+            raise ValueError(f"Unsupported RRULE parts: {sorted(unknown)}")
+        freq = rule.get("FREQ")
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported FREQ {freq!r}")
+        byday = []
+        for item in filter(None, rule.get("BYDAY", "").split(",")):
+            ordinal, day = item[:-2], item[-2:]
+            if day not in WEEKDAYS:
+                raise ValueError(f"Bad BYDAY value {item!r}")
+            if ordinal and freq != "MONTHLY":
+                raise ValueError("BYDAY ordinals are only supported with FREQ=MONTHLY")
+            byday.append((int(ordinal) if ordinal else 0, WEEKDAYS.index(day)))
+        if byday and freq in ("DAILY", "YEARLY"):
+            raise ValueError(f"BYDAY is not supported with FREQ={freq}")
+        bymonthday = tuple(int(d) for d in filter(None, rule.get("BYMONTHDAY", "").split(",")))
+        if bymonthday and freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY is only supported with FREQ=MONTHLY")
+        if bymonthday and byday:
+            raise ValueError("BYMONTHDAY together with BYDAY is not supported")
+        if "COUNT" in rule and "UNTIL" in rule:
+            raise ValueError("COUNT and UNTIL cannot both be set")
+        interval = int(rule.get("INTERVAL", 1))
+        if interval < 1:
+            raise ValueError("INTERVAL must be at least 1")
+        return cls(
+            freq=freq,
+            interval=interval,
+            count=int(rule["COUNT"]) if "COUNT" in rule else None,
+            until=_parse_datetime(rule["UNTIL"], zone) if "UNTIL" in rule else None,
+            byday=tuple(byday),
+            bymonthday=bymonthday,
+            exdates=frozenset(exdates),
+        )
+
+    def to_lines(self) -> List[str]:
+        """The RRULE (and EXDATE, in UTC) lines for a Google Calendar `recurrence` field."""
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(f"{o or ''}{WEEKDAYS[d]}" for o, d in self.byday))
+        if self.bymonthday:
+            parts.append("BYMONTHDAY=" + ",".join(map(str, self.bymonthday)))
+        lines = ["RRULE:" + ";".join(parts)]
+        if self.exdates:
+            lines.append("EXDATE:" + ",".join(f"{d.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}" for d in sorted(self.exdates)))
+        return lines
+
+
+# ------------------------------------------------------------------------------
+# Expansion
+# ------------------------------------------------------------------------------
+
+def _add_months(d: date, months: int) -> Tuple[int, int]:
+    total = d.year * 12 + d.month - 1 + months
+    return total // 12, total % 12 + 1
+
+
+def _period_dates(rule: Recurrence, first: date, k: int) -> List[date]:
+    """Candidate dates of the k-th period (day, week, month or year) after the one holding `first`, sorted."""
+    step = k * rule.interval
+    if rule.freq == "DAILY":
+        return [first + timedelta(days=step)]
+    if rule.freq == "WEEKLY":
+        monday = first - timedelta(days=first.weekday()) + timedelta(weeks=step)
+        days = sorted({d for _, d in rule.byday}) or [first.weekday()]
+        return [monday + timedelta(days=d) for d in days]
+    if rule.freq == "MONTHLY":
+        year, month = _add_months(first, step)
+        length = _calendar.monthrange(year, month)[1]
+        if rule.byday:
+            found = set()
+            for ordinal, weekday in rule.byday:
+                matching = [d for d in range(1, length + 1) if _calendar.weekday(year, month, d) == weekday]
+                if ordinal == 0:
+                    found.update(matching)
+                elif -len(matching) <= ordinal <= len(matching) and ordinal != 0:
+                    found.add(matching[ordinal - 1 if ordinal > 0 else ordinal])
+            return [date(year, month, d) for d in sorted(found)]
+        days = rule.bymonthday or (first.day,)
+        resolved = sorted({d if d > 0 else length + d + 1 for d in days})
+        return [date(year, month, d) for d in resolved if 1 <= d <= length]
+    # YEARLY: the same month and day; Feb 29 only recurs in leap years.
+    year = first.year + step
+    if first.month == 2 and first.day == 29 and not _calendar.isleap(year):
+        return []
+    return [date(year, first.month, first.day)]
+
+
+def _first_period(rule: Recurrence, dtstart: datetime, window_start: Optional[datetime]) -> int:
+    """
+    Index of the first period that can hold an occurrence at or after `window_start`. Periods before
+    it are skipped without being generated, unless COUNT needs them counted (MONTHLY/YEARLY).
+    """
+    if window_start is None or window_start <= dtstart:
+        return 0
+    if rule.count is not None and rule.freq in ("MONTHLY", "YEARLY"):
+        return 0
+    first, target = dtstart.date(), window_start.astimezone(dtstart.tzinfo).date()
+    if rule.freq == "DAILY":
+        units = (target - first).days
+    elif rule.freq == "WEEKLY":
+        units = ((target - timedelta(days=target.weekday())) - (first - timedelta(days=first.weekday()))).days // 7
+    elif rule.freq == "MONTHLY":
+        units = (target.year - first.year) * 12 + target.month - first.month
+    else:
+        units = target.year - first.year
+    return max(0, units // rule.interval - 1)
+
+
+def _skipped_count(rule: Recurrence, dtstart: datetime, periods: int) -> int:
+    """Occurrences in the first `periods` periods (only needed, and only exact, for DAILY/WEEKLY)."""
+    if periods == 0:
+        return 0
+    per_period = len(_period_dates(rule, dtstart.date(), 0))
+    in_first = sum(1 for d in _period_dates(rule, dtstart.date(), 0) if d >= dtstart.date())
+    return in_first + (periods - 1) * per_period
+
+
+def occurrences(
+    rule: Recurrence,
+    dtstart: datetime,
+    duration: timedelta,
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Yield (start, end) of each instance overlapping [window_start, window_end), in order. `dtstart`
+    must be timezone-aware; instances keep its wall-clock time in its time zone. Without
+    `window_end` the generator only ends with COUNT or UNTIL.
+    """
+    if dtstart.tzinfo is None:
+        raise ValueError("dtstart must be timezone-aware")
+    zone = dtstart.tzinfo
+    wall = dtstart.replace(tzinfo=None).time()
+    k = _first_period(rule, dtstart, window_start - duration if window_start is not None else None)
+    produced = _skipped_count(rule, dtstart, k) if rule.count is not None else 0
+    empty_periods = 0
+    while True:
+        dates = _period_dates(rule, dtstart.date(), k)
+        k += 1
+        # Guard against rules that can never match (e.g. BYMONTHDAY=31 with INTERVAL=2 from an odd month).
+        empty_periods = empty_periods + 1 if not dates else 0
+        if empty_periods > 100:
+            return
+        for day in dates:
+            start = datetime.combine(day, wall).replace(tzinfo=zone)
+            if start < dtstart:
+                continue
+            if rule.until is not None and start > rule.until:
+                return
+            if rule.count is not None:
+                if produced >= rule.count:
+                    return
+                produced += 1
+            if window_end is not None and start >= window_end:
+                return
+            end = start + duration
+            if window_start is not None and end <= window_start:
+                continue
+            if start in rule.exdates:
+                continue
+            yield start, end
+
+
+# ------------------------------------------------------------------------------
+# Google Calendar events
+# ------------------------------------------------------------------------------
+
+def _event_time(value: Dict[str, Any], tz: str) -> datetime:
+    if "dateTime" in value:
+        parsed = datetime.fromisoformat(value["dateTime"])
+        zone = ZoneInfo(value.get("timeZone") or tz)
+        # Recurring instances repeat in the event's zone, so express the start in it.
+        return parsed.replace(tzinfo=zone) if parsed.tzinfo is None else parsed.astimezone(zone)
+    return datetime.combine(date.fromisoformat(value["date"]), time()).replace(tzinfo=ZoneInfo(value.get("timeZone") or tz))
+
+
+def split_exceptions(events: Iterable[Dict[str, Any]], tz: str = "UTC") -> Tuple[List[Dict[str, Any]], Dict[str, FrozenSet[datetime]]]:
+    """
+    Separates a calendar listing into the events to expand and, per recurring master id, the
+    original start times of its instances that were changed or cancelled. Google stores such an
+    instance as its own item with `recurringEventId` and `originalStartTime` (not as an EXDATE on
+    the master): a moved one is kept as a single event, a cancelled one is dropped.
+    """
+    expand: List[Dict[str, Any]] = []
+    overridden: Dict[str, set] = {}
+    for event in events:
+        master = event.get("recurringEventId")
+        if master and event.get("originalStartTime"):
+            overridden.setdefault(master, set()).add(_event_time(event["originalStartTime"], tz))
+        if event.get("status") != "cancelled":
+            expand.append(event)
+    return expand, {master: frozenset(starts) for master, starts in overridden.items()}
+
+
+def event_occurrences(event: Dict[str, Any], window_start: datetime, window_end: datetime,
+                      tz: str = "UTC", overridden: FrozenSet[datetime] = frozenset()) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Instances of a Google Calendar event (single or recurring) that overlap the window. Instances
+    of a series starting at a time in `overridden` (see split_exceptions) are skipped.
+    """
+    if event.get("status") == "cancelled":
+        return
+    start = _event_time(event["start"], tz)
+    end = _event_time(event["end"], tz)
+    if not event.get("recurrence"):
+        if end > window_start and start < window_end:
+            yield start, end
+        return
+    rule = Recurrence.parse(event["recurrence"], tz=str(start.tzinfo))
+    for instance in occurrences(rule, start, end - start, window_start, window_end):
+        # Aware datetimes compare (and hash) by instant, so the zones need not match.
+        if instance[0] not in overridden:
+            yield instance
+
+
+def merged_occurrences(events: Iterable[Dict[str, Any]], window_start: datetime, window_end: datetime,
+                       tz: str = "UTC") -> Iterator[Tuple[datetime, datetime, Dict[str, Any]]]:
+    """All instances of `events` in the window, in start order (a lazy k-way merge), with exceptions applied."""
+    expand, overridden = split_exceptions(events, tz)
+
+    def tagged(event: Dict[str, Any]) -> Iterator[Tuple[datetime, datetime, Dict[str, Any]]]:
+        for start, end in event_occurrences(event, window_start, window_end, tz, overridden.get(event.get("id"), frozenset())):
+            yield start, end, event
+
+    return heapq.merge(*(tagged(event) for event in expand), key=lambda item: item[0])
+
+
+def busy_intervals(events: Iterable[Dict[str, Any]], window_start: datetime, window_end: datetime,
+                   tz: str = "UTC") -> Tuple[np.ndarray, np.ndarray]:
+    """Instances in the window (exceptions applied) as (starts, ends) epoch-second arrays, for shared/intervals.py."""
+    expand, overridden = split_exceptions(events, tz)
+    flat = (int(t.timestamp()) for event in expand
+            for pair in event_occurrences(event, window_start, window_end, tz, overridden.get(event.get("id"), frozenset()))
+            for t in pair)
+    array = np.fromiter(flat, dtype=np.int64).reshape(-1, 2)
+    return array[:, 0].copy(), array[:, 1].copy()
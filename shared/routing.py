@@ -0,0 +1,135 @@
+"""
+Routing
+Declarative routers for conditional edges, compiled once into dispatch tables.
+
+Most graphs here route from the agent node the same way: look at the first tool call of the last
+message and pick a node by its name, perhaps differently while some form is still incomplete.
+A Router states that as data. It holds an ordered list of Cases, each with an optional state
+predicate and a table from tool name to target node. Each Case is compiled once into a dict, so
+routing a step is one read of the last message plus a lookup per case.
+
+Routers are callable like the should_continue functions they replace. `add_to` checks that every
+target is a node of the graph (or END) before adding the conditional edge with a path map, so a
+typo fails when the graph is built rather than mid-run.
+
+Example usage:
+    should_continue = Router(
+        Case(when=missing_fields("event_data", "topic", "start_time"),
+             tools={"AskHuman": "ask_human"}, default="ask_missing_field"),
+        Case(tools={"create_calendar_event": "confirm"}, no_tool=END),
+        name="should_continue",
+    )
+    should_continue.add_to(workflow, "agent", guard=True)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from langgraph.graph import END
+
+from shared.budget import BUDGET_NODE, guard_router
+
+logger = logging.getLogger(__name__)
+
+# Dispatch keys for "no tool call" and "a tool not named in the table".
+NO_TOOL = object()
+OTHER_TOOL = object()
+
+
+@dataclass(frozen=True)
+class Case:
+    """
+    One routing case. It applies when `when(state)` is true (always, if None) and it has a target
+    for the last message: `tools[name]` for its first tool call, `no_tool` when it has none,
+    `other_tool` for unlisted tools, and `default` for anything not covered. When it has no target,
+    the next case is tried.
+    """
+    when: Optional[Callable[[Any], bool]] = None
+    tools: Mapping[str, str] = field(default_factory=dict)
+    no_tool: Optional[str] = None
+    other_tool: Optional[str] = None
+    default: Optional[str] = None
+
+    def table(self) -> Dict[Any, str]:
+        table = {name: target for name, target in self.tools.items()}
+        for key, target in ((NO_TOOL, self.no_tool), (OTHER_TOOL, self.other_tool)):
+            if target or self.default:
+                table[key] = target or self.default
+        return table
+
+
+def missing_fields(key: str, *fields: str) -> Callable[[Any], bool]:
+    """Predicate: some of `fields` are missing or empty in the dict at state[key]."""
+    def predicate(state: Any) -> bool:
+        values = _get(state, key) or {}
+        return any(not values.get(f) for f in fields)
+    predicate.__name__ = f"missing_{key}"
+    return predicate
+
+
+def _get(state: Any, key: str) -> Any:
+    return state.get(key) if isinstance(state, dict) else getattr(state, key, None)
+
+
+class Router:
+    """
+    Args:
+        *cases: Cases in priority order.
+        message_key: State key holding the messages.
+        name: Used as the function name (graph drawings label the edge with it).
+    """
+
+    def __init__(self, *cases: Case, message_key: str = "messages", name: str = "route"):
+        if not cases:
+            raise ValueError("Router needs at least one Case")
+        self.cases = cases
+        self.message_key = message_key
+        self.__name__ = name
+        self._compiled: List[Tuple[Optional[Callable[[Any], bool]], Dict[Any, str]]] = [
+            (case.when, case.table()) for case in cases
+        ]
+
+    def _tool_key(self, state: Any) -> Any:
+        messages = _get(state, self.message_key)
+        if not messages:
+            return NO_TOOL
+        tool_calls = getattr(messages[-1], "tool_calls", None)
+        return tool_calls[0]["name"] if tool_calls else NO_TOOL
+
+    def __call__(self, state: Any) -> str:
+        key = self._tool_key(state)
+        for when, table in self._compiled:
+            if when is not None and not when(state):
+                continue
+            target = table.get(key)
+            if target is None and key is not NO_TOOL:
+                target = table.get(OTHER_TOOL)
+            if target is not None:
+                return target
+        tool = "no tool call" if key is NO_TOOL else f"tool call '{key}'"
+        raise ValueError(f"Router '{self.__name__}' has no route for {tool}")
+
+    def targets(self) -> Set[str]:
+        return {target for _, table in self._compiled for target in table.values()}
+
+    def validate(self, nodes: Iterable[str]) -> None:
+        """Raise ValueError if any target is neither one of `nodes` nor END."""
+        unknown = self.targets() - set(nodes) - {END}
+        if unknown:
+            raise ValueError(f"Router '{self.__name__}' routes to unknown nodes: {sorted(unknown)}")
+
+    def add_to(self, builder, source: str, guard: bool = False) -> None:
+        """
+        Validate against the builder's nodes and add the conditional edge from `source` with a path
+        map. With guard=True the router is wrapped with shared.budget.guard_router, and the
+        budget_exceeded node (which must already be added) joins the path map.
+        """
+        self.validate(builder.nodes)
+        targets = self.targets()
+        path = guard_router(self) if guard else self
+        if guard:
+            if BUDGET_NODE not in builder.nodes:
+                raise ValueError(f"guard=True needs the '{BUDGET_NODE}' node in the graph")
+            targets.add(BUDGET_NODE)
+        builder.add_conditional_edges(source, path, {t: t for t in sorted(targets)})
@@ -0,0 +1,251 @@
+"""
+Search Result Store
+Keeps web search results out of the message history.
+
+The Tavily tool is configured with include_raw_content=True, so every search used to put up to five
+whole web pages into a ToolMessage. There they were checkpointed and re-sent to the model on every
+later turn. With the store:
+    - results are cached by normalized query, with a TTL, so repeated searches cost nothing
+    - full documents stay in the store, under a short ref ("search:1a2b3c4d5e6f")
+    - the ToolMessage gets, per result, its ref, url, title and the passages most relevant to the
+      query (BM25-ranked), all within a token budget
+
+A node that needs a whole document can call `store.document(ref)`.
+
+Example usage:
+    store = SearchResultStore(ttl_s=3600)
+    search_tool = cached_search_tool(TavilySearchResults(max_results=5, include_raw_content=True), store)
+    ToolNode([search_tool])
+"""
+
+import re
+import math
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it of on or that the this to was what when where which who why will with".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.casefold()) if w not in _STOPWORDS]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query: its words in order, case-folded, without punctuation or extra whitespace,
+    so "Weather in Lisbon?" and "weather  in lisbon" share an entry. Word order and small words are
+    kept, since they can change the meaning ("flights from Boston to Denver" is not the reverse trip).
+    """
+    return " ".join(_WORD.findall(query.casefold())) or query.strip().casefold()
+
+
+# ------------------------------------------------------------------------------
+# Excerpts
+# ------------------------------------------------------------------------------
+
+def split_passages(text: str, max_words: int = 80) -> List[str]:
+    """Paragraphs (by line breaks), with long ones cut into windows of at most `max_words` words."""
+    passages = []
+    for paragraph in re.split(r"\n\s*\n|\n", text):
+        words = paragraph.split()
+        for i in range(0, len(words), max_words):
+            passages.append(" ".join(words[i:i + max_words]))
+    return [p for p in passages if p]
+
+
+def excerpt(text: str, query: str, token_budget: int, k1: float = 1.2, b: float = 0.75) -> str:
+    """
+    The passages of `text` most relevant to `query` (BM25 over the document's own passages), kept in
+    document order and joined with " ... ", within `token_budget`. Falls back to the opening passages
+    when nothing matches.
+    """
+    passages = split_passages(text)
+    if not passages:
+        return ""
+    query_terms = set(_terms(query))
+    tokenized = [_terms(p) for p in passages]
+    avg_len = sum(len(t) for t in tokenized) / len(tokenized) or 1.0
+    df = Counter(term for terms in tokenized for term in set(terms) & query_terms)
+    n = len(passages)
+
+    def score(terms: List[str]) -> float:
+        tf = Counter(terms)
+        total = 0.0
+        for term in query_terms:
+            if tf[term]:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                total += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(terms) / avg_len))
+        return total
+
+    ranked = sorted(range(n), key=lambda i: (-score(tokenized[i]), i))
+    chosen, used = [], 0
+    for i in ranked:
+        cost = estimate_tokens(passages[i]) + 1
+        if used + cost > token_budget:
+            if not chosen and token_budget > 0:
+                # Not even one passage fits: take the top one, cut to the budget.
+                chosen.append(i)
+                passages[i] = passages[i][: token_budget * 4]
+            continue
+        chosen.append(i)
+        used += cost
+    return " ... ".join(passages[i] for i in sorted(chosen))
+
+
+# ------------------------------------------------------------------------------
+# Store
+# ------------------------------------------------------------------------------
+
+@dataclass
+class SearchDocument:
+    ref: str
+    url: str
+    title: str
+    content: str
+    score: Optional[float] = None
+
+
+class SearchResultStore:
+    """
+    In-process cache of search results and store of the full documents.
+
+    Args:
+        ttl_s: How long a cached query stays fresh.
+        max_queries: Queries kept (least recently used are dropped first).
+        max_documents: Documents kept (least recently used are dropped first).
+    """
+
+    def __init__(self, ttl_s: float = 3600.0, max_queries: int = 512, max_documents: int = 2048):
+        self.ttl_s = ttl_s
+        self.max_queries = max_queries
+        self.max_documents = max_documents
+        self._queries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._documents: "OrderedDict[str, SearchDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def ref_for(url: str, content: str) -> str:
+        return "search:" + hashlib.sha1(f"{url}\n{content}".encode("utf-8")).hexdigest()[:12]
+
+    def get(self, query: str, now: Optional[float] = None) -> Optional[List[SearchDocument]]:
+        """Cached documents for the query, or None if it was never stored, has expired or lost a document."""
+        key = normalize_query(query)
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is None or now - entry[0] > self.ttl_s:
+                self._queries.pop(key, None)
+                self.misses += 1
+                return None
+            docs = [self._documents.get(ref) for ref in entry[1]]
+            if any(d is None for d in docs):
+                del self._queries[key]
+                self.misses += 1
+                return None
+            self._queries.move_to_end(key)
+            for ref in entry[1]:
+                self._documents.move_to_end(ref)
+            self.hits += 1
+            return docs
+
+    def put(self, query: str, results: List[Dict[str, Any]], now: Optional[float] = None) -> List[SearchDocument]:
+        """Store raw search results (dicts with url, title, content and/or raw_content) for the query."""
+        docs = []
+        for result in results:
+            url = str(result.get("url", ""))
+            # Prefer the full page; the excerpts are cut from it later.
+            content = str(result.get("raw_content") or result.get("content") or "")
+            docs.append(SearchDocument(self.ref_for(url, content), url, str(result.get("title") or url), content,
+                                       result.get("score")))
+        with self._lock:
+            for doc in docs:
+                self._documents[doc.ref] = doc
+                self._documents.move_to_end(doc.ref)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+            self._queries[normalize_query(query)] = (time.time() if now is None else now, [d.ref for d in docs])
+            self._queries.move_to_end(normalize_query(query))
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return docs
+
+    def document(self, ref: str) -> Optional[SearchDocument]:
+        with self._lock:
+            return self._documents.get(ref)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"queries": len(self._queries), "documents": len(self._documents), "hits": self.hits, "misses": self.misses}
+
+
+# ------------------------------------------------------------------------------
+# Tool
+# ------------------------------------------------------------------------------
+
+def raw_search_results(search: BaseTool, query: str) -> Any:
+    """
+    The full results of a search tool for `query`. A tool with response_format="content_and_artifact"
+    (TavilySearchResults) puts only url and snippet in its content; the pages, titles and scores are
+    in the artifact, so it is invoked with a tool call to get `artifact["results"]`. Errors come back
+    as the tool's string content.
+    """
+    if getattr(search, "response_format", None) != "content_and_artifact":
+        return search.invoke({"query": query})
+    message = search.invoke({"name": search.name, "args": {"query": query},
+                             "id": f"search_{uuid.uuid4().hex[:12]}", "type": "tool_call"})
+    artifact = message.artifact if isinstance(message.artifact, dict) else {}
+    return artifact["results"] if "results" in artifact else message.content
+
+
+def cached_search_tool(
+    search: Any,
+    store: SearchResultStore,
+    token_budget: int = 1200,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+) -> BaseTool:
+    """
+    Wrap a search tool (or a callable(query) -> list of result dicts) so results go through `store`
+    and the tool returns [{"ref", "url", "title", "excerpt"}] within `token_budget` in total.
+    It keeps the wrapped tool's name and description, so prompts and routing are unchanged.
+    """
+    run_search: Callable[[str], Any] = (lambda q: raw_search_results(search, q)) if hasattr(search, "invoke") else search
+
+    def run(query: str):
+        docs = store.get(query)
+        if docs is None:
+            results = run_search(query)
+            if not isinstance(results, list):
+                # Errors come back as strings; pass them on without caching.
+                return results
+            docs = store.put(query, results)
+        if not docs:
+            return []
+        share = max(1, token_budget // len(docs))
+        return [{"ref": d.ref, "url": d.url, "title": d.title, "excerpt": excerpt(d.content, query, share)} for d in docs]
+
+    return StructuredTool.from_function(
+        func=run,
+        name=name or getattr(search, "name", "search"),
+        description=description or getattr(search, "description", None) or "Search the web. Returns excerpts and refs of the full results.",
+    )
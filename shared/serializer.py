@@ -0,0 +1,292 @@
+"""
+Compact Checkpoint Serializer
+A pluggable serializer for checkpointers that stores channel values as compressed binary frames.
+
+- Values are encoded with the wrapped serializer (msgpack for the langgraph default) and compressed
+  with zstandard when it is installed, otherwise with zlib. Both support a dictionary trained on
+  sample checkpoints, which helps a lot for the small, repetitive payloads of message-heavy threads
+  (tool-call dicts, Tavily results, prompts).
+- List channels such as `messages` are written as one frame per element and loaded as a LazyList,
+  so `graph.get_state(thread).values["messages"][-1]` decodes one message, not the whole history.
+
+Example usage:
+    serde = CompactSerializer()
+    serde.train(sample_values)              # optional
+    memory = BoundedMemorySaver(serde=serde)
+
+To combine with the message store, wrap it inside (so interning also happens per frame):
+    CompactSerializer(serde=InterningSerializer(store=store))
+"""
+
+import zlib
+import struct
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# Optional dependency: zstandard gives better ratios and real dictionary training.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+LAZY_LIST = "lazylist"
+_LEN = struct.Struct("<I")
+
+
+# ------------------------------------------------------------------------------
+# Lazy list
+# ------------------------------------------------------------------------------
+
+class _Frame:
+    """An element of a LazyList that has not been decoded yet."""
+    __slots__ = ("typed",)
+
+    def __init__(self, typed: Tuple[str, bytes]):
+        self.typed = typed
+
+
+class LazyList(list):
+    """
+    A list whose elements are decoded on first access.
+
+    Indexing and iteration decode only what they touch. Any other list operation (copy, +, ==,
+    sort, pickling, ...) decodes every element first and then behaves like a plain list.
+    """
+
+    def __init__(self, frames: Iterable[_Frame], serde: SerializerProtocol):
+        super().__init__(frames)
+        self._serde = serde
+        self._pending = len(self)
+
+    def _decode(self, index: int) -> Any:
+        item = list.__getitem__(self, index)
+        if type(item) is _Frame:
+            item = self._serde.loads_typed(item.typed)
+            list.__setitem__(self, index, item)
+            self._pending -= 1
+        return item
+
+    def _decode_all(self) -> None:
+        if self._pending:
+            for i in range(len(self)):
+                self._decode(i)
+
+    @property
+    def decoded(self) -> int:
+        """Number of elements decoded so far."""
+        return len(self) - self._pending
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(i) for i in range(*index.indices(len(self)))]
+        return self._decode(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._decode(i)
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self._decode(i)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._decode_all()
+        elif type(list.__getitem__(self, index)) is _Frame:
+            self._pending -= 1
+        list.__setitem__(self, index, value)
+
+    def __radd__(self, other):
+        self._decode_all()
+        return other + list(self)
+
+    def __repr__(self):
+        self._decode_all()
+        return list.__repr__(self)
+
+    def __copy__(self):
+        self._decode_all()
+        return list(self)
+
+    def __reduce_ex__(self, protocol):
+        self._decode_all()
+        return (list, (list(self),))
+
+
+def _eager(name: str):
+    def method(self, *args, **kwargs):
+        self._decode_all()
+        return getattr(list, name)(self, *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in (
+    "__contains__", "__eq__", "__ne__", "__lt__", "__le__", "__gt__", "__ge__",
+    "__add__", "__mul__", "__iadd__", "__imul__", "__delitem__",
+    "copy", "count", "index", "pop", "remove", "sort", "reverse", "insert",
+):
+    setattr(LazyList, _name, _eager(_name))
+del _name
+
+
+# ------------------------------------------------------------------------------
+# Compression
+# ------------------------------------------------------------------------------
+
+class _Codec:
+    """zstandard or zlib compression, optionally with a preset dictionary."""
+
+    def __init__(self, dictionary: Optional[bytes], level: int):
+        self.dictionary = dictionary
+        self.dict_id = hashlib.sha256(dictionary).hexdigest()[:12] if dictionary else ""
+        if zstandard is not None:
+            self.name = "zstd"
+            zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._compressor = zstandard.ZstdCompressor(level=level, dict_data=zdict)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+        else:
+            self.name = "zlib"
+            self._level = min(level, 9)
+
+    @property
+    def tag(self) -> str:
+        return f"{self.name}:{self.dict_id}" if self.dict_id else self.name
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._compressor.compress(data)
+        if self.dictionary:
+            c = zlib.compressobj(self._level, zdict=self.dictionary)
+            return c.compress(data) + c.flush()
+        return zlib.compress(data, self._level)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return self._decompressor.decompress(data)
+        if self.dictionary:
+            d = zlib.decompressobj(zdict=self.dictionary)
+            return d.decompress(data) + d.flush()
+        return zlib.decompress(data)
+
+
+# ------------------------------------------------------------------------------
+# Serializer
+# ------------------------------------------------------------------------------
+
+class CompactSerializer(SerializerProtocol):
+    """
+    Compressed, lazily decoded checkpoint serializer.
+
+    Args:
+        serde: Serializer used for individual values. Defaults to JsonPlusSerializer (msgpack).
+        level: Compression level.
+        min_compress_size: Payloads smaller than this are stored uncompressed.
+        dictionary: A previously trained dictionary (see `train` / `dictionary`).
+        lazy_lists: Encode list values frame-per-element and load them as LazyList.
+    """
+
+    def __init__(
+        self,
+        serde: Optional[SerializerProtocol] = None,
+        level: int = 3,
+        min_compress_size: int = 256,
+        dictionary: Optional[bytes] = None,
+        lazy_lists: bool = True,
+    ):
+        self.serde = serde or JsonPlusSerializer()
+        self.level = level
+        self.min_compress_size = min_compress_size
+        self.lazy_lists = lazy_lists
+        self._codecs: Dict[str, _Codec] = {}
+        self._codec = self._add_codec(dictionary)
+
+    def _add_codec(self, dictionary: Optional[bytes]) -> _Codec:
+        codec = _Codec(dictionary, self.level)
+        self._codecs[codec.tag] = codec
+        return codec
+
+    @property
+    def dictionary(self) -> Optional[bytes]:
+        """The active compression dictionary, so it can be saved and passed back in on restart."""
+        return self._codec.dictionary
+
+    def train(self, samples: List[Any], dict_size: int = 32 * 1024) -> bytes:
+        """
+        Train a compression dictionary from sample values (e.g. channel values of existing
+        checkpoints) and use it for all new writes. Older dictionaries stay registered so
+        previously written checkpoints still decode.
+        """
+        encoded = [self.serde.dumps_typed(s)[1] for s in samples]
+        dictionary = None
+        if zstandard is not None:
+            try:
+                dictionary = zstandard.train_dictionary(dict_size, encoded).as_bytes()
+            except zstandard.ZstdError as e:
+                logger.warning(f"zstd dictionary training failed ({e}); falling back to a raw sample dictionary")
+        if dictionary is None:
+            # A raw dictionary is just representative content; the most useful bytes go last.
+            dictionary = b"".join(encoded)[-dict_size:]
+        self._codec = self._add_codec(dictionary)
+        return dictionary
+
+    # -------------------------------
+    # Framing helpers
+    # -------------------------------
+    def _pack(self, items: List[Tuple[str, bytes]]) -> bytes:
+        parts = [_LEN.pack(len(items))]
+        for type_, data in items:
+            type_b = type_.encode("utf-8")
+            parts += [_LEN.pack(len(type_b)), type_b, _LEN.pack(len(data)), data]
+        return b"".join(parts)
+
+    def _unpack(self, data: bytes) -> List[Tuple[str, bytes]]:
+        view = memoryview(data)
+        (count,), offset = _LEN.unpack_from(view, 0), _LEN.size
+        items = []
+        for _ in range(count):
+            (n,) = _LEN.unpack_from(view, offset)
+            offset += _LEN.size
+            type_ = bytes(view[offset:offset + n]).decode("utf-8")
+            offset += n
+            (n,) = _LEN.unpack_from(view, offset)
+            offset += _LEN.size
+            items.append((type_, bytes(view[offset:offset + n])))
+            offset += n
+        return items
+
+    # -------------------------------
+    # SerializerProtocol
+    # -------------------------------
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if self.lazy_lists and type(obj) in (list, LazyList):
+            type_, data = LAZY_LIST, self._pack([self.serde.dumps_typed(o) for o in obj])
+        else:
+            type_, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_compress_size:
+            return type_, data
+        return f"{type_}+{self._codec.tag}", self._codec.compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if "+" in type_:
+            type_, tag = type_.split("+", 1)
+            codec = self._codecs.get(tag)
+            if codec is None:
+                raise ValueError(f"Unknown compression '{tag}'; pass the dictionary it was written with")
+            payload = codec.decompress(payload)
+        if type_ == LAZY_LIST:
+            return LazyList((_Frame(item) for item in self._unpack(payload)), self.serde)
+        return self.serde.loads_typed((type_, payload))
@@ -0,0 +1,515 @@
+"""
+Agent Service
+A small ASGI application that serves compiled graphs over HTTP, so the calendar agents can run as a
+service instead of `input()`-driven scripts. It is plain ASGI (no web framework dependency) and
+async end to end: every request awaits the graph's async API, so many sessions run concurrently on
+one event loop. Turns on the same thread are serialized with a per-thread lock.
+
+Endpoints (all bodies and responses are JSON):
+    POST /graphs/{graph}/threads                         start a thread, optional {"input": {...}}
+    POST /graphs/{graph}/threads/{thread_id}/messages    {"content": "..."} add a user message and run
+    POST /graphs/{graph}/threads/{thread_id}/resume      {"value": ...} resume an interrupt with Command(resume=...)
+    GET  /graphs/{graph}/threads/{thread_id}/state       current values, next nodes and pending interrupts
+    POST /graphs/{graph}/threads/{thread_id}/stream      {"content": ...} or {"resume": ...}; server-sent events
+
+With a HumanTaskQueue, interrupts are also parked as durable human tasks:
+    GET  /human-tasks                                    pending tasks, optional ?graph=...&thread_id=...
+    POST /human-tasks/{task_id}/answer                   {"value": ...} answer the task and resume its thread
+A background sweeper (every `sweep_interval_s`) expires overdue tasks and resumes answered tasks of
+this instance's graphs, including ones answered through another instance (those answers get a 202).
+Queue calls run in worker threads, off the event loop.
+
+Any run request may carry {"budget": {"max_llm_calls": ..., "max_tokens": ..., "max_seconds": ...,
+"max_repeats": ...}} to override the service's default run budget (see shared/budget.py).
+
+With a TimingCallbackHandler, every run is timed per node, LLM call and tool:
+    GET  /metrics                                        latency histograms in Prometheus text format
+/metrics also reports the schema tokens each Toolbox (shared/toolbox.py) bound and would have bound.
+
+Example usage:
+    app = create_app({"calendar": graph}, human_tasks=HumanTaskQueue("human_tasks.db"))
+    # Serve `app` with any ASGI server, e.g. uvicorn.run(app).
+
+Run from the command line (requires uvicorn):
+    python -m shared.service --graph some.module:build_graph --port 8000
+"""
+
+import re
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+import importlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from urllib.parse import parse_qs
+
+from langchain_core.messages import BaseMessage
+from langgraph.types import Command
+
+from shared.human_tasks import HumanTask, HumanTaskQueue
+from shared.timings import TimingCallbackHandler, with_timings
+from shared import toolbox
+from shared.budget import Budget, BudgetGuard, with_budget
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------
+# JSON helpers
+# -------------------------------
+def to_jsonable(obj: Any) -> Any:
+    """Convert graph values (messages, interrupts, pydantic models, ...) into JSON-compatible data."""
+    if isinstance(obj, BaseMessage):
+        data = {"type": obj.type, "content": obj.content, "id": obj.id}
+        if getattr(obj, "tool_calls", None):
+            data["tool_calls"] = obj.tool_calls
+        if getattr(obj, "name", None):
+            data["name"] = obj.name
+        if getattr(obj, "tool_call_id", None):
+            data["tool_call_id"] = obj.tool_call_id
+        return data
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if hasattr(obj, "model_dump"):
+        return to_jsonable(obj.model_dump())
+    if hasattr(obj, "value") and hasattr(obj, "resumable"):  # langgraph Interrupt
+        return {"value": to_jsonable(obj.value), "resumable": obj.resumable}
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+# -------------------------------
+# Application
+# -------------------------------
+class AgentService:
+    """
+    ASGI application serving a set of compiled graphs.
+
+    Args:
+        graphs: Graph name -> compiled graph. Graphs must have a checkpointer (threads and interrupts need one).
+        message_key: State key that user messages are appended to.
+        human_tasks: Optional queue that interrupts are parked in, so they can be answered later
+            (from any process sharing the queue and the checkpointer).
+        task_deadline_s: Deadline for parked tasks, in seconds from when they are created.
+        sweep_interval_s: Seconds between sweeps of the human task queue; None disables the sweeper.
+        expired_answer: Answer given to tasks that pass their deadline, so their threads move on
+            (e.g. "no"). None marks them expired and leaves the threads parked.
+        timings: Optional handler attached to every run, exported at GET /metrics.
+        budget: Default per-run budget for graphs wired with shared.budget.guard_router.
+    """
+
+    ROUTES = [
+        ("POST", re.compile(r"^/graphs/(?P<graph>[^/]+)/threads/?$"), "start_thread"),
+        ("POST", re.compile(r"^/graphs/(?P<graph>[^/]+)/threads/(?P<thread_id>[^/]+)/messages$"), "post_message"),
+        ("POST", re.compile(r"^/graphs/(?P<graph>[^/]+)/threads/(?P<thread_id>[^/]+)/resume$"), "resume"),
+        ("GET", re.compile(r"^/graphs/(?P<graph>[^/]+)/threads/(?P<thread_id>[^/]+)/state$"), "get_state"),
+        ("POST", re.compile(r"^/graphs/(?P<graph>[^/]+)/threads/(?P<thread_id>[^/]+)/stream$"), "stream"),
+        ("GET", re.compile(r"^/human-tasks/?$"), "list_human_tasks"),
+        ("POST", re.compile(r"^/human-tasks/(?P<task_id>[^/]+)/answer$"), "answer_human_task"),
+        ("GET", re.compile(r"^/metrics$"), "metrics"),
+    ]
+
+    def __init__(
+        self,
+        graphs: Dict[str, Any],
+        message_key: str = "messages",
+        human_tasks: Optional[HumanTaskQueue] = None,
+        task_deadline_s: Optional[float] = None,
+        timings: Optional[TimingCallbackHandler] = None,
+        budget: Optional[Budget] = None,
+        sweep_interval_s: Optional[float] = 5.0,
+        expired_answer: Any = None,
+    ):
+        for name, graph in graphs.items():
+            if getattr(graph, "checkpointer", None) is None:
+                raise ValueError(f"Graph '{name}' must be compiled with a checkpointer")
+        self.graphs = graphs
+        self.message_key = message_key
+        self.human_tasks = human_tasks
+        self.task_deadline_s = task_deadline_s
+        self.timings = timings
+        self.budget = budget
+        self.sweep_interval_s = sweep_interval_s
+        self.expired_answer = expired_answer
+        self._sweeper: Optional[asyncio.Task] = None
+        # (graph, thread_id) -> [lock, holders and waiters]; an entry goes when its count drops to 0.
+        self._thread_locks: Dict[Tuple[str, str], List[Any]] = {}
+
+    @asynccontextmanager
+    async def _thread_lock(self, graph: str, thread_id: str) -> AsyncIterator[None]:
+        """Serialize turns on one thread. The lock is dropped once nobody holds or waits for it."""
+        key = (graph, thread_id)
+        entry = self._thread_locks.get(key)
+        if entry is None:
+            entry = self._thread_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._thread_locks[key]
+
+    # -------------------------------
+    # Graph operations
+    # -------------------------------
+    def _graph(self, name: str):
+        graph = self.graphs.get(name)
+        if graph is None:
+            raise HTTPError(404, f"Unknown graph '{name}'")
+        return graph
+
+    @staticmethod
+    def _config(thread_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": thread_id}}
+
+    def _run_config(self, thread_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        config = with_timings(self._config(thread_id), self.timings)
+        budget = self.budget
+        if body.get("budget") is not None:
+            try:
+                budget = Budget(**body["budget"])
+            except TypeError as e:
+                raise HTTPError(400, f"Invalid budget: {e}")
+        return with_budget(config, BudgetGuard(budget) if budget else None)
+
+    async def _snapshot(self, graph_name: str, thread_id: str, record: bool = False) -> Dict[str, Any]:
+        """
+        The thread's last message, next nodes, interrupts and open human tasks. With `record` (after a
+        call that ran the graph) the thread's interrupts are first recorded as human tasks; otherwise
+        the queue is only read.
+        """
+        state = await self._graph(graph_name).aget_state(self._config(thread_id))
+        values = state.values if isinstance(state.values, dict) else {}
+        messages = values.get(self.message_key) or []
+        snapshot = {
+            "thread_id": thread_id,
+            "next": list(state.next),
+            "last_message": to_jsonable(messages[-1]) if messages else None,
+            "interrupts": [to_jsonable(i) for task in state.tasks for i in task.interrupts],
+        }
+        if self.human_tasks is not None:
+            if record:
+                tasks = await asyncio.to_thread(
+                    self.human_tasks.record, graph_name, self._config(thread_id), state, self.task_deadline_s
+                )
+            else:
+                tasks = await asyncio.to_thread(self.human_tasks.pending, graph_name, thread_id)
+            snapshot["human_tasks"] = [self._task_json(t) for t in tasks]
+        return snapshot
+
+    @staticmethod
+    def _task_json(task: HumanTask) -> Dict[str, Any]:
+        return {
+            "task_id": task.task_id,
+            "graph": task.graph,
+            "thread_id": task.thread_id,
+            "question": to_jsonable(task.question),
+            "tool_call_id": task.tool_call_id,
+            "deadline": task.deadline,
+            "status": task.status,
+        }
+
+    def _input_from_body(self, body: Dict[str, Any]) -> Any:
+        if "resume" in body:
+            return Command(resume=body["resume"])
+        if "content" in body:
+            return {self.message_key: [("user", body["content"])]}
+        if "input" in body:
+            return body["input"]
+        raise HTTPError(400, "Body must contain 'content', 'resume' or 'input'")
+
+    async def start_thread(self, graph: str, body: Dict[str, Any]):
+        g = self._graph(graph)
+        thread_id = body.get("thread_id") or str(uuid.uuid4())
+        if body.get("input") is not None:
+            async with self._thread_lock(graph, thread_id):
+                await g.ainvoke(body["input"], self._run_config(thread_id, body))
+                return 201, await self._snapshot(graph, thread_id, record=True)
+        return 201, await self._snapshot(graph, thread_id)
+
+    async def post_message(self, graph: str, thread_id: str, body: Dict[str, Any]):
+        if "content" not in body:
+            raise HTTPError(400, "Body must contain 'content'")
+        g = self._graph(graph)
+        async with self._thread_lock(graph, thread_id):
+            await g.ainvoke({self.message_key: [("user", body["content"])]}, self._run_config(thread_id, body))
+            return 200, await self._snapshot(graph, thread_id, record=True)
+
+    async def resume(self, graph: str, thread_id: str, body: Dict[str, Any]):
+        if "value" not in body:
+            raise HTTPError(400, "Body must contain 'value'")
+        g = self._graph(graph)
+        async with self._thread_lock(graph, thread_id):
+            await g.ainvoke(Command(resume=body["value"]), self._run_config(thread_id, body))
+            return 200, await self._snapshot(graph, thread_id, record=True)
+
+    async def get_state(self, graph: str, thread_id: str, body: Dict[str, Any]):
+        return 200, await self._snapshot(graph, thread_id)
+
+    def _queue(self) -> HumanTaskQueue:
+        if self.human_tasks is None:
+            raise HTTPError(404, "Human task queue is not enabled")
+        return self.human_tasks
+
+    async def list_human_tasks(self, body: Dict[str, Any], query: Dict[str, str]):
+        tasks = await asyncio.to_thread(self._queue().pending, query.get("graph"), query.get("thread_id"))
+        return 200, {"tasks": [self._task_json(t) for t in tasks]}
+
+    async def answer_human_task(self, task_id: str, body: Dict[str, Any]):
+        if "value" not in body:
+            raise HTTPError(400, "Body must contain 'value'")
+        queue = self._queue()
+        try:
+            task = await asyncio.to_thread(queue.answer, task_id, body["value"])
+        except KeyError as e:
+            raise HTTPError(404, str(e.args[0]))
+        except ValueError as e:
+            raise HTTPError(409, str(e))
+        g = self.graphs.get(task.graph)
+        if g is None:
+            # Another service instance owns this graph; its sweeper resumes the task from the queue.
+            return 202, self._task_json(task)
+        claimed = await asyncio.to_thread(queue.claim, task_id)
+        if claimed is None:
+            return 202, self._task_json(await asyncio.to_thread(queue.get, task_id))
+        async with self._thread_lock(claimed.graph, claimed.thread_id):
+            # aresume records the questions the resumed run stopped on.
+            await queue.aresume(claimed, g, deadline_s=self.task_deadline_s)
+            return 200, await self._snapshot(claimed.graph, claimed.thread_id)
+
+    async def sweep_human_tasks(self, limit: int = 100) -> Dict[str, int]:
+        """
+        One pass over the human task queue: expire (or answer with `expired_answer`) overdue tasks,
+        then resume answered tasks of this instance's graphs. Returns the counts.
+        """
+        queue = self._queue()
+        expired = await asyncio.to_thread(queue.expire_overdue, None, self.expired_answer)
+        resumed = 0
+        for task in await asyncio.to_thread(queue.claim_answered, limit, list(self.graphs)):
+            try:
+                async with self._thread_lock(task.graph, task.thread_id):
+                    await queue.aresume(task, self.graphs[task.graph], deadline_s=self.task_deadline_s)
+                resumed += 1
+            except Exception:
+                logger.exception("Failed to resume human task %s on thread %s", task.task_id, task.thread_id)
+        return {"expired": len(expired), "resumed": resumed}
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_s)
+            try:
+                await self.sweep_human_tasks()
+            except Exception:
+                logger.exception("Human task sweep failed")
+
+    def start_sweeper(self) -> None:
+        """Start the background sweeper (done at ASGI startup) if there is a queue to sweep."""
+        if self.human_tasks is not None and self.sweep_interval_s and self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def metrics(self, body: Dict[str, Any]):
+        text = (self.timings.prometheus() if self.timings is not None else "") + toolbox.prometheus()
+        if not text:
+            raise HTTPError(404, "Timings are not enabled and no toolbox is in use")
+        return 200, text
+
+    async def stream(self, graph: str, thread_id: str, body: Dict[str, Any], send: Callable[[bytes], Awaitable[None]]):
+        g = self._graph(graph)
+        graph_input = self._input_from_body(body)
+        async with self._thread_lock(graph, thread_id):
+            async for chunk in g.astream(graph_input, self._run_config(thread_id, body), stream_mode="updates"):
+                await send(f"event: update\ndata: {json.dumps(to_jsonable(chunk))}\n\n".encode("utf-8"))
+            snapshot = await self._snapshot(graph, thread_id, record=True)
+        await send(f"event: end\ndata: {json.dumps(snapshot)}\n\n".encode("utf-8"))
+
+    # -------------------------------
+    # ASGI plumbing
+    # -------------------------------
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    self.start_sweeper()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await self.stop_sweeper()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        try:
+            handler, params = self._route(scope["method"], scope["path"])
+            body = await self._read_json(receive)
+            if handler == "stream":
+                await self._send_stream(send, params, body)
+                return
+            if handler == "list_human_tasks":
+                query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+                params["query"] = {k: v[-1] for k, v in query.items()}
+            status, payload = await getattr(self, handler)(**params, body=body)
+            if handler == "metrics":
+                await self._send_text(send, status, payload, b"text/plain; version=0.0.4")
+                return
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.detail}
+        except Exception as e:
+            logger.exception("Unhandled error in agent service")
+            status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+        await self._send_json(send, status, payload)
+
+    def _route(self, method: str, path: str) -> Tuple[str, Dict[str, str]]:
+        path_matched = False
+        for route_method, pattern, handler in self.ROUTES:
+            match = pattern.match(path)
+            if match:
+                path_matched = True
+                if route_method == method:
+                    return handler, match.groupdict()
+        raise HTTPError(405 if path_matched else 404, f"{method} {path} not found")
+
+    @staticmethod
+    async def _read_json(receive) -> Dict[str, Any]:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        raw = b"".join(chunks)
+        if not raw:
+            return {}
+        try:
+            body = json.loads(raw)
+        except json.JSONDecodeError:
+            raise HTTPError(400, "Invalid JSON body")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "JSON body must be an object")
+        return body
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: Any) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+    @staticmethod
+    async def _send_text(send, status: int, text: str, content_type: bytes) -> None:
+        data = text.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(data)).encode())],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+    async def _send_stream(self, send, params: Dict[str, str], body: Dict[str, Any]) -> None:
+        # Validate before the 200 is sent, so bad requests still get a JSON error.
+        self._graph(params["graph"])
+        self._input_from_body(body)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        })
+
+        async def send_chunk(data: bytes) -> None:
+            await send({"type": "http.response.body", "body": data, "more_body": True})
+
+        try:
+            await self.stream(**params, body=body, send=send_chunk)
+        except Exception as e:
+            logger.exception("Error while streaming")
+            await send_chunk(f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n".encode("utf-8"))
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def create_app(
+    graphs: Dict[str, Any],
+    message_key: str = "messages",
+    human_tasks: Optional[HumanTaskQueue] = None,
+    task_deadline_s: Optional[float] = None,
+    timings: Optional[TimingCallbackHandler] = None,
+    budget: Optional[Budget] = None,
+    sweep_interval_s: Optional[float] = 5.0,
+    expired_answer: Any = None,
+) -> AgentService:
+    """Create the ASGI application for a set of compiled graphs."""
+    return AgentService(graphs, message_key=message_key, human_tasks=human_tasks, task_deadline_s=task_deadline_s,
+                        timings=timings, budget=budget, sweep_interval_s=sweep_interval_s,
+                        expired_answer=expired_answer)
+
+
+def _load(target: str):
+    module_name, _, attr = target.partition(":")
+    obj = getattr(importlib.import_module(module_name), attr or "graph")
+    return obj() if callable(obj) and not hasattr(obj, "ainvoke") else obj
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Serve compiled graphs over HTTP.")
+    parser.add_argument("--graph", action="append", required=True,
+                        help="name=module:attr of a compiled graph or a zero-argument factory (repeatable)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--human-tasks", default=None, help="SQLite file to park interrupts in as human tasks")
+    parser.add_argument("--task-deadline", type=float, default=None, help="Deadline for human tasks, in seconds")
+    parser.add_argument("--sweep-interval", type=float, default=5.0,
+                        help="Seconds between expiring overdue human tasks and resuming answered ones")
+    parser.add_argument("--expired-answer", default=None,
+                        help="Answer for human tasks past their deadline (default: mark them expired)")
+    parser.add_argument("--timings", action="store_true", help="Time nodes, LLM calls and tools; served at GET /metrics")
+    parser.add_argument("--max-llm-calls", type=int, default=None, help="Default LLM call budget per run")
+    parser.add_argument("--max-run-seconds", type=float, default=None, help="Default wall-time budget per run")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required to run the service: pip install uvicorn")
+
+    graphs = {}
+    for spec in args.graph:
+        name, _, target = spec.rpartition("=")
+        graphs[name or target.rpartition(":")[2]] = _load(target)
+    human_tasks = HumanTaskQueue(args.human_tasks) if args.human_tasks else None
+    timings = TimingCallbackHandler() if args.timings else None
+    budget = None
+    if args.max_llm_calls is not None or args.max_run_seconds is not None:
+        budget = Budget(max_llm_calls=args.max_llm_calls, max_seconds=args.max_run_seconds)
+    app = create_app(graphs, human_tasks=human_tasks, task_deadline_s=args.task_deadline, timings=timings,
+                     budget=budget, sweep_interval_s=args.sweep_interval, expired_answer=args.expired_answer)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
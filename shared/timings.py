@@ -0,0 +1,327 @@
+"""
+Timings
+Per-node, per-LLM and per-tool latency histograms, collected with a LangChain callback handler.
+
+TimingCallbackHandler records the start and end of every graph run, graph node, LLM call and tool
+call, and keeps one histogram per (kind, name). The histograms use the HdrHistogram layout: each
+power of two is split into 2**precision_bits linear sub-buckets, so any percentile is within
+~1% (precision_bits=7) of the true value at any scale, with O(1) recording and a few hundred
+buckets per histogram.
+
+Export with `summary()` (a text table) or `prometheus()` (text exposition format, for a /metrics
+endpoint). A disabled handler is never attached: `with_timings` returns the config unchanged, so
+the runs pay nothing. `timings_from_env()` enables it with GRAPH_TIMINGS=1.
+
+Example usage:
+    timings = TimingCallbackHandler()
+    graph.invoke(state, with_timings({"configurable": {"thread_id": "1"}}, timings))
+    print(timings.summary())
+    open("metrics.prom", "w").write(timings.prometheus())
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langgraph.errors import GraphBubbleUp
+
+logger = logging.getLogger(__name__)
+
+# Prometheus `le` bucket bounds, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# ------------------------------------------------------------------------------
+# Histogram
+# ------------------------------------------------------------------------------
+
+class Histogram:
+    """
+    Log-linear histogram of durations, recorded as integer microseconds.
+
+    A value v lands in bucket (e, v >> e), where e is chosen so that v >> e has precision_bits + 1
+    bits. Values below 2**(precision_bits + 1) microseconds are therefore exact, and larger ones are
+    off by at most 2**-precision_bits relative.
+    """
+
+    def __init__(self, precision_bits: int = 7):
+        self.precision_bits = precision_bits
+        self._width = 2 << precision_bits
+        self._counts: Dict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def _key(self, micros: int) -> int:
+        shift = max(0, micros.bit_length() - self.precision_bits - 1)
+        return shift * self._width + (micros >> shift)
+
+    def _upper(self, key: int) -> float:
+        """Highest value (in seconds) that falls in the bucket."""
+        shift, mantissa = divmod(key, self._width)
+        return (((mantissa + 1) << shift) - 1) / 1e6
+
+    def record(self, seconds: float) -> None:
+        key = self._key(max(0, int(seconds * 1e6)))
+        with self._lock:
+            self._counts[key] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def merge(self, other: "Histogram") -> None:
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        with other._lock:
+            counts = dict(other._counts)
+            count, total, low, high = other.count, other.total, other.min, other.max
+        with self._lock:
+            for key, n in counts.items():
+                self._counts[key] += n
+            self.count += count
+            self.total += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Value (seconds) at or below which `p` percent of the recorded values fall."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, round(self.count * p / 100))
+            seen = 0
+            for key in sorted(self._counts):
+                seen += self._counts[key]
+                if seen >= target:
+                    return min(self._upper(key), self.max)
+            return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[Tuple[float, int]]:
+        """(bound, count of values <= bound) for each bound, to bucket resolution."""
+        with self._lock:
+            items = sorted(self._counts.items())
+        result, seen, i = [], 0, 0
+        for bound in bounds:
+            while i < len(items) and self._upper(items[i][0]) <= bound:
+                seen += items[i][1]
+                i += 1
+            result.append((bound, seen))
+        return result
+
+
+# ------------------------------------------------------------------------------
+# Callback handler
+# ------------------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class TimingCallbackHandler(BaseCallbackHandler):
+    """
+    Records how long graphs, nodes, LLM calls and tools take, into one Histogram per (kind, name).
+
+    Kinds are "graph" (a whole run), "node", "llm" and "tool". An interrupt raised by a node is
+    recorded as a normal (short) node run, not as an error.
+
+    Args:
+        enabled: A disabled handler tells LangChain to skip all of its callbacks.
+        precision_bits: Histogram precision (see Histogram).
+    """
+
+    # Cheap enough to run on the event loop; avoids a thread hop per callback in async runs.
+    run_inline = True
+    raise_error = False
+
+    def __init__(self, enabled: bool = True, precision_bits: int = 7):
+        self.enabled = enabled
+        self.precision_bits = precision_bits
+        self._starts: Dict[UUID, Tuple[str, str, float]] = {}
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def ignore_chain(self) -> bool:
+        return not self.enabled
+
+    @property
+    def ignore_llm(self) -> bool:
+        return not self.enabled
+
+    @property
+    def ignore_chat_model(self) -> bool:
+        return not self.enabled
+
+    @property
+    def ignore_agent(self) -> bool:
+        # LangChain dispatches tool callbacks under this flag too.
+        return not self.enabled
+
+    @property
+    def ignore_retriever(self) -> bool:
+        return True
+
+    @property
+    def ignore_retry(self) -> bool:
+        return True
+
+    @property
+    def ignore_custom_event(self) -> bool:
+        return True
+
+    # ---- recording ----
+
+    def _start(self, run_id: UUID, kind: str, name: str) -> None:
+        self._starts[run_id] = (kind, name, time.perf_counter())
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        kind, name, start = started
+        elapsed = time.perf_counter() - start
+        key = (kind, name)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.precision_bits))
+        histogram.record(elapsed)
+        if error is not None and not isinstance(error, GraphBubbleUp):
+            with self._lock:
+                self._errors[key] += 1
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+        if kwargs.get("name"):
+            return kwargs["name"]
+        serialized = serialized or {}
+        return serialized.get("name") or (serialized.get("id") or [default])[-1]
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = self._name(serialized, kwargs, "graph")
+        if parent_run_id is None:
+            self._start(run_id, "graph", name)
+        elif metadata and metadata.get("langgraph_node") == name and not name.startswith("__"):
+            # Nested runnables inside a node inherit its metadata; only the node's own run matches its name.
+            self._start(run_id, "node", name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def _llm_name(self, serialized, metadata, kwargs) -> str:
+        return (metadata or {}).get("ls_model_name") or self._name(serialized, kwargs, "llm")
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", self._llm_name(serialized, metadata, kwargs))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, "llm", self._llm_name(serialized, metadata, kwargs))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", self._name(serialized, kwargs, "tool"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    # ---- export ----
+
+    def histograms(self) -> Dict[Tuple[str, str], Histogram]:
+        with self._lock:
+            return dict(self._histograms)
+
+    def errors(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            return dict(self._errors)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+    def summary(self) -> str:
+        """Text table of count, errors and p50/p90/p99/max/mean in milliseconds per (kind, name)."""
+        errors = self.errors()
+        lines = [f"{'kind':<6} {'name':<28} {'count':>7} {'errors':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'mean':>8}"]
+        for (kind, name), h in sorted(self.histograms().items()):
+            ms = [h.percentile(50), h.percentile(90), h.percentile(99), h.max, h.mean]
+            lines.append(f"{kind:<6} {name[:28]:<28} {h.count:>7} {errors.get((kind, name), 0):>6} "
+                         + " ".join(f"{v * 1000:8.1f}" for v in ms))
+        return "\n".join(lines)
+
+    def prometheus(self, prefix: str = "langgraph", buckets: Iterable[float] = DEFAULT_BUCKETS) -> str:
+        """Prometheus text exposition: a `<prefix>_<kind>_duration_seconds` histogram and an
+        `<prefix>_<kind>_errors_total` counter per kind, labelled by name."""
+        buckets = tuple(buckets)
+        histograms, errors = self.histograms(), self.errors()
+        lines = []
+        for kind in sorted({kind for kind, _ in histograms}):
+            metric = f"{prefix}_{kind}_duration_seconds"
+            lines += [f"# HELP {metric} Duration of each {kind} run.", f"# TYPE {metric} histogram"]
+            for (k, name), h in sorted(histograms.items()):
+                if k != kind:
+                    continue
+                label = f'name="{_escape(name)}"'
+                for bound, n in h.cumulative(buckets):
+                    lines.append(f'{metric}_bucket{{{label},le="{bound:g}"}} {n}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {h.count}')
+                lines.append(f"{metric}_sum{{{label}}} {h.total:.6f}")
+                lines.append(f"{metric}_count{{{label}}} {h.count}")
+            counter = f"{prefix}_{kind}_errors_total"
+            lines += [f"# HELP {counter} Failed {kind} runs.", f"# TYPE {counter} counter"]
+            for (k, name) in sorted(histograms):
+                if k == kind:
+                    lines.append(f'{counter}{{name="{_escape(name)}"}} {errors.get((k, name), 0)}')
+        return "\n".join(lines) + "\n"
+
+
+# ------------------------------------------------------------------------------
+# Config helpers
+# ------------------------------------------------------------------------------
+
+def with_timings(config: Optional[Dict[str, Any]], handler: Optional[TimingCallbackHandler]) -> Dict[str, Any]:
+    """Return a copy of `config` with `handler` added to its callbacks; unchanged if there is no enabled handler."""
+    config = dict(config or {})
+    if handler is None or not handler.enabled:
+        return config
+    callbacks = config.get("callbacks")
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.copy()
+        callbacks.add_handler(handler, inherit=True)
+        config["callbacks"] = callbacks
+    else:
+        config["callbacks"] = [*(callbacks or []), handler]
+    return config
+
+
+def timings_from_env(var: str = "GRAPH_TIMINGS") -> Optional[TimingCallbackHandler]:
+    """A handler if `var` is set to 1/true/yes, else None."""
+    if os.getenv(var, "").strip().lower() in ("1", "true", "yes"):
+        return TimingCallbackHandler()
+    return None
@@ -0,0 +1,179 @@
+"""
+Toolbox
+A registry of tools whose schemas are compiled once, with a per-turn choice of which tools to offer.
+
+Models used to be bound to their whole tool list, so every call sent every tool schema as prompt
+tokens, even when the state ruled most tools out (e.g. create_calendar_event while the event form is
+still empty). A Toolbox converts each tool (a @tool, a pydantic model such as AskHuman, or a plain
+function) to its OpenAI schema once. Each tool can have a cheap `when` / `unless` predicate over
+state, and `bind(model, state)` binds only the tools whose predicates pass. Bound models are cached
+per tool subset, so a turn does a dict lookup rather than a re-bind. `stats()` reports the schema
+tokens sent and saved, and `prometheus()` exports them for every Toolbox (the service adds them to
+GET /metrics).
+
+Example usage:
+    toolbox = Toolbox(name="calendar")
+    toolbox.add(AskHuman)
+    toolbox.add(get_current_time_tool, when=missing_fields("event_data", "start_time", "end_time"))
+    toolbox.add(create_calendar_event_tool, unless=missing_fields("event_data", "topic", "start_time", "end_time"))
+
+    def call_model(state):
+        return {"messages": [toolbox.bind(get_llm(), state).invoke(state["messages"])]}
+"""
+
+import json
+import weakref
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from shared.search_store import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ToolEntry:
+    name: str
+    tool: Any
+    schema: Dict[str, Any]
+    tokens: int
+    when: Optional[Callable[[Any], bool]] = None
+    unless: Optional[Callable[[Any], bool]] = None
+
+    def offered(self, state: Any) -> bool:
+        if self.when is not None and not self.when(state):
+            return False
+        return not (self.unless is not None and self.unless(state))
+
+
+def called_since_human(tool_name: str, message_key: str = "messages") -> Callable[[Any], bool]:
+    """Predicate: `tool_name` has already been called since the last human message (its result is in context)."""
+    def predicate(state: Any) -> bool:
+        messages = state.get(message_key) if isinstance(state, dict) else getattr(state, message_key, None)
+        for message in reversed(messages or []):
+            if getattr(message, "type", None) == "human":
+                return False
+            if getattr(message, "type", None) == "tool" and getattr(message, "name", None) == tool_name:
+                return True
+        return False
+    predicate.__name__ = f"called_{tool_name}"
+    return predicate
+
+
+# Every live Toolbox, for prometheus().
+_toolboxes: "weakref.WeakSet[Toolbox]" = weakref.WeakSet()
+
+
+class Toolbox:
+    """
+    Args:
+        *tools: Tools offered on every turn.
+        name: Used in logs and reports.
+        max_bindings: Bound models kept (oldest dropped first).
+    """
+
+    def __init__(self, *tools: Any, name: str = "toolbox", max_bindings: int = 64):
+        self.name = name
+        self.max_bindings = max_bindings
+        self._entries: Dict[str, ToolEntry] = {}
+        self._bound: Dict[Tuple[int, FrozenSet[str], str], Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._tokens_sent = 0
+        self._tokens_full = 0
+        for tool in tools:
+            self.add(tool)
+        _toolboxes.add(self)
+
+    def add(self, tool: Any, when: Optional[Callable[[Any], bool]] = None,
+            unless: Optional[Callable[[Any], bool]] = None) -> "Toolbox":
+        """
+        Register a tool. It is offered when `when(state)` is true (always, if None) and
+        `unless(state)` is not. Raises ValueError for a duplicate name.
+        """
+        schema = convert_to_openai_tool(tool)
+        name = schema["function"]["name"]
+        if name in self._entries:
+            raise ValueError(f"Toolbox '{self.name}' already has a tool named '{name}'")
+        self._entries[name] = ToolEntry(name, tool, schema, estimate_tokens(json.dumps(schema)), when, unless)
+        with self._lock:
+            self._bound.clear()
+        return self
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    @property
+    def tools(self) -> List[Any]:
+        """The tool objects (e.g. for a ToolNode), in registration order."""
+        return [e.tool for e in self._entries.values()]
+
+    def schemas(self, names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """The precompiled schemas of `names` (all tools if None), in registration order."""
+        wanted = set(self._entries if names is None else names)
+        return [e.schema for e in self._entries.values() if e.name in wanted]
+
+    def select(self, state: Any) -> List[str]:
+        """Names of the tools to offer for this state."""
+        return [e.name for e in self._entries.values() if e.offered(state)]
+
+    def bind(self, model: Any, state: Any = None, **kwargs) -> Any:
+        """
+        `model.bind_tools` with only the tools selected for `state` (all tools if state is None).
+        Bindings are cached per model, tool subset and keyword arguments. With no tools selected,
+        the model is returned as is.
+        """
+        names = self.names if state is None else self.select(state)
+        selected = sum(self._entries[n].tokens for n in names)
+        full = sum(e.tokens for e in self._entries.values())
+        key = (id(model), frozenset(names), repr(sorted(kwargs.items())))
+        with self._lock:
+            self._calls += 1
+            self._tokens_sent += selected
+            self._tokens_full += full
+            cached = self._bound.get(key)
+        if cached is None:
+            bound = model.bind_tools(self.schemas(names), **kwargs) if names else model
+            with self._lock:
+                # The model is kept with its binding, so its id cannot be reused while cached.
+                self._bound[key] = (model, bound)
+                while len(self._bound) > self.max_bindings:
+                    del self._bound[next(iter(self._bound))]
+        else:
+            bound = cached[1]
+        logger.debug("Toolbox '%s' offers %s (%d of %d schema tokens)", self.name, names, selected, full)
+        return bound
+
+    def stats(self) -> Dict[str, Any]:
+        """Schema tokens sent and saved over all `bind` calls, against binding every tool each time."""
+        with self._lock:
+            saved = self._tokens_full - self._tokens_sent
+            return {
+                "calls": self._calls,
+                "schema_tokens_sent": self._tokens_sent,
+                "schema_tokens_full": self._tokens_full,
+                "schema_tokens_saved": saved,
+                "saved_ratio": saved / self._tokens_full if self._tokens_full else 0.0,
+                "tool_tokens": {e.name: e.tokens for e in self._entries.values()},
+            }
+
+
+def prometheus(prefix: str = "langgraph") -> str:
+    """Prometheus text exposition of `stats()` for every Toolbox, labelled by toolbox name ("" if there are none)."""
+    boxes = sorted(list(_toolboxes), key=lambda box: box.name)
+    if not boxes:
+        return ""
+    stats = [(box.name, box.stats()) for box in boxes]
+    lines = []
+    for key, help_text in (("calls", "Model bindings made through the toolbox."),
+                           ("schema_tokens_sent", "Estimated tool schema tokens bound."),
+                           ("schema_tokens_full", "Estimated tool schema tokens had every tool been bound.")):
+        metric = f"{prefix}_toolbox_{key}_total"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{toolbox="{name}"}} {s[key]}' for name, s in stats]
+    return "\n".join(lines) + "\n"
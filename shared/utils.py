@@ -1,27 +1,241 @@
 import os
+import json
+import shutil
+import hashlib
 import logging
-from IPython.display import Image
+import subprocess
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rendered diagrams are cached here, keyed on the graph structure, so unchanged graphs are never re-rendered.
+DIAGRAM_CACHE_DIR = os.getenv("GRAPH_DIAGRAM_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "graph-diagrams"))
+
+# Bump when the output of the local renderers changes, so stale cache entries are ignored.
+_RENDERER_VERSION = "1"
+
+
+# ------------------------------------------------------------------------------
+# Graph structure
+# ------------------------------------------------------------------------------
+
+def _structure(graph) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str, str, bool]]]:
+    """Nodes (id, label) and edges (source, target, label, conditional) of a compiled graph, in a stable order."""
+    drawable = graph.get_graph()
+    nodes = sorted((node_id, node.name) for node_id, node in drawable.nodes.items())
+    edges = sorted(
+        (e.source, e.target, "" if e.data is None else str(e.data), bool(e.conditional))
+        for e in drawable.edges
+    )
+    return nodes, edges
+
+
+def graph_structure_hash(graph) -> str:
+    """SHA-256 of a graph's nodes and edges. Two graphs with the same shape draw the same diagram."""
+    nodes, edges = _structure(graph)
+    payload = json.dumps({"nodes": nodes, "edges": edges}, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------------------------------------
+# Local renderers
+# ------------------------------------------------------------------------------
+
+def _to_dot(nodes, edges) -> str:
+    lines = ["digraph G {", '  node [shape=box, style="rounded,filled", fillcolor="#f2f0ff", fontname="Helvetica"];']
+    for node_id, label in nodes:
+        terminal = ', shape=oval, fillcolor="#dddddd"' if node_id in ("__start__", "__end__") else ""
+        lines.append(f'  "{node_id}" [label="{label}"{terminal}];')
+    for source, target, label, conditional in edges:
+        attrs = ["style=dashed"] if conditional else []
+        if label:
+            attrs.append(f'label="{label}"')
+        lines.append(f'  "{source}" -> "{target}"' + (f" [{', '.join(attrs)}]" if attrs else "") + ";")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def _to_mermaid(nodes, edges) -> str:
+    ids = {node_id: f"n{i}" for i, (node_id, _) in enumerate(nodes)}
+    lines = ["graph TD;"]
+    for node_id, label in nodes:
+        lines.append(f'  {ids[node_id]}(["{label}"])' if node_id in ("__start__", "__end__") else f'  {ids[node_id]}["{label}"]')
+    for source, target, label, conditional in edges:
+        arrow = "-.->" if conditional else "-->"
+        lines.append(f"  {ids[source]} {arrow}{'|' + label + '|' if label else ''} {ids[target]};")
+    return "\n".join(lines) + "\n"
+
+
+def _layers(nodes, edges) -> Dict[str, int]:
+    """Longest-path layering from __start__, ignoring edges that close a cycle."""
+    children: Dict[str, List[str]] = {node_id: [] for node_id, _ in nodes}
+    for source, target, _, _ in edges:
+        children.setdefault(source, []).append(target)
+
+    # Depth-first search to find back edges, so loops do not push nodes down forever.
+    back, state = set(), {}
+    roots = ["__start__"] if "__start__" in children else []
+    roots += [n for n in children if n not in roots]
+    for root in roots:
+        if root in state:
+            continue
+        stack = [(root, iter(children[root]))]
+        state[root] = "open"
+        while stack:
+            node, it = stack[-1]
+            child = next(it, None)
+            if child is None:
+                state[node] = "done"
+                stack.pop()
+            elif state.get(child) == "open":
+                back.add((node, child))
+            elif child not in state:
+                state[child] = "open"
+                stack.append((child, iter(children.get(child, []))))
+
+    layer = {node_id: 0 for node_id, _ in nodes}
+    for _ in range(len(nodes)):
+        changed = False
+        for source, target, _, _ in edges:
+            if (source, target) not in back and layer[target] < layer[source] + 1:
+                layer[target] = layer[source] + 1
+                changed = True
+        if not changed:
+            break
+    if "__end__" in layer and len(layer) > 1:
+        # Keep __end__ alone on the bottom row.
+        layer["__end__"] = max(v for k, v in layer.items() if k != "__end__") + 1
+    return layer
+
+
+def _to_svg(nodes, edges) -> str:
+    """A small dependency-free layered SVG: one row per layer, dashed conditional edges, curved back edges."""
+    box_w, box_h, gap_x, gap_y, margin = 170, 36, 30, 60, 20
+    layer = _layers(nodes, edges)
+    rows: Dict[int, List[Tuple[str, str]]] = {}
+    for node_id, label in nodes:
+        rows.setdefault(layer[node_id], []).append((node_id, label))
+    content_w = max(len(r) for r in rows.values()) * (box_w + gap_x) - gap_x
+    # Room on the right for back edges, which bulge further the more rows they span.
+    width = content_w + 2 * margin + gap_x + 10 * max(rows)
+    height = (max(rows) + 1) * (box_h + gap_y) - gap_y + 2 * margin
+
+    pos = {}
+    for depth, row in rows.items():
+        row_w = len(row) * (box_w + gap_x) - gap_x
+        x0 = margin + (content_w - row_w) / 2
+        for i, (node_id, _) in enumerate(row):
+            pos[node_id] = (x0 + i * (box_w + gap_x), margin + depth * (box_h + gap_y))
+
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" font-family="Helvetica, Arial, sans-serif" font-size="13">',
+        '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="7" markerHeight="7" orient="auto-start-reverse">'
+        '<path d="M 0 0 L 10 5 L 0 10 z" fill="#555"/></marker></defs>',
+    ]
+    for source, target, label, conditional in edges:
+        (sx, sy), (tx, ty) = pos[source], pos[target]
+        dash = ' stroke-dasharray="5,4"' if conditional else ""
+        if layer[target] > layer[source]:
+            x1, y1, x2, y2 = sx + box_w / 2, sy + box_h, tx + box_w / 2, ty
+            out.append(f'<line x1="{x1:.0f}" y1="{y1:.0f}" x2="{x2:.0f}" y2="{y2:.0f}" stroke="#555"{dash} marker-end="url(#arrow)"/>')
+        else:
+            # Upward or same-row edge: route around the right-hand side of the boxes.
+            x1, y1, x2, y2 = sx + box_w, sy + box_h / 2, tx + box_w, ty + box_h / 2
+            bulge = max(x1, x2) + gap_x + 10 * abs(layer[source] - layer[target])
+            out.append(f'<path d="M {x1:.0f} {y1:.0f} C {bulge:.0f} {y1:.0f}, {bulge:.0f} {y2:.0f}, {x2:.0f} {y2:.0f}" fill="none" stroke="#555"{dash} marker-end="url(#arrow)"/>')
+        if label:
+            out.append(f'<text x="{(x1 + x2) / 2:.0f}" y="{(y1 + y2) / 2:.0f}" fill="#555" font-size="11">{escape(label)}</text>')
+    for node_id, label in nodes:
+        x, y = pos[node_id]
+        terminal = node_id in ("__start__", "__end__")
+        fill, rx = ("#dddddd", box_h / 2) if terminal else ("#f2f0ff", 6)
+        out.append(f'<rect x="{x:.0f}" y="{y:.0f}" width="{box_w}" height="{box_h}" rx="{rx:.0f}" fill="{fill}" stroke="#7a6fd6"/>')
+        out.append(f'<text x="{x + box_w / 2:.0f}" y="{y + box_h / 2 + 4:.0f}" text-anchor="middle">{escape(label)}</text>')
+    out.append("</svg>")
+    return "\n".join(out) + "\n"
+
+
+def _png(graph, dot: str, allow_remote: bool) -> bytes:
+    """PNG through a local Graphviz (the `dot` binary or pygraphviz); the remote Mermaid API only as a last resort."""
+    if shutil.which("dot"):
+        return subprocess.run(["dot", "-Tpng"], input=dot.encode("utf-8"), capture_output=True, check=True).stdout
+    try:
+        import pygraphviz
+        return pygraphviz.AGraph(string=dot).draw(format="png", prog="dot")
+    except ImportError:
+        pass
+    if allow_remote:
+        return graph.get_graph().draw_mermaid_png()
+    raise RuntimeError("No local PNG renderer (install graphviz or pygraphviz) and remote rendering is disabled")
+
+
+def render_graph(graph, fmt: str = "svg", allow_remote: bool = False) -> bytes:
+    """
+    Render a compiled graph without the cache.
+
+    Args:
+    - fmt: "svg" (built-in, offline), "dot", "mmd" (Mermaid source) or "png" (needs Graphviz, or allow_remote).
+    - allow_remote: Let "png" fall back to the remote Mermaid rendering service.
+    """
+    nodes, edges = _structure(graph)
+    if fmt == "svg":
+        return _to_svg(nodes, edges).encode("utf-8")
+    if fmt == "dot":
+        return _to_dot(nodes, edges).encode("utf-8")
+    if fmt in ("mmd", "mermaid"):
+        return _to_mermaid(nodes, edges).encode("utf-8")
+    if fmt == "png":
+        return _png(graph, _to_dot(nodes, edges), allow_remote)
+    raise ValueError(f"Unsupported diagram format '{fmt}'. Expected svg, dot, mmd or png")
+
+
 # Draw Graph Utility
-def draw_graph(graph, file_path):
+def draw_graph(graph, file_path, cache_dir: Optional[str] = DIAGRAM_CACHE_DIR, allow_remote: bool = False) -> Optional[str]:
     """
     Save the diagram of a compiled graph object to a specified file path.
 
+    The format comes from the extension: .svg, .dot and .mmd are rendered locally; .png uses a local
+    Graphviz when available and otherwise the remote Mermaid service (if allow_remote). When a PNG
+    cannot be rendered, an .svg is written next to the requested path instead.
+
+    Renders are cached in `cache_dir` under a hash of the graph's nodes and edges, so redrawing an
+    unchanged graph costs a file copy. Pass cache_dir=None to disable the cache.
+
     Parameters:
-    - graph: The compiled graph object that has a method `get_graph()` which returns an object
-             with a method `draw_mermaid_png()` to generate the diagram image.
+    - graph: The compiled graph object (anything with `get_graph()`).
     - file_path: The path where the diagram image will be saved.
 
+    Returns the path written, or None on error.
+
     Example usage:
     draw_graph(graph, "diagrams/file.png")
     """
     try:
-        # Generate the image from the graph
-        img = Image(graph.get_graph().draw_mermaid_png())
+        fmt = os.path.splitext(file_path)[1].lstrip(".").lower() or "svg"
+        key = f"{graph_structure_hash(graph)}-{_RENDERER_VERSION}.{fmt}"
+        cached = os.path.join(cache_dir, key) if cache_dir else None
+
+        if cached and os.path.exists(cached):
+            with open(cached, "rb") as f:
+                data = f.read()
+            logger.debug(f"Diagram cache hit for {file_path}")
+        else:
+            try:
+                data = render_graph(graph, fmt, allow_remote=allow_remote)
+            except Exception as e:
+                if fmt != "png":
+                    raise
+                logger.warning(f"PNG rendering failed ({e}); writing an SVG diagram instead")
+                return draw_graph(graph, os.path.splitext(file_path)[0] + ".svg", cache_dir, allow_remote)
+            if cached:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp = f"{cached}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, cached)
 
         # Extract the directory from the file path
         directory = os.path.dirname(file_path)
@@ -32,10 +246,35 @@ def draw_graph(graph, file_path):
             logger.info(f"Created directory: {directory}")
 
         # Save the image to the specified file path
-        with open(file_path, "wb") as png:
-            png.write(img.data)
+        with open(file_path, "wb") as out:
+            out.write(data)
 
         logger.info(f"Diagram saved successfully to {file_path}")
+        return file_path
 
     except Exception as e:
         logger.error(f"An error occurred while saving the diagram: {e}")
+        return None
+
+
+def draw_registered_graphs(output_dir: str = "diagrams", fmt: str = "svg", names: Optional[List[str]] = None,
+                           registry: Any = None, **kwargs) -> Dict[str, Optional[str]]:
+    """
+    Export a diagram of every graph in the registry (shared.graph_registry.graphs by default) in one call.
+    Graphs are built through the registry, so they are compiled at most once. Returns name -> path written.
+
+    Example usage:
+    draw_registered_graphs("diagrams", fmt="svg")
+    """
+    if registry is None:
+        from shared.graph_registry import graphs as registry
+    paths = {}
+    for name in names or registry.names():
+        try:
+            graph = registry.get(name)
+        except Exception as e:
+            logger.error(f"Could not build graph '{name}' for its diagram: {e}")
+            paths[name] = None
+            continue
+        paths[name] = draw_graph(graph, os.path.join(output_dir, f"{name}.{fmt}"), **kwargs)
+    return paths
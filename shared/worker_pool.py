@@ -0,0 +1,278 @@
+"""
+Graph Worker Pool
+Runs graphs in several worker processes so CPU-bound framework work (pydantic validation, message
+merging, checkpoint serialization, routing) is not serialized behind one GIL.
+
+Sessions are sharded by a stable hash of `thread_id`, so every turn of a thread goes to the same
+worker. Each worker builds its own compiled graphs and owns its own checkpointer partition; no
+checkpoint data crosses process boundaries, only inputs and results. Requests for one thread are
+handled in submission order because each worker drains its queue in order.
+
+Example usage:
+    def build_agent(checkpointer):
+        return graph_builder.compile(checkpointer=checkpointer)
+
+    with GraphWorkerPool({"agent": build_agent}, num_workers=4) as pool:
+        pool.invoke("agent", {"messages": [("user", "hi")]}, {"configurable": {"thread_id": "42"}})
+
+Graph factories (and the checkpointer factory) are sent to the workers, so they must be picklable
+module-level callables.
+
+A worker that dies (crash, OOM kill) is noticed within about half a second: the requests it had not
+answered fail with WorkerDied and the shard is restarted with a fresh checkpointer, up to
+`max_restarts` times; after that the shard is broken and submits to it raise WorkerDied.
+"""
+
+import os
+import time
+import pickle
+import hashlib
+import logging
+import itertools
+import threading
+import multiprocessing
+import multiprocessing.connection
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from shared.checkpoint import BoundedMemorySaver
+
+logger = logging.getLogger(__name__)
+
+# Graph methods a caller may run through the pool.
+ALLOWED_METHODS = ("invoke", "stream", "get_state", "update_state", "get_state_history")
+
+# Seconds between worker liveness checks.
+LIVENESS_INTERVAL_S = 0.5
+
+
+class WorkerDied(RuntimeError):
+    """The worker process that owned the request's shard exited before answering."""
+
+
+def shard_for(thread_id: Any, num_shards: int) -> int:
+    """Stable shard index for a thread_id (unlike hash(), identical across processes and runs)."""
+    digest = hashlib.blake2b(str(thread_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % num_shards
+
+
+# ------------------------------------------------------------------------------
+# Worker process
+# ------------------------------------------------------------------------------
+
+def _picklable_error(e: BaseException) -> BaseException:
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def _worker_main(shard: int, factories: Dict[str, Callable], checkpointer_factory: Callable, requests, results) -> None:
+    """Worker loop: build graphs lazily against this shard's checkpointer and serve requests until None."""
+    checkpointer = checkpointer_factory()
+    graphs: Dict[str, Any] = {}
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, graph_name, method, args, kwargs = request
+        try:
+            graph = graphs.get(graph_name)
+            if graph is None:
+                graph = graphs[graph_name] = factories[graph_name](checkpointer)
+            result = getattr(graph, method)(*args, **kwargs)
+            # stream / get_state_history return generators; drain them in the worker.
+            if method in ("stream", "get_state_history"):
+                result = list(result)
+            reply = (request_id, True, result)
+        except BaseException as e:
+            reply = (request_id, False, _picklable_error(e))
+        try:
+            results.send(reply)
+        except Exception as e:
+            # The result could not be pickled.
+            results.send((request_id, False, _picklable_error(e)))
+
+
+# ------------------------------------------------------------------------------
+# Pool
+# ------------------------------------------------------------------------------
+
+class GraphWorkerPool:
+    """
+    Process pool with sticky routing by thread_id.
+
+    Args:
+        factories: Graph name -> callable(checkpointer) returning a compiled graph.
+        num_workers: Number of worker processes. Defaults to the CPU count.
+        checkpointer_factory: Callable returning each shard's checkpointer. Defaults to BoundedMemorySaver.
+        start_method: multiprocessing start method ("fork", "spawn", "forkserver"). Defaults to the platform default.
+        max_restarts: Times a shard's worker is restarted after dying before the shard is marked broken.
+    """
+
+    def __init__(
+        self,
+        factories: Dict[str, Callable],
+        num_workers: Optional[int] = None,
+        checkpointer_factory: Callable = BoundedMemorySaver,
+        start_method: Optional[str] = None,
+        max_restarts: int = 3,
+    ):
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.max_restarts = max_restarts
+        self._ctx = multiprocessing.get_context(start_method)
+        self._factories = factories
+        self._checkpointer_factory = checkpointer_factory
+        self._queues = [self._ctx.Queue() for _ in range(self.num_workers)]
+        # Result pipe read end -> shard. Each worker writes only its own pipe, so one that dies
+        # mid-send cannot block the others, and its exit shows up as EOF.
+        self._conns: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers: List[multiprocessing.Process] = [self._start_worker(shard) for shard in range(self.num_workers)]
+        self._restarts = [0] * self.num_workers
+        self._broken: Dict[int, str] = {}
+
+        # request_id -> (shard, future) for every request not answered yet.
+        self._futures: Dict[int, tuple] = {}
+        self._ids = itertools.count()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="graph-pool-results", daemon=True)
+        self._dispatcher.start()
+
+    def _start_worker(self, shard: int) -> multiprocessing.Process:
+        """Start the shard's worker with its own result pipe; the parent keeps only the read end."""
+        reader, writer = self._ctx.Pipe(duplex=False)
+        worker = self._ctx.Process(
+            target=_worker_main,
+            args=(shard, self._factories, self._checkpointer_factory, self._queues[shard], writer),
+            name=f"graph-worker-{shard}",
+            daemon=True,
+        )
+        worker.start()
+        writer.close()
+        self._conns[reader] = shard
+        return worker
+
+    def _dispatch(self) -> None:
+        """Resolve futures as results come back from the workers, and handle workers that exit."""
+        next_check = time.monotonic() + LIVENESS_INTERVAL_S
+        while True:
+            with self._lock:
+                conns = list(self._conns)
+            if not conns and self._closed:
+                return
+            for conn in multiprocessing.connection.wait(conns, timeout=LIVENESS_INTERVAL_S):
+                try:
+                    request_id, ok, payload = conn.recv()
+                except (EOFError, OSError):
+                    self._reap(conn)
+                    continue
+                self._resolve(request_id, ok, payload)
+            if time.monotonic() >= next_check:
+                # A worker's pipe reaches EOF when it exits; this also catches one that is gone without it.
+                with self._lock:
+                    dead = [conn for conn, shard in self._conns.items() if not self._workers[shard].is_alive()]
+                for conn in dead:
+                    self._reap(conn)
+                next_check = time.monotonic() + LIVENESS_INTERVAL_S
+
+    def _resolve(self, request_id: int, ok: bool, payload: Any) -> None:
+        with self._lock:
+            _, future = self._futures.pop(request_id, (None, None))
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(payload)
+
+    def _reap(self, conn) -> None:
+        """
+        The worker behind `conn` has exited: resolve what it sent before exiting, fail the rest of its
+        shard's requests with WorkerDied, and restart it on a new queue (the old one may hold requests
+        nobody will read) or, after `max_restarts`, mark the shard broken.
+        """
+        while True:
+            try:
+                if not conn.poll():
+                    break
+                self._resolve(*conn.recv())
+            except (EOFError, OSError):
+                break
+        with self._lock:
+            shard = self._conns.pop(conn, None)
+            conn.close()
+            if shard is None:
+                return
+            worker = self._workers[shard]
+            worker.join(timeout=1)
+            reason = f"graph worker {shard} exited with code {worker.exitcode}"
+            lost = [self._futures.pop(rid)[1] for rid, (s, _) in list(self._futures.items()) if s == shard]
+            self._queues[shard].cancel_join_thread()
+            if self._closed:
+                logger.debug("%s", reason)
+            elif self._restarts[shard] >= self.max_restarts:
+                self._broken[shard] = reason
+                logger.error("%s; %d requests failed, shard broken after %d restarts", reason, len(lost), self._restarts[shard])
+            else:
+                self._restarts[shard] += 1
+                logger.warning("%s; %d requests failed, restarting it (its threads' state is lost)", reason, len(lost))
+                self._queues[shard] = self._ctx.Queue()
+                self._workers[shard] = self._start_worker(shard)
+        for future in lost:
+            if not future.done():
+                future.set_exception(WorkerDied(f"{reason} before answering"))
+
+    def submit(self, graph_name: str, method: str, *args, config: Dict[str, Any], **kwargs) -> Future:
+        """
+        Run `graph.<method>(*args, config=config, **kwargs)` on the shard that owns config's thread_id.
+        Returns a Future for the (pickled) result.
+        """
+        if self._closed:
+            raise RuntimeError("GraphWorkerPool is closed")
+        if method not in ALLOWED_METHODS:
+            raise ValueError(f"Unsupported graph method '{method}'. Expected one of {ALLOWED_METHODS}")
+        shard = shard_for(config["configurable"]["thread_id"], self.num_workers)
+        future: Future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            if shard in self._broken:
+                raise WorkerDied(f"Shard {shard} is broken: {self._broken[shard]}")
+            if not self._workers[shard].is_alive():
+                raise WorkerDied(f"Graph worker {shard} has exited and is being restarted")
+            self._futures[request_id] = (shard, future)
+            self._queues[shard].put((request_id, graph_name, method, args, {**kwargs, "config": config}))
+        return future
+
+    def invoke(self, graph_name: str, input: Any, config: Dict[str, Any], **kwargs) -> Any:
+        return self.submit(graph_name, "invoke", input, config=config, **kwargs).result()
+
+    def stream(self, graph_name: str, input: Any, config: Dict[str, Any], **kwargs) -> List[Any]:
+        """Run graph.stream in the worker and return all chunks as a list."""
+        return self.submit(graph_name, "stream", input, config=config, **kwargs).result()
+
+    def get_state(self, graph_name: str, config: Dict[str, Any]) -> Any:
+        return self.submit(graph_name, "get_state", config=config).result()
+
+    def close(self) -> None:
+        """Stop all workers after they finish the requests already queued."""
+        if self._closed:
+            return
+        self._closed = True
+        for q in self._queues:
+            q.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._dispatcher.join()
+        with self._lock:
+            for _, future in self._futures.values():
+                if not future.done():
+                    future.set_exception(WorkerDied("GraphWorkerPool closed before the request was answered"))
+            self._futures.clear()
+
+    def __enter__(self) -> "GraphWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,376 @@
+"""
+Write-Behind Journal
+Durable, asynchronous delivery of writes to a remote API, so a conversation turn does not wait on it.
+
+The calendar tools used to block the turn on a synchronous events.insert. In write-behind mode, a tool
+appends the validated write to a WriteJournal instead: one JSON line, flushed and fsync'd before
+the tool replies, so an acknowledged write survives a crash. A Flusher thread delivers pending
+entries with exponential backoff on transient errors (network, 408, 429, 5xx) and records each
+outcome in the journal. Undelivered entries are replayed and retried when the journal is reopened.
+
+Outcomes are kept until the thread that queued them has been told: `report_messages` turns them into
+messages for that thread (on its next model call), each with a stable id so re-sending one replaces
+it. An outcome is marked reported only once a later step finds its message in the thread's state,
+i.e. after the update was checkpointed. Reported entries are dropped when the journal is compacted.
+
+A journal has one writer: it holds an exclusive lock on "<path>.lock" while open, and a second
+opener gets JournalLocked. `open_journal` takes the first free of "<path>", "<path>.1", ..., so
+each process of a worker pool gets its own journal and a restart picks the same ones up again.
+
+Example usage:
+    journal = open_journal("/var/lib/agent/calendar.journal")
+    flusher = Flusher(journal, deliver=insert_event).start()
+    entry = journal.append("insert", {"body": body}, thread_id="t1", label="'Standup' on 2025-02-15")
+    ...
+    messages = report_messages(journal, config, state["messages"])   # [AIMessage("Update on 'Standup' ...")]
+"""
+
+import os
+import json
+import fcntl
+import time
+import uuid
+import random
+import logging
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "langgraph-write-behind.journal")
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+REPORT_PREFIX = "write-behind-"
+
+
+class JournalLocked(RuntimeError):
+    """Another WriteJournal (in this or another process) has the journal open."""
+
+
+@dataclass
+class JournalEntry:
+    kind: str
+    payload: Dict[str, Any]
+    thread_id: Optional[str] = None
+    label: str = ""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
+    status: str = PENDING
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+def retryable(error: Exception) -> bool:
+    """Transient errors: no HTTP status (network), request timeout, rate limit or server error."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return status is None or int(status) in (408, 429) or int(status) >= 500
+
+
+# ------------------------------------------------------------------------------
+# Journal
+# ------------------------------------------------------------------------------
+
+class WriteJournal:
+    """
+    Append-only JSON-lines journal of writes and their outcomes. Raises JournalLocked if another
+    WriteJournal has `path` open; `close()` releases it.
+
+    Args:
+        path: Journal file (created if missing). Defaults to $WRITE_BEHIND_JOURNAL or a temp file.
+        fsync: fsync after every record. Turning it off trades durability for speed (tests).
+        compact_after: Compact once this many records describe entries that are no longer needed.
+    """
+
+    def __init__(self, path: Optional[str] = None, fsync: bool = True, compact_after: int = 1000):
+        self.path = path or os.getenv("WRITE_BEHIND_JOURNAL") or DEFAULT_PATH
+        self.fsync = fsync
+        self.compact_after = compact_after
+        self._entries: Dict[str, JournalEntry] = {}
+        self._dead_records = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # The lock is on a separate file: compaction replaces the journal's inode, a lock on it would go with it.
+        self._lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise JournalLocked(f"Journal {self.path} is open in another writer") from None
+        if os.path.exists(self.path):
+            self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+        # Safe while we hold the lock: no other writer can be appending to the file being replaced.
+        self.compact()
+
+    def _replay(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for number, line in enumerate(lines, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Only the last line can be torn (a crash mid-append); its write was never acknowledged.
+                logger.warning("Skipping unreadable record %d of %s", number, self.path)
+                continue
+            self._apply(record)
+        logger.info("Replayed %s: %d pending writes", self.path, len(self.pending()))
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record["op"]
+        if op == "append":
+            entry = JournalEntry(**record["entry"])
+            self._entries[entry.id] = entry
+            return
+        entry = self._entries.get(record["id"])
+        if entry is None:
+            return
+        if op == "reported":
+            del self._entries[entry.id]
+            # Its append, outcome and reported records can all go at the next compaction.
+            self._dead_records += 3
+        else:
+            entry.status, entry.attempts = op, record.get("attempts", entry.attempts)
+            entry.result, entry.error = record.get("result"), record.get("error")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, kind: str, payload: Dict[str, Any], thread_id: Optional[str] = None, label: str = "") -> JournalEntry:
+        """Journal a write; returns once it is on disk. The Flusher picks it up from there."""
+        entry = JournalEntry(kind, payload, thread_id, label)
+        with self._lock:
+            self._write({"op": "append", "entry": asdict(entry)})
+            self._entries[entry.id] = entry
+            self._changed.notify_all()
+        return entry
+
+    def get(self, entry_id: str) -> Optional[JournalEntry]:
+        with self._lock:
+            return self._entries.get(entry_id)
+
+    def pending(self) -> List[JournalEntry]:
+        """Entries not yet delivered, oldest first."""
+        with self._lock:
+            return [e for e in self._entries.values() if e.status == PENDING]
+
+    def _finish(self, entry_id: str, status: str, **fields) -> None:
+        with self._lock:
+            entry = self._entries[entry_id]
+            self._write({"op": status, "id": entry_id, "attempts": entry.attempts, **fields})
+            entry.status = status
+            entry.result, entry.error = fields.get("result"), fields.get("error")
+            self._changed.notify_all()
+
+    def complete(self, entry_id: str, result: Dict[str, Any]) -> None:
+        self._finish(entry_id, DONE, result=result)
+
+    def fail(self, entry_id: str, error: str) -> None:
+        self._finish(entry_id, FAILED, error=error)
+
+    def outcomes(self, thread_id: str) -> List[JournalEntry]:
+        """Finished entries of a thread that it has not been told about yet."""
+        with self._lock:
+            return [e for e in self._entries.values()
+                    if e.thread_id == thread_id and e.status != PENDING]
+
+    def mark_reported(self, entry_ids: List[str]) -> None:
+        """Record that the thread has been told; the entries are dropped from memory and, on compaction, from disk."""
+        with self._lock:
+            for entry_id in entry_ids:
+                if self._entries.pop(entry_id, None) is not None:
+                    self._write({"op": "reported", "id": entry_id})
+                    self._dead_records += 3
+            due = self._dead_records >= self.compact_after
+        if due:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the entries still needed, replacing the file atomically."""
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps({"op": "append", "entry": asdict(entry)}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._dead_records = 0
+
+    def wait(self, timeout: Optional[float]) -> None:
+        """Block until the journal changes (or `wake` is called) or `timeout` seconds pass."""
+        with self._lock:
+            self._changed.wait(timeout)
+
+    def wake(self) -> None:
+        with self._lock:
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            statuses = [e.status for e in self._entries.values()]
+        return {s: statuses.count(s) for s in (PENDING, DONE, FAILED)}
+
+
+def open_journal(path: Optional[str] = None, slots: int = 64, **kwargs) -> WriteJournal:
+    """
+    Opens the first journal of "<path>", "<path>.1", ... "<path>.<slots - 1>" that no other writer
+    holds. Processes sharing a path get one slot each, and the same slots are reopened (and their
+    pending writes replayed) after a restart.
+    """
+    path = path or os.getenv("WRITE_BEHIND_JOURNAL") or DEFAULT_PATH
+    for slot in range(slots):
+        try:
+            return WriteJournal(path if slot == 0 else f"{path}.{slot}", **kwargs)
+        except JournalLocked:
+            continue
+    raise JournalLocked(f"All {slots} journal slots of {path} are in use")
+
+
+# ------------------------------------------------------------------------------
+# Flusher
+# ------------------------------------------------------------------------------
+
+class Flusher:
+    """
+    Background thread that delivers a journal's pending entries, oldest first.
+
+    `deliver(entry)` performs the write and returns a JSON-serializable result; it should be
+    idempotent per `entry.id`, since an attempt that succeeded remotely but failed locally is retried.
+
+    Args:
+        journal: The WriteJournal to drain.
+        deliver: Performs one write.
+        max_attempts: Attempts before an entry is marked failed.
+        base_delay_s, max_delay_s: Exponential backoff between attempts (with jitter).
+        is_retryable: Which errors are worth another attempt (default `retryable`).
+        on_result: Called with each finished entry, e.g. to push a notification.
+    """
+
+    def __init__(self, journal: WriteJournal, deliver: Callable[[JournalEntry], Dict[str, Any]],
+                 max_attempts: int = 5, base_delay_s: float = 0.5, max_delay_s: float = 30.0,
+                 is_retryable: Callable[[Exception], bool] = retryable,
+                 on_result: Optional[Callable[[JournalEntry], None]] = None):
+        self.journal = journal
+        self.deliver = deliver
+        self.max_attempts = max_attempts
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.is_retryable = is_retryable
+        self.on_result = on_result
+        self._not_before: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Flusher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self.journal.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Wait until nothing is pending; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.journal.pending():
+            if time.monotonic() >= deadline:
+                return False
+            self.journal.wait(min(0.1, max(0.0, deadline - time.monotonic())))
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = [e for e in self.journal.pending() if self._not_before.get(e.id, 0.0) <= now]
+            for entry in due:
+                if self._stop.is_set():
+                    return
+                self._attempt(entry)
+            if not due:
+                waits = [self._not_before.get(e.id, now) - now for e in self.journal.pending()]
+                self.journal.wait(max(0.0, min(waits)) if waits else None)
+
+    def _attempt(self, entry: JournalEntry) -> None:
+        entry.attempts += 1
+        try:
+            result = self.deliver(entry)
+        except Exception as e:
+            if self.is_retryable(e) and entry.attempts < self.max_attempts:
+                delay = min(self.max_delay_s, self.base_delay_s * 2 ** (entry.attempts - 1))
+                self._not_before[entry.id] = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                logger.info("Write %s failed (attempt %d), retrying in %.1fs: %s", entry.id, entry.attempts, delay, e)
+                return
+            logger.warning("Write %s failed after %d attempts: %s", entry.id, entry.attempts, e)
+            self.journal.fail(entry.id, str(e))
+        else:
+            self.journal.complete(entry.id, result)
+        self._not_before.pop(entry.id, None)
+        if self.on_result is not None:
+            try:
+                self.on_result(entry)
+            except Exception:
+                logger.exception("on_result failed for write %s", entry.id)
+
+
+# ------------------------------------------------------------------------------
+# Graph helpers
+# ------------------------------------------------------------------------------
+
+def report_id(entry: JournalEntry) -> str:
+    """The id of the message reporting an entry's outcome."""
+    return REPORT_PREFIX + entry.id
+
+
+def report_messages(journal: Optional[WriteJournal], config: Optional[Dict[str, Any]],
+                    messages: Sequence[Any] = ()) -> List[AIMessage]:
+    """
+    Messages telling the run's thread how its queued writes went. `messages` is the thread's
+    current state: outcomes whose report is already in it were checkpointed, so they are marked
+    reported and not sent again. The others are returned with their stable ids (see `report_id`),
+    so a step that is retried after a failure sends the same messages rather than losing them or
+    adding duplicates. Empty without a thread id.
+    """
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    if journal is None or thread_id is None:
+        return []
+    entries = journal.outcomes(str(thread_id))
+    if not entries:
+        return []
+    seen = {getattr(m, "id", None) for m in messages}
+    delivered = [e.id for e in entries if report_id(e) in seen]
+    if delivered:
+        journal.mark_reported(delivered)
+    reports = []
+    for entry in entries:
+        if report_id(entry) in seen:
+            continue
+        if entry.status == DONE:
+            text = (entry.result or {}).get("message", "done")
+            content = f"Update on {entry.label or entry.kind}: {text}"
+        else:
+            content = f"Could not complete {entry.label or entry.kind} after {entry.attempts} attempts: {entry.error}"
+        reports.append(AIMessage(content=content, id=report_id(entry)))
+    return reports